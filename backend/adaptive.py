@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    imgsz: int  # model input size (multiple of 32)
+    roi: bool  # infer on a crop around the athlete when tracking allows
+    capture_interval_ms: int  # recommended client capture period
+    jpeg_quality: float  # recommended client JPEG quality (0..1)
+
+
+# Best first; each step cuts server work and upload size
+LEVELS: Tuple[QualityLevel, ...] = (
+    QualityLevel(imgsz=640, roi=False, capture_interval_ms=100, jpeg_quality=0.92),
+    QualityLevel(imgsz=512, roi=False, capture_interval_ms=125, jpeg_quality=0.85),
+    QualityLevel(imgsz=416, roi=True, capture_interval_ms=166, jpeg_quality=0.8),
+    QualityLevel(imgsz=320, roi=True, capture_interval_ms=250, jpeg_quality=0.7),
+)
+
+
+class AdaptiveController:
+    """Per-session quality control that holds a latency target as server load changes.
+
+    Each finished frame reports its latency (arrival to encoded result) and the
+    server's load (frames in flight per worker thread). The controller keeps an
+    EMA of the latency and steps down one level when it exceeds `target_ms` or
+    the workers are oversubscribed, at most once per `cooldown` frames. It steps
+    back up only after `recover_after` consecutive frames comfortably inside the
+    target, so a brief lull does not make it oscillate.
+    """
+
+    def __init__(
+        self,
+        target_ms: float = 200.0,
+        levels: Tuple[QualityLevel, ...] = LEVELS,
+        alpha: float = 0.2,
+        cooldown: int = 10,
+        recover_after: int = 50,
+        headroom: float = 0.6,
+    ) -> None:
+        self.target_ms = target_ms
+        self.levels = levels
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.recover_after = recover_after
+        self.headroom = headroom
+        self.index = 0
+        self.latency_ms: Optional[float] = None
+        self._since_change = 0
+        self._calm = 0
+
+    @property
+    def level(self) -> QualityLevel:
+        return self.levels[self.index]
+
+    def observe(self, latency_ms: float, load: float) -> Optional[QualityLevel]:
+        """Record one frame; returns the new level when it changes."""
+        self.latency_ms = latency_ms if self.latency_ms is None else (
+            (1 - self.alpha) * self.latency_ms + self.alpha * latency_ms
+        )
+        self._since_change += 1
+        overloaded = self.latency_ms > self.target_ms or load > 1.0
+        comfortable = self.latency_ms < self.headroom * self.target_ms and load < 0.5
+        self._calm = self._calm + 1 if comfortable else 0
+
+        step = 0
+        if overloaded and self._since_change >= self.cooldown and self.index < len(self.levels) - 1:
+            step = 1
+        elif self._calm >= self.recover_after and self.index > 0:
+            step = -1
+        if not step:
+            return None
+        self.index += step
+        self._since_change = 0
+        self._calm = 0
+        # The EMA reflects the old level; start the new one from the target
+        self.latency_ms = min(self.latency_ms, self.target_ms)
+        return self.level
+
+    def message(self) -> dict:
+        """The control message telling the client how to capture at the current level."""
+        return {"type": "control", "level": self.index, **asdict(self.level)}
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.environ.get(name) or default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value else default
+
+
+@dataclass
+class Settings:
+    # Threads running decode / inference / encode off the event loop
+    worker_threads: int = 4
+    # Load and warm the pose model at startup instead of on the first frame
+    warmup: bool = True
+    # Pose model: PyTorch weights, or an ONNX / OpenVINO export from pose_app/export_model.py.
+    # Intra-op threads of its runtime; 0 keeps the runtime default
+    model_weights: str = "yolov8n-pose.pt"
+    inference_threads: int = 0
+    # Cross-session micro-batching; a window of 0 disables it
+    batch_window_ms: float = 8.0
+    batch_max_size: int = 8
+    # Frames that waited longer than this before a worker picked them up are dropped
+    max_frame_age_ms: float = 500.0
+    # Per-session controller trading input size, crop, capture rate and JPEG quality
+    # to keep frame latency under the target as load rises
+    adaptive_quality: bool = True
+    latency_target_ms: float = 200.0
+    # Run inference on a crop around the athlete's previous box when possible
+    roi_tracking: bool = False
+    # Run the model on every Nth frame and extrapolate filtered keypoints in between;
+    # a motion threshold (frame heights per second, 0 = off) forces earlier detection
+    detect_every: int = 1
+    motion_threshold: float = 0.0
+    smoothing: bool = False
+    # Learned classifier from pose_app/train_baseline.py, run next to the heuristic
+    # detectors; empty disables it. A batch window of 0 calls it per frame
+    classifier_model: str = ""
+    classifier_batch_ms: float = 5.0
+    # Default for sessions that do not say: track every athlete in view, up to max_people
+    multi_person: bool = False
+    max_people: int = 8
+    # Reconnecting clients resume their parked session (reps, detector and tracker state)
+    # for this long; the store evicts least recently parked sessions beyond the caps
+    session_ttl_s: float = 300.0
+    session_store_max: int = 256
+    session_store_mb: float = 64.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            worker_threads=max(1, _env_int("POSE_WORKER_THREADS", cls.worker_threads)),
+            warmup=_env_bool("POSE_WARMUP", cls.warmup),
+            model_weights=_env_str("POSE_MODEL", cls.model_weights),
+            inference_threads=max(0, _env_int("POSE_INFERENCE_THREADS", cls.inference_threads)),
+            batch_window_ms=max(0.0, _env_float("POSE_BATCH_WINDOW_MS", cls.batch_window_ms)),
+            batch_max_size=max(1, _env_int("POSE_BATCH_MAX_SIZE", cls.batch_max_size)),
+            max_frame_age_ms=max(1.0, _env_float("POSE_MAX_FRAME_AGE_MS", cls.max_frame_age_ms)),
+            adaptive_quality=_env_bool("POSE_ADAPTIVE_QUALITY", cls.adaptive_quality),
+            latency_target_ms=max(1.0, _env_float("POSE_LATENCY_TARGET_MS", cls.latency_target_ms)),
+            roi_tracking=_env_bool("POSE_ROI_TRACKING", cls.roi_tracking),
+            detect_every=max(1, _env_int("POSE_DETECT_EVERY", cls.detect_every)),
+            motion_threshold=max(0.0, _env_float("POSE_MOTION_THRESHOLD", cls.motion_threshold)),
+            smoothing=_env_bool("POSE_SMOOTHING", cls.smoothing),
+            classifier_model=_env_str("POSE_CLASSIFIER_MODEL", cls.classifier_model),
+            classifier_batch_ms=max(0.0, _env_float("POSE_CLASSIFIER_BATCH_MS", cls.classifier_batch_ms)),
+            multi_person=_env_bool("POSE_MULTI_PERSON", cls.multi_person),
+            max_people=max(1, _env_int("POSE_MAX_PEOPLE", cls.max_people)),
+            session_ttl_s=max(0.0, _env_float("POSE_SESSION_TTL_S", cls.session_ttl_s)),
+            session_store_max=max(0, _env_int("POSE_SESSION_STORE_MAX", cls.session_store_max)),
+            session_store_mb=max(0.0, _env_float("POSE_SESSION_STORE_MB", cls.session_store_mb)),
+        )
+
+
+settings = Settings.from_env()
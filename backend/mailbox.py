@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+
+
+@dataclass
+class PendingFrame:
+    processor: Any  # PoseProcessor that was active when the frame arrived
+    frame: Union[str, bytes, memoryview]
+    frame_id: Optional[int] = None
+    timestamp_ms: float = 0.0
+    received_at: float = field(default_factory=time.perf_counter)
+
+    def age_ms(self) -> float:
+        return (time.perf_counter() - self.received_at) * 1000.0
+
+
+class FrameMailbox:
+    """Single-slot, latest-frame-wins handoff between a session's receiver and worker tasks.
+
+    `put` never blocks: a frame that is still waiting when a newer one arrives is
+    replaced and counted in `overwritten`. The worker always gets the newest frame.
+    """
+
+    def __init__(self) -> None:
+        self._slot: Optional[PendingFrame] = None
+        self._event = asyncio.Event()
+        self._closed = False
+        self.overwritten = 0
+        self.stale = 0
+        # The frame the worker pool is running, so the session can wait for it on close
+        self.in_flight: Optional[Future] = None
+
+    @property
+    def dropped(self) -> int:
+        return self.overwritten + self.stale
+
+    def put(self, frame: PendingFrame) -> bool:
+        """Store `frame`; returns True if it replaced one the worker never saw."""
+        replaced = self._slot is not None
+        if replaced:
+            self.overwritten += 1
+        self._slot = frame
+        self._event.set()
+        return replaced
+
+    async def get(self) -> Optional[PendingFrame]:
+        """Wait for the next frame; returns None once the mailbox is closed."""
+        while self._slot is None:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        frame, self._slot = self._slot, None
+        return frame
+
+    def close(self) -> None:
+        self._closed = True
+        self._event.set()
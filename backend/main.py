@@ -2,34 +2,110 @@ from __future__ import annotations
 
 import os
 import sys
-import base64
+import asyncio
 import json
-from typing import Optional
-from io import BytesIO
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set, Union
+
+_IMPORT_START = time.perf_counter()
 
 import cv2
 import numpy as np
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from pose_app.pose_tracker import MediaPipePoseTracker
-from pose_app.detectors import (
-    SquatDetector,
-    PushupDetector,
-    LungeDetector,
-    SideLungeDetector,
-    HammerCurlDetector,
-    ChairDipDetector,
-    ExerciseFeedback,
+from pose_app.pose_tracker import MAPPED_LANDMARKS, MediaPipePoseTracker
+from pose_app.multi_person import MultiPersonTracker
+from pose_app.batching import make_pose_batcher
+from pose_app.model_pool import fixed_input_shape
+from pose_app.classifier import ClassifierProbe, get_classifier, make_classifier_batcher
+from pose_app.detectors import AUTO_EXERCISE, EXERCISE_MAP, AutoExerciseDetector, ExerciseFeedback, make_detector
+from pose_app.dataset import Sample, SampleWriter, close_sample_writers, get_sample_writer, sample_dir
+from pose_app.timing import StageTimer, mark
+from backend.adaptive import LEVELS, AdaptiveController
+from backend.config import settings
+from backend.mailbox import FrameMailbox, PendingFrame
+from backend.metrics import SessionStats, metrics
+from backend.sessions import SessionStore
+from backend.warmup import Readiness, start_warmup
+from backend.protocol import (
+    PROTOCOL_BINARY,
+    PROTOCOL_JSON,
+    PROTOCOLS,
+    decode_binary_frame,
+    decode_json_frame,
+    encode_binary_result,
+    encode_json_result,
 )
-from pose_app.dataset import save_sample_csv, Sample
+
+# The pose model stack (ultralytics, torch) is not imported yet; warmup does that
+readiness = Readiness(started_at=_IMPORT_START, imports_ms=round((time.perf_counter() - _IMPORT_START) * 1000.0, 1))
 
 app = FastAPI(title="Pose Coach API")
 
+# Bounded pool for the CPU-bound frame pipeline so the event loop stays responsive
+frame_executor = ThreadPoolExecutor(max_workers=settings.worker_threads, thread_name_prefix="pose-worker")
+
+# Frames handed to the worker pool and not finished yet, across all sessions;
+# only touched from the event loop
+frames_in_flight = 0
+
+
+def _possible_callers() -> int:
+    """Frames that can be waiting in a batcher right now: one per busy worker thread."""
+    return min(settings.worker_threads, frames_in_flight)
+
+
+# Fixed-shape exports take one frame of one size per call: no batching, no adaptive input size
+fixed_batch, fixed_imgsz = fixed_input_shape(settings.model_weights)
+
+# Frames from all sessions share batched predict calls on the pooled model
+pose_batcher = (
+    make_pose_batcher(
+        weights=settings.model_weights,
+        # Only worker threads submit, so a larger batch could never fill
+        max_batch_size=min(settings.batch_max_size, settings.worker_threads),
+        max_wait_ms=settings.batch_window_ms,
+        threads=settings.inference_threads,
+        max_callers=_possible_callers,
+    )
+    if settings.batch_window_ms > 0 and fixed_batch is None
+    else None
+)
+
+# Optional learned classifier, loaded once and shared (and batched) across sessions
+classifier_batcher = None
+classifier_probe: Optional[ClassifierProbe] = None
+if settings.classifier_model:
+    try:
+        classifier_batcher = (
+            make_classifier_batcher(
+                settings.classifier_model,
+                # Classifier calls also come only from worker threads
+                max_batch_size=settings.worker_threads,
+                max_wait_ms=settings.classifier_batch_ms,
+                max_callers=_possible_callers,
+            )
+            if settings.classifier_batch_ms > 0
+            else None
+        )
+        classifier_probe = ClassifierProbe(get_classifier(settings.classifier_model), classifier_batcher)
+    except Exception as e:
+        print(f"Classifier disabled: {e}")
+
+# Sessions parked on disconnect so a reconnecting client keeps its reps and tracker state
+session_store = SessionStore(
+    ttl_s=settings.session_ttl_s,
+    max_sessions=settings.session_store_max,
+    max_bytes=int(settings.session_store_mb * (1 << 20)),
+)
+
 # CORS middleware for React frontend
 app.add_middleware(
     CORSMiddleware,
@@ -39,36 +115,153 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-EXERCISE_MAP = {
-    "Squat": SquatDetector,
-    "Pushup": PushupDetector,
-    "Lunge": LungeDetector,
-    "Side Lunge": SideLungeDetector,
-    "Hammer Curl": HammerCurlDetector,
-    "Chair Dip": ChairDipDetector,
-}
+# "overlay": server draws keypoints and the status banner and returns a JPEG
+# "landmarks": server returns only the mapped keypoints; the client draws
+RENDER_OVERLAY = "overlay"
+RENDER_LANDMARKS = "landmarks"
+RENDER_MODES = (RENDER_OVERLAY, RENDER_LANDMARKS)
+MAPPED_INDEX = np.array(MAPPED_LANDMARKS, dtype=np.intp)
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "pose_app", "data")
+
+
+def _recognized(detector, selected: str) -> str:
+    """The selected exercise, or in auto mode the one the detector currently recognizes."""
+    if isinstance(detector, AutoExerciseDetector):
+        return detector.active
+    return selected
+
+
+def _voice_cue(feedback: ExerciseFeedback, last_phase: Optional[str]) -> Optional[str]:
+    voice_cue = None
+    if last_phase != feedback.phase:
+        voice_cue = f"{feedback.name} {feedback.phase}"
+    for cue in feedback.cues:
+        if "rep" in cue:
+            voice_cue = cue
+    return voice_cue
+
+
+def _mapped_landmarks(landmarks: np.ndarray) -> list:
+    """Compact [index, x, y, visibility] rows for the keypoints the model fills in."""
+    mapped = landmarks[MAPPED_INDEX].astype(np.float64)
+    xy = np.round(mapped[:, :2], 1).tolist()
+    vis = np.round(mapped[:, 3], 3).tolist()
+    return [[idx, x, y, v] for idx, (x, y), v in zip(MAPPED_LANDMARKS, xy, vis)]
 
 
 class PoseProcessor:
-    def __init__(self, exercise_name: str, log_enabled: bool = False):
-        self.tracker = MediaPipePoseTracker()
-        self.detector = EXERCISE_MAP[exercise_name]()
+    def __init__(
+        self,
+        exercise_name: str,
+        log_enabled: bool = False,
+        tracker: Optional[MediaPipePoseTracker] = None,
+        protocol: str = PROTOCOL_JSON,
+        render: str = RENDER_OVERLAY,
+        session: Optional[SessionStats] = None,
+        multi_person: bool = False,
+        controller: Optional[AdaptiveController] = None,
+    ):
+        # The tracker only wraps the process-wide shared model, so it can be reused across exercise switches
+        self.tracker = tracker if tracker is not None else MediaPipePoseTracker(
+            weights=settings.model_weights,
+            scheduler=pose_batcher,
+            threads=settings.inference_threads,
+            tracking=settings.roi_tracking,
+            detect_every=settings.detect_every,
+            motion_threshold=settings.motion_threshold or None,
+            smoothing=settings.smoothing,
+        )
+        self.detector = make_detector(exercise_name)
+        # Multi-person mode: every athlete in view gets an identity and a detector of their own
+        self.people = (
+            MultiPersonTracker(exercise_name, self.tracker, max_people=settings.max_people)
+            if multi_person
+            else None
+        )
         self.exercise_name = exercise_name
         self.log_enabled = log_enabled
+        # Auto-mode samples carry a guessed label and are kept apart
+        self.log_dir = sample_dir(DATA_DIR, exercise_name)
+        # Every writer this session logged to (one per recognized exercise in auto mode)
+        self.log_writers: Set[SampleWriter] = set()
+        self.protocol = protocol
+        self.render = render
+        self.session = session if session is not None else SessionStats()
+        self.session.exercise = exercise_name
         self.frame_count = 0
         self.last_phase: Optional[str] = None
+        # Stage timings (ms) of the most recent frame
+        self.last_timings: dict = {}
+        # Adaptive quality: the worker sends `control_message` to the client when it is set.
+        # A config change mid-session passes the live controller on, since the client
+        # keeps capturing at its level; otherwise the client starts at the top level.
+        if controller is None and settings.adaptive_quality:
+            controller = AdaptiveController(settings.latency_target_ms)
+        self.controller = controller
+        self.control_message: Optional[dict] = None
+        if self.controller is not None:
+            self.apply_level(announce=False)
+
+    def apply_level(self, announce: bool = True) -> None:
+        """Point the tracker at the controller's current input size and crop setting.
+
+        With `announce`, the worker also tells the client the new capture settings.
+        """
+        level = self.controller.level
+        # A fixed-shape model keeps its size; the other knobs still apply
+        self.tracker.imgsz = level.imgsz if fixed_imgsz is None else None
+        self.tracker.tracking = settings.roi_tracking or level.roi
+        self.session.quality_level = self.controller.index
+        if announce:
+            self.control_message = self.controller.message()
+
+    @property
+    def current_exercise(self) -> str:
+        """The selected exercise, or in auto mode the one currently recognized."""
+        return _recognized(self.detector, self.exercise_name)
+
+    def _log(self, sample: Sample) -> None:
+        writer = get_sample_writer(self.log_dir, sample.exercise)
+        self.log_writers.add(writer)
+        writer.write(sample)
+
+    def flush_logs(self) -> None:
+        """Ask every writer this session used to write its queued samples now."""
+        for writer in self.log_writers:
+            writer.flush()
 
-    def process_frame(self, frame_bytes: bytes) -> dict:
-        """Process a single frame and return results"""
+    def resume(self, session: SessionStats, log_enabled: bool, protocol: str, render: str) -> None:
+        """Attach a parked processor to a new connection, keeping detector and tracker state."""
+        self.session = session
+        self.session.exercise = self.exercise_name
+        if self.controller is not None:
+            # A reconnected client starts at the top level again
+            self.apply_level(announce=self.controller.index > 0)
+        self.log_enabled = log_enabled
+        self.protocol = protocol
+        self.render = render
+        # The last keypoints are from before the disconnect; detect instead of extrapolating
+        self.tracker.force_detect()
+
+    def process_frame(self, frame_bytes: Union[bytes, memoryview], timer: Optional[StageTimer] = None) -> dict:
+        """Process a single frame and return results (overlay as raw JPEG bytes, or landmarks only)
+
+        With a timer, the wall time of each pipeline stage is recorded on it.
+        """
         # Decode image from bytes
         nparr = np.frombuffer(frame_bytes, np.uint8)
         img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        mark(timer, "imdecode")
         
         if img is None:
             return {"error": "Failed to decode image"}
 
+        draw = self.render == RENDER_OVERLAY
+        if self.people is not None:
+            return self._process_people(img, draw, timer)
+
         # Process pose
-        result = self.tracker.process_frame(img, draw=True)
+        result = self.tracker.process_frame(img, draw=draw, timer=timer)
         overlay = img
         feedback_data = {
             "name": self.exercise_name,
@@ -79,24 +272,27 @@ class PoseProcessor:
         }
 
         if result is not None:
-            feedback: ExerciseFeedback = self.detector.infer(result.landmarks_px)
+            feedback: ExerciseFeedback = self.detector.infer(result.landmarks)
+            mark(timer, "detector")
+            exercise = self.current_exercise
+            model = None
+            if classifier_probe is not None:
+                model = classifier_probe(result.landmarks, exercise, feedback.phase)
+                metrics.observe_classifier(model["latency_ms"], model["agrees"])
+                mark(timer, "classifier")
             
             # Draw overlay text
-            text = f"{feedback.name} | reps: {feedback.reps} | phase: {feedback.phase}"
-            cv2.rectangle(overlay, (10, 10), (510, 60), (0, 0, 0), -1)
-            cv2.putText(
-                overlay, text, (20, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2, cv2.LINE_AA
-            )
+            if draw:
+                text = f"{feedback.name} | reps: {feedback.reps} | phase: {feedback.phase}"
+                cv2.rectangle(overlay, (10, 10), (510, 60), (0, 0, 0), -1)
+                cv2.putText(
+                    overlay, text, (20, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2, cv2.LINE_AA
+                )
+                mark(timer, "draw")
 
             # Check for voice cues
-            voice_cue = None
-            if self.last_phase != feedback.phase:
-                self.last_phase = feedback.phase
-                voice_cue = f"{feedback.name} {feedback.phase}"
-            
-            for cue in feedback.cues:
-                if "rep" in cue:
-                    voice_cue = cue
+            voice_cue = _voice_cue(feedback, self.last_phase)
+            self.last_phase = feedback.phase
 
             feedback_data = {
                 "name": feedback.name,
@@ -105,82 +301,362 @@ class PoseProcessor:
                 "cues": feedback.cues,
                 "voice_cue": voice_cue
             }
+            if exercise != self.exercise_name:
+                feedback_data["exercise"] = exercise
+            if model is not None:
+                feedback_data["model"] = {"prediction": model["prediction"], "agrees": model["agrees"]}
 
-            # Dataset logging
+            # Dataset logging; the writer thread does the file I/O
             if self.log_enabled:
                 self.frame_count += 1
                 if self.frame_count % 5 == 0:
-                    try:
-                        save_sample_csv(
-                            out_dir=os.path.join(os.path.dirname(__file__), "..", "pose_app", "data"),
-                            sample=Sample(
-                                exercise=self.exercise_name,
-                                landmarks=result.landmarks_px,
-                                label=feedback.phase
-                            ),
+                    self._log(
+                        Sample(
+                            exercise=exercise,
+                            landmarks=result.landmarks.copy(),
+                            label=feedback.phase
                         )
-                    except Exception as e:
-                        print(f"Error saving sample: {e}")
+                    )
+                    mark(timer, "logging")
+
+        if not draw:
+            h, w = img.shape[:2]
+            landmarks = _mapped_landmarks(result.landmarks) if result is not None else []
+            mark(timer, "serialize")
+            return {
+                "landmarks": landmarks,
+                "size": [w, h],
+                "feedback": feedback_data
+            }
 
         # Encode processed frame back to JPEG
         _, buffer = cv2.imencode('.jpg', overlay)
-        img_base64 = base64.b64encode(buffer).decode('utf-8')
+        mark(timer, "imencode")
 
         return {
-            "image": img_base64,
+            "image": buffer.tobytes(),
             "feedback": feedback_data
         }
 
+    def _process_people(self, img: np.ndarray, draw: bool, timer: Optional[StageTimer]) -> dict:
+        """Multi-person frame: per-person results under "people", the largest person as "feedback"."""
+        people = self.people.process_frame(img, draw=draw, timer=timer)
+        primary = self.people.primary(people)
+        log_now = False
+        if self.log_enabled and people:
+            self.frame_count += 1
+            log_now = self.frame_count % 5 == 0
+
+        entries = []
+        feedback_data = {"name": self.exercise_name, "reps": 0, "phase": "unknown", "cues": [], "voice_cue": None}
+        for person in people:
+            feedback = person.feedback
+            exercise = _recognized(person.detector, self.exercise_name)
+            data = {
+                "name": feedback.name,
+                "reps": feedback.reps,
+                "phase": feedback.phase,
+                "cues": feedback.cues,
+                "voice_cue": _voice_cue(feedback, person.last_phase),
+            }
+            person.last_phase = feedback.phase
+            if exercise != self.exercise_name:
+                data["exercise"] = exercise
+            if person is primary:
+                # The learned classifier only runs on the main person to keep its cost per frame flat
+                if classifier_probe is not None:
+                    model = classifier_probe(person.landmarks, exercise, feedback.phase)
+                    metrics.observe_classifier(model["latency_ms"], model["agrees"])
+                    data["model"] = {"prediction": model["prediction"], "agrees": model["agrees"]}
+                    mark(timer, "classifier")
+                feedback_data = data
+            entry = {"id": person.track_id, "box": np.round(person.box.astype(np.float64), 1).tolist(), "feedback": data}
+            if not draw:
+                entry["landmarks"] = _mapped_landmarks(person.landmarks)
+            entries.append(entry)
+            if log_now:
+                self._log(Sample(exercise=exercise, landmarks=person.landmarks.copy(), label=feedback.phase))
+        if log_now:
+            mark(timer, "logging")
+
+        if not draw:
+            h, w = img.shape[:2]
+            mark(timer, "serialize")
+            return {
+                "landmarks": entries[people.index(primary)]["landmarks"] if primary is not None else [],
+                "size": [w, h],
+                "feedback": feedback_data,
+                "people": entries,
+            }
+
+        text = f"people: {len(people)}"
+        if primary is not None:
+            text = f"#{primary.track_id} {feedback_data['name']} | reps: {feedback_data['reps']} | {text}"
+        cv2.rectangle(img, (10, 10), (510, 60), (0, 0, 0), -1)
+        cv2.putText(img, text, (20, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2, cv2.LINE_AA)
+        _, buffer = cv2.imencode('.jpg', img)
+        mark(timer, "imencode")
+        return {"image": buffer.tobytes(), "feedback": feedback_data, "people": entries}
+
+
+def handle_frame(pending: PendingFrame, dropped: int = 0, load: float = 0.0) -> Union[str, bytes]:
+    """Decode, process and encode one frame for the session's protocol; runs on the worker pool"""
+    # Time spent in the mailbox and waiting for a worker thread
+    queue_ms = pending.age_ms()
+    timer = StageTimer()
+    processor: PoseProcessor = pending.processor
+    frame = pending.frame
+    if isinstance(frame, str):
+        frame_bytes = decode_json_frame(frame)
+        mark(timer, "b64_decode")
+    else:
+        frame_bytes = frame
+    result = processor.process_frame(frame_bytes, timer=timer)
+    result["queue_ms"] = round(queue_ms, 2)
+    result["dropped"] = dropped
+    if processor.protocol == PROTOCOL_BINARY:
+        out = encode_binary_result(result, pending.frame_id or 0, pending.timestamp_ms)
+    else:
+        if pending.frame_id is not None:
+            result["frame_id"] = pending.frame_id
+        out = encode_json_result(result)
+    timer.mark("encode")
+    processor.last_timings = timer.stages
+    if "error" in result:
+        metrics.frame_failed("decode")
+    else:
+        latency_ms = queue_ms + timer.total_ms
+        metrics.observe_frame(processor.exercise_name, timer.stages, latency_ms)
+        processor.session.frame_done(time.perf_counter())
+        if not readiness.ready:
+            readiness.recover()
+        if processor.controller is not None and processor.controller.observe(latency_ms, load) is not None:
+            processor.apply_level()
+    return out
+
+
+def warmup_args() -> dict:
+    """What startup warms: the configured model at every input size sessions can use."""
+    # Every size the adaptive controller can pick, so a level change is not a cold call
+    adaptive_sizes = settings.adaptive_quality and fixed_imgsz is None
+    sizes = sorted({level.imgsz for level in LEVELS}, reverse=True) if adaptive_sizes else [None]
+    return {
+        "weights": settings.model_weights,
+        "threads": settings.inference_threads,
+        "sizes": sizes,
+        "classifier": classifier_probe.classifier if classifier_probe is not None else None,
+    }
+
+
+@app.on_event("startup")
+def warm_models():
+    if not settings.warmup:
+        readiness.ready = True
+        return
+    start_warmup(readiness, **warmup_args())
+
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    frame_executor.shutdown(wait=False, cancel_futures=True)
+    if pose_batcher is not None:
+        pose_batcher.close()
+    if classifier_batcher is not None:
+        classifier_batcher.close()
+    close_sample_writers()
+
 
 @app.get("/")
 async def root():
     return {"message": "Pose Coach API", "status": "running"}
 
 
+@app.get("/ready")
+async def get_ready():
+    """200 once the models are loaded and warm (or a frame was served after a failed warmup), 503 until then"""
+    return JSONResponse(readiness.as_dict(), status_code=200 if readiness.ready else 503)
+
+
 @app.get("/exercises")
 async def get_exercises():
-    return {"exercises": list(EXERCISE_MAP.keys())}
+    return {"exercises": list(EXERCISE_MAP.keys()) + [AUTO_EXERCISE]}
+
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "batching": pose_batcher.stats() if pose_batcher is not None else None,
+        "sessions": session_store.stats(),
+        "classifier": {
+            "model": settings.classifier_model,
+            "target": classifier_probe.classifier.target,
+            "batching": classifier_batcher.stats() if classifier_batcher is not None else None,
+        } if classifier_probe is not None else None,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def _send(websocket: WebSocket, out: Union[str, bytes]) -> None:
+    if isinstance(out, bytes):
+        await websocket.send_bytes(out)
+    else:
+        await websocket.send_text(out)
+
+
+def _frame_finished(_future) -> None:
+    global frames_in_flight
+    frames_in_flight -= 1
+
+
+async def _frame_worker(websocket: WebSocket, mailbox: FrameMailbox) -> None:
+    """Process the newest pending frame, skipping any that went stale while waiting"""
+    global frames_in_flight
+    loop = asyncio.get_running_loop()
+    while True:
+        pending = await mailbox.get()
+        if pending is None:
+            return
+        if pending.age_ms() > settings.max_frame_age_ms:
+            mailbox.stale += 1
+            metrics.frame_dropped("stale")
+            continue
+        try:
+            # Load as seen by this frame: frames being processed per worker thread
+            load = (frames_in_flight + 1) / settings.worker_threads
+            frames_in_flight += 1
+            mailbox.in_flight = frame_executor.submit(handle_frame, pending, mailbox.dropped, load)
+            # Count the frame until the pool is done with it, even if this task is cancelled
+            # first (disconnects, shutdown); the decrement runs on the event loop
+            mailbox.in_flight.add_done_callback(
+                lambda f: loop.is_closed() or loop.call_soon_threadsafe(_frame_finished, f)
+            )
+            out = await asyncio.wrap_future(mailbox.in_flight)
+            await _send(websocket, out)
+            processor = pending.processor
+            if processor.control_message is not None:
+                control, processor.control_message = processor.control_message, None
+                await websocket.send_json(control)
+        except Exception as e:
+            # The receive loop is blocked waiting on the client; close so it notices
+            metrics.frame_failed("exception")
+            print(f"Frame worker error: {e}")
+            await websocket.close()
+            return
 
 
 @app.websocket("/ws/pose")
 async def websocket_pose_endpoint(websocket: WebSocket):
     await websocket.accept()
     processor: Optional[PoseProcessor] = None
+    # Client-chosen token identifying the session across reconnects
+    token: Optional[str] = None
+    session = SessionStats()
+    metrics.session_opened(session)
+    # Receiving never waits on inference: frames go into a latest-wins slot
+    # that a separate worker task drains
+    mailbox = FrameMailbox()
+    worker = asyncio.create_task(_frame_worker(websocket, mailbox))
     
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code", 1000))
+            if worker.done():
+                # Surface errors from the worker (e.g. a failed send)
+                worker.result()
+                break
+
+            # Binary mode: header + raw JPEG, no JSON or base64 on the hot path
+            if raw.get("bytes") is not None:
+                if processor is None:
+                    continue
+                frame_id, timestamp_ms, frame_bytes = decode_binary_frame(raw["bytes"])
+                if mailbox.put(PendingFrame(processor, frame_bytes, frame_id, timestamp_ms)):
+                    metrics.frame_dropped("overwritten")
+                continue
+
+            message = json.loads(raw["text"])
             
             # Handle configuration messages
             if message.get("type") == "config":
                 exercise = message.get("exercise", "Squat")
                 log_enabled = message.get("log_enabled", False)
-                processor = PoseProcessor(exercise, log_enabled)
-                await websocket.send_json({"type": "config_ack", "exercise": exercise})
+                protocol = message.get("protocol", PROTOCOL_JSON)
+                if protocol not in PROTOCOLS:
+                    protocol = PROTOCOL_JSON
+                render = message.get("render", RENDER_OVERLAY)
+                if render not in RENDER_MODES:
+                    render = RENDER_OVERLAY
+                multi_person = bool(message.get("multi_person", settings.multi_person))
+                token = message.get("session") or token
+                # First config of a reconnect: pick up the parked session if it matches
+                parked = session_store.take(token) if processor is None and token else None
+                resumed = (
+                    parked is not None
+                    and parked.exercise_name == exercise
+                    and (parked.people is not None) == multi_person
+                )
+                if resumed:
+                    processor = parked
+                    processor.resume(session, log_enabled, protocol, render)
+                else:
+                    if processor is not None:
+                        processor.flush_logs()
+                    previous = processor if processor is not None else parked
+                    processor = PoseProcessor(
+                        exercise,
+                        log_enabled,
+                        tracker=previous.tracker if previous is not None else None,
+                        protocol=protocol,
+                        render=render,
+                        session=session,
+                        multi_person=multi_person,
+                        controller=processor.controller if processor is not None else None,
+                    )
+                await websocket.send_json(
+                    {
+                        "type": "config_ack",
+                        "exercise": exercise,
+                        "protocol": protocol,
+                        "render": render,
+                        "multi_person": multi_person,
+                        "resumed": resumed,
+                    }
+                )
                 continue
             
             # Handle frame processing
             if message.get("type") == "frame" and processor is not None:
                 frame_data = message.get("data")
                 if frame_data:
-                    # Remove data URL prefix if present
-                    if "," in frame_data:
-                        frame_data = frame_data.split(",")[1]
-                    
-                    frame_bytes = base64.b64decode(frame_data)
-                    result = processor.process_frame(frame_bytes)
-                    
-                    await websocket.send_json({
-                        "type": "result",
-                        **result
-                    })
+                    if mailbox.put(PendingFrame(processor, frame_data, message.get("frame_id"))):
+                        metrics.frame_dropped("overwritten")
     
     except WebSocketDisconnect:
         print("Client disconnected")
     except Exception as e:
         print(f"WebSocket error: {e}")
         await websocket.close()
+    finally:
+        metrics.session_closed(session)
+        mailbox.close()
+        worker.cancel()
+        failed = False
+        if mailbox.in_flight is not None:
+            # A frame still running on the pool mutates the processor; park it only afterwards
+            (outcome,) = await asyncio.gather(asyncio.wrap_future(mailbox.in_flight), return_exceptions=True)
+            # A frame cancelled before it started is not a failure
+            failed = isinstance(outcome, Exception)
+        if processor is not None:
+            processor.flush_logs()
+        # A processor whose frame raised may be half-updated; do not hand it to a reconnect
+        if processor is not None and token and not failed:
+            session_store.put(token, processor)
 
 
 if __name__ == "__main__":
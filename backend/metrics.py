@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Set
+
+# Histogram upper bounds in milliseconds, exported in seconds as Prometheus expects
+LATENCY_BUCKETS_MS = (0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0)
+# A session that has not produced a frame for this long counts as 0 FPS
+FPS_IDLE_S = 2.0
+
+
+@dataclass(eq=False)
+class SessionStats:
+    """Per-WebSocket counters; written by the session's worker, read when scraping."""
+    exercise: str = ""
+    frames: int = 0
+    fps: float = 0.0  # exponential moving average of completed frames per second
+    last_frame_at: Optional[float] = None
+    quality_level: int = 0  # adaptive quality level, 0 = best
+
+    def frame_done(self, now: float, alpha: float = 0.2) -> None:
+        if self.last_frame_at is not None:
+            dt = now - self.last_frame_at
+            if dt > 0:
+                self.fps = 1.0 / dt if self.fps == 0.0 else (1 - alpha) * self.fps + alpha / dt
+        self.last_frame_at = now
+        self.frames += 1
+
+    def current_fps(self, now: float) -> float:
+        if self.last_frame_at is None or now - self.last_frame_at > FPS_IDLE_S:
+            return 0.0
+        return self.fps
+
+
+class _Histogram:
+    __slots__ = ("counts", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # last slot is +Inf
+        self.total = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.total += ms
+
+
+@dataclass
+class _Shard:
+    """Everything one worker thread records; only that thread ever writes to it."""
+    stages: Dict[str, _Histogram] = field(default_factory=lambda: defaultdict(_Histogram))
+    frame_latency: _Histogram = field(default_factory=_Histogram)
+    processed: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    failed: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    classifier_latency: _Histogram = field(default_factory=_Histogram)
+    classifier_agreement: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+
+class Metrics:
+    """Process-wide pipeline metrics rendered in the Prometheus text format.
+
+    The hot path takes no lock: each worker thread writes to its own shard and a
+    scrape sums the shards. A scrape may see a frame half recorded, which is fine
+    for monitoring. Session bookkeeping and dropped-frame counts are only touched
+    from the event loop.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()  # taken once per thread, on its first frame
+        self.sessions: Set[SessionStats] = set()
+        self.dropped: Dict[str, int] = defaultdict(int)
+        self.started_at = time.time()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def observe_frame(self, exercise: str, stages: Mapping[str, float], latency_ms: float) -> None:
+        shard = self._shard()
+        for stage, ms in stages.items():
+            shard.stages[stage].observe(ms)
+        shard.frame_latency.observe(latency_ms)
+        shard.processed[exercise] += 1
+
+    def observe_classifier(self, latency_ms: float, agrees: bool) -> None:
+        shard = self._shard()
+        shard.classifier_latency.observe(latency_ms)
+        shard.classifier_agreement["agree" if agrees else "disagree"] += 1
+
+    def frame_failed(self, reason: str) -> None:
+        self._shard().failed[reason] += 1
+
+    def frame_dropped(self, reason: str, count: int = 1) -> None:
+        self.dropped[reason] += count
+
+    def session_opened(self, stats: SessionStats) -> None:
+        self.sessions.add(stats)
+
+    def session_closed(self, stats: SessionStats) -> None:
+        self.sessions.discard(stats)
+
+    def render(self) -> str:
+        with self._shards_lock:
+            shards = list(self._shards)
+        stages: Dict[str, List[int]] = {}
+        stage_sums: Dict[str, float] = defaultdict(float)
+        latency = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        latency_sum = 0.0
+        processed: Dict[str, int] = defaultdict(int)
+        failed: Dict[str, int] = defaultdict(int)
+        clf_latency = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        clf_latency_sum = 0.0
+        agreement: Dict[str, int] = defaultdict(int)
+        for shard in shards:
+            for stage, hist in list(shard.stages.items()):
+                acc = stages.setdefault(stage, [0] * len(hist.counts))
+                for i, c in enumerate(hist.counts):
+                    acc[i] += c
+                stage_sums[stage] += hist.total
+            for i, c in enumerate(shard.frame_latency.counts):
+                latency[i] += c
+            latency_sum += shard.frame_latency.total
+            for k, v in list(shard.processed.items()):
+                processed[k] += v
+            for k, v in list(shard.failed.items()):
+                failed[k] += v
+            for i, c in enumerate(shard.classifier_latency.counts):
+                clf_latency[i] += c
+            clf_latency_sum += shard.classifier_latency.total
+            for k, v in list(shard.classifier_agreement.items()):
+                agreement[k] += v
+
+        now = time.perf_counter()
+        fps: Dict[str, float] = defaultdict(float)
+        per_exercise: Dict[str, int] = defaultdict(int)
+        per_level: Dict[int, int] = defaultdict(int)
+        for s in list(self.sessions):
+            if s.exercise:
+                fps[s.exercise] += s.current_fps(now)
+                per_exercise[s.exercise] += 1
+            per_level[s.quality_level] += 1
+
+        lines: List[str] = []
+        _header(lines, "pose_stage_duration_seconds", "histogram", "Wall time per pipeline stage of one frame.")
+        for stage in sorted(stages):
+            _histogram(lines, "pose_stage_duration_seconds", {"stage": stage}, stages[stage], stage_sums[stage])
+        _header(lines, "pose_frame_latency_seconds", "histogram",
+                "Time from frame arrival to the encoded result, including queueing.")
+        _histogram(lines, "pose_frame_latency_seconds", {}, latency, latency_sum)
+        _header(lines, "pose_frames_processed_total", "counter", "Frames processed, by exercise.")
+        for k in sorted(processed):
+            lines.append(_sample("pose_frames_processed_total", {"exercise": k}, processed[k]))
+        _header(lines, "pose_frames_failed_total", "counter", "Frames that produced no result, by reason.")
+        for k in sorted(failed):
+            lines.append(_sample("pose_frames_failed_total", {"reason": k}, failed[k]))
+        _header(lines, "pose_frames_dropped_total", "counter",
+                "Frames skipped before processing: overwritten by a newer frame, or stale.")
+        for k in sorted(self.dropped):
+            lines.append(_sample("pose_frames_dropped_total", {"reason": k}, self.dropped[k]))
+        _header(lines, "pose_active_sessions", "gauge", "Open WebSocket sessions.")
+        lines.append(_sample("pose_active_sessions", {}, len(self.sessions)))
+        _header(lines, "pose_exercise_sessions", "gauge", "Open sessions, by configured exercise.")
+        for k in sorted(per_exercise):
+            lines.append(_sample("pose_exercise_sessions", {"exercise": k}, per_exercise[k]))
+        _header(lines, "pose_exercise_fps", "gauge", "Frames per second returned to clients, summed per exercise.")
+        for k in sorted(fps):
+            lines.append(_sample("pose_exercise_fps", {"exercise": k}, round(fps[k], 3)))
+        _header(lines, "pose_quality_level_sessions", "gauge",
+                "Open sessions, by adaptive quality level (0 = full quality).")
+        for k in sorted(per_level):
+            lines.append(_sample("pose_quality_level_sessions", {"level": k}, per_level[k]))
+        if agreement:
+            _header(lines, "pose_classifier_latency_seconds", "histogram",
+                    "Learned classifier time per frame, including batching.")
+            _histogram(lines, "pose_classifier_latency_seconds", {}, clf_latency, clf_latency_sum)
+            _header(lines, "pose_classifier_predictions_total", "counter",
+                    "Learned classifier predictions, by agreement with the heuristic detector.")
+            for k in sorted(agreement):
+                lines.append(_sample("pose_classifier_predictions_total", {"agreement": k}, agreement[k]))
+        _header(lines, "pose_process_start_time_seconds", "gauge", "Unix time the backend started.")
+        lines.append(_sample("pose_process_start_time_seconds", {}, self.started_at))
+        return "\n".join(lines) + "\n"
+
+
+def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name: str, labels: Mapping[str, str], value: float) -> str:
+    if labels:
+        body = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+        return f"{name}{{{body}}} {value}"
+    return f"{name} {value}"
+
+
+def _histogram(lines: List[str], name: str, labels: Mapping[str, str], counts: List[int], total_ms: float) -> None:
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, counts):
+        cumulative += count
+        lines.append(_sample(f"{name}_bucket", {**labels, "le": f"{bound / 1000.0:g}"}, cumulative))
+    cumulative += counts[-1]
+    lines.append(_sample(f"{name}_bucket", {**labels, "le": "+Inf"}, cumulative))
+    lines.append(_sample(f"{name}_sum", labels, round(total_ms / 1000.0, 6)))
+    lines.append(_sample(f"{name}_count", labels, cumulative))
+
+
+metrics = Metrics()
@@ -0,0 +1,57 @@
+"""Wire formats for /ws/pose.
+
+JSON mode (default, for older clients): frames arrive as base64 data URLs inside
+`{"type": "frame", "data": ...}` and results go back as JSON with a base64 JPEG.
+
+Binary mode (negotiated with `"protocol": "binary"` in the config message):
+
+    client -> server: FRAME_HEADER (frame_id: u32, timestamp_ms: f64) + raw JPEG bytes
+    server -> client: RESULT_HEADER (frame_id: u32, timestamp_ms: f64, json_len: u32)
+                      + compact UTF-8 JSON payload + raw JPEG bytes (may be empty)
+
+All integers and floats are little-endian. The timestamp is echoed back untouched
+so clients can measure round-trip latency.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import struct
+from typing import Optional, Tuple
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+PROTOCOLS = (PROTOCOL_JSON, PROTOCOL_BINARY)
+
+FRAME_HEADER = struct.Struct("<Id")
+RESULT_HEADER = struct.Struct("<IdI")
+
+
+def decode_binary_frame(message: bytes) -> Tuple[int, float, memoryview]:
+    """Split a binary frame message into (frame_id, timestamp_ms, jpeg_bytes) without copying."""
+    if len(message) < FRAME_HEADER.size:
+        raise ValueError("Binary frame shorter than header")
+    frame_id, timestamp_ms = FRAME_HEADER.unpack_from(message)
+    return frame_id, timestamp_ms, memoryview(message)[FRAME_HEADER.size:]
+
+
+def decode_json_frame(data: str) -> bytes:
+    # Remove data URL prefix if present
+    if "," in data:
+        data = data.split(",", 1)[1]
+    return base64.b64decode(data)
+
+
+def encode_json_result(result: dict) -> str:
+    payload = dict(result)
+    image: Optional[bytes] = payload.pop("image", None)
+    if image is not None:
+        payload["image"] = base64.b64encode(image).decode("ascii")
+    return json.dumps({"type": "result", **payload})
+
+
+def encode_binary_result(result: dict, frame_id: int = 0, timestamp_ms: float = 0.0) -> bytes:
+    payload = dict(result)
+    image: bytes = payload.pop("image", None) or b""
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return b"".join((RESULT_HEADER.pack(frame_id, timestamp_ms, len(body)), body, image))
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from pose_app.batching import MicroBatcher
+from pose_app.classifier import ClassifierProbe, PoseClassifier
+from pose_app.dataset import SampleWriter
+from pose_app.model_pool import PoseModel
+
+from backend.metrics import SessionStats
+
+# Shared by every session, so never counted against one session's footprint
+_SHARED = (
+    PoseModel, MicroBatcher, PoseClassifier, ClassifierProbe, SampleWriter, SessionStats, threading.Thread,
+)
+
+
+def approx_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Rough bytes held by `obj` and what it references, skipping process-wide objects."""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen or isinstance(obj, _SHARED):
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + 112
+    size = sys.getsizeof(obj, 64)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k, seen) + approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(approx_size(v, seen) for v in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += approx_size(vars(obj), seen)
+    return size
+
+
+@dataclass(eq=False)
+class _Entry:
+    processor: Any  # PoseProcessor
+    stored_at: float
+    size: int
+
+
+class SessionStore:
+    """Parked session state (detector, rep counts, tracker filters) keyed by a client token.
+
+    A client that reconnects with the same token takes its processor back and
+    carries on where it left off. Entries expire after `ttl_s`; beyond
+    `max_sessions` entries or `max_bytes` of estimated state, the least recently
+    parked ones are evicted first. A token can only be taken once, so two
+    connections never share a processor.
+    """
+
+    def __init__(self, ttl_s: float = 300.0, max_sessions: int = 256, max_bytes: int = 64 << 20) -> None:
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.taken = 0
+        self.expired = 0
+        self.evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0 and self.max_sessions > 0
+
+    def put(self, token: str, processor: Any) -> bool:
+        """Park `processor` under `token`; returns False when it does not fit at all."""
+        if not self.enabled or not token:
+            return False
+        size = approx_size(processor)
+        if size > self.max_bytes:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            old = self._entries.pop(token, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[token] = _Entry(processor, now, size)
+            self._bytes += size
+            self._evict(now)
+        return True
+
+    def take(self, token: str) -> Optional[Any]:
+        """Remove and return the processor parked under `token`, if it is still fresh."""
+        if not token:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.pop(token, None)
+            if entry is None:
+                return None
+            self._bytes -= entry.size
+            self.taken += 1
+            return entry.processor
+
+    def _evict(self, now: float) -> None:
+        # Oldest first, so expired entries are all at the front
+        while self._entries:
+            token, entry = next(iter(self._entries.items()))
+            if now - entry.stored_at <= self.ttl_s:
+                break
+            self._drop(token)
+            self.expired += 1
+        while self._entries and (len(self._entries) > self.max_sessions or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.evicted += 1
+
+    def _drop(self, token: str) -> None:
+        entry = self._entries.pop(token)
+        self._bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._evict(time.monotonic())
+            return {
+                "parked": len(self._entries),
+                "bytes": self._bytes,
+                "taken": self.taken,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
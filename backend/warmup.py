@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from pose_app.classifier import PoseClassifier
+from pose_app.features import NUM_FEATURES
+from pose_app.model_pool import get_model
+
+
+@dataclass
+class Readiness:
+    """Cold-start state and timings, reported by GET /ready."""
+    started_at: float  # perf_counter when backend.main started importing
+    imports_ms: float = 0.0  # backend.main module imports, model stack excluded
+    ready: bool = False
+    error: Optional[str] = None
+    model: Dict[str, object] = field(default_factory=dict)
+    classifier_warmup_ms: Optional[float] = None
+    ready_after_s: Optional[float] = None
+    # Set when a frame was served after a failed warmup; `error` keeps the warmup failure
+    recovered_after_s: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        out = asdict(self)
+        out.pop("started_at")
+        return out
+
+    def recover(self) -> None:
+        """Report ready after a failed warmup once the lazily loaded model has served a frame."""
+        if self.ready or self.error is None:
+            return
+        self.recovered_after_s = round(time.perf_counter() - self.started_at, 3)
+        self.ready = True
+
+
+def warm_up(
+    readiness: Readiness,
+    weights: str,
+    threads: int = 0,
+    sizes: Sequence[Optional[int]] = (None,),
+    classifier: Optional[PoseClassifier] = None,
+) -> None:
+    """Load the pose model, run it once at every input size, and mark `readiness` ready.
+
+    Failures are recorded rather than raised; the server keeps running and loads
+    the model on the first frame as before, and `Readiness.recover` flips /ready
+    to 200 once that works.
+    """
+    try:
+        model = get_model(weights, threads)
+        model.warmup(sizes)
+        readiness.model = {
+            "weights": model.weights,
+            "backend": model.backend,
+            "import_ms": round(model.import_ms, 1),
+            "load_ms": round(model.load_ms, 1),
+            "warmup_ms": {k: round(v, 1) for k, v in model.warmup_ms.items()},
+        }
+        if classifier is not None:
+            t0 = time.perf_counter()
+            classifier.predict([np.zeros(NUM_FEATURES, dtype=np.float32)])
+            readiness.classifier_warmup_ms = round((time.perf_counter() - t0) * 1000.0, 1)
+        readiness.ready = True
+    except Exception as e:
+        readiness.error = f"{type(e).__name__}: {e}"
+    readiness.ready_after_s = round(time.perf_counter() - readiness.started_at, 3)
+    print(f"Warmup {'done' if readiness.ready else 'failed'}: {readiness.as_dict()}")
+
+
+def start_warmup(readiness: Readiness, **kwargs) -> threading.Thread:
+    """Run warm_up on a background thread so the server accepts connections meanwhile."""
+    thread = threading.Thread(target=warm_up, args=(readiness,), kwargs=kwargs, name="pose-warmup", daemon=True)
+    thread.start()
+    return thread
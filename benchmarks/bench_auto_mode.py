@@ -0,0 +1,117 @@
+"""Cost and recognition of auto exercise mode versus a single selected exercise.
+
+Auto mode evaluates every exercise rule on each frame. This script times the
+detector stage in both modes and sets the difference against the full
+per-frame budget (pose inference plus detector). It also runs a scripted
+workout of synthetic poses (squats, then pushups, then hammer curls) and prints
+which exercise auto mode recognized over time.
+
+    python benchmarks/bench_auto_mode.py                      # synthetic frames
+    python benchmarks/bench_auto_mode.py --source session.mp4 # recorded poses and frames
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from common import load_frames, summarize, synthetic_pose
+
+from pose_app.detectors import AutoExerciseDetector, SquatDetector
+from pose_app.pose_tracker import MediaPipePoseTracker
+
+BUDGET = 0.10  # auto mode may add at most 10% to the per-frame cost
+
+
+def workout(reps: int = 6, frames_per_rep: int = 30) -> Tuple[List[np.ndarray], List[str]]:
+    """Squats, then pushups, then hammer curls, with the exercise done at each frame."""
+    poses, truth = [], []
+    for name in ("Squat", "Pushup", "Hammer Curl"):
+        for i in range(reps * frames_per_rep):
+            phase = 0.5 - 0.5 * math.cos(2 * math.pi * i / frames_per_rep)  # 0 at the top, 1 at the bottom
+            if name == "Squat":
+                pose = synthetic_pose(175 - 95 * phase, 170)
+            elif name == "Pushup":
+                pose = synthetic_pose(178, 172 - 90 * phase, horizontal=True)
+            else:
+                pose = synthetic_pose(178, 165 - 115 * phase)
+            poses.append(pose)
+            truth.append(name)
+    return poses, truth
+
+
+def time_detector(detector, poses: List[np.ndarray], repeat: int = 3) -> dict:
+    samples = []
+    for _ in range(repeat):
+        for lms in poses:
+            t0 = time.perf_counter()
+            detector.infer(lms)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    return summarize(samples)
+
+
+def time_inference(frames: List[np.ndarray]) -> Tuple[dict, List[np.ndarray]]:
+    tracker = MediaPipePoseTracker()
+    tracker.process_frame(frames[0].copy(), draw=False)  # warm up the shared model
+    samples, found = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        result = tracker.process_frame(frame, draw=False)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+        if result is not None:
+            found.append(result.landmarks)
+    return summarize(samples), found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Recorded video file or folder of frames (default: synthetic)")
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    poses, truth = workout()
+    if args.source:
+        frames = load_frames(args.source, args.frames)
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(args.frames)]
+    infer, found = time_inference(frames)
+    if found:
+        poses = found  # time the detectors on real poses when the recording has them
+
+    single = time_detector(SquatDetector(), poses)
+    auto = time_detector(AutoExerciseDetector(), poses)
+    extra = auto["mean"] - single["mean"]
+    frame_cost = infer["mean"] + single["mean"]
+    overhead = extra / frame_cost if frame_cost > 0 else 0.0
+    print(f"pose inference per frame:  {infer['mean']:8.3f} ms (p95 {infer['p95']:.3f})")
+    print(f"single-exercise detector:  {single['mean'] * 1000:8.1f} us (p95 {single['p95'] * 1000:.1f})")
+    print(f"auto-mode detector:        {auto['mean'] * 1000:8.1f} us (p95 {auto['p95'] * 1000:.1f})")
+    print(f"auto-mode overhead per frame: {extra * 1000:.1f} us = {overhead * 100:.2f}% of {frame_cost:.3f} ms "
+          f"({'within' if overhead < BUDGET else 'OVER'} the {BUDGET * 100:.0f}% budget)")
+    if infer["mean"] < 1.0:
+        print("  (inference under 1 ms means no real pose model ran; the budget check needs the real one)")
+
+    # Recognition on the scripted workout
+    detector = AutoExerciseDetector()
+    recognized = []
+    for lms in workout()[0]:
+        detector.infer(lms)
+        recognized.append(detector.active)
+    correct = sum(r == t for r, t in zip(recognized, truth))
+    print(f"\nscripted workout: {correct}/{len(truth)} frames recognized correctly")
+    segments = []
+    for i, name in enumerate(recognized):
+        if not segments or segments[-1][1] != name:
+            segments.append((i, name))
+    for start, name in segments:
+        print(f"  from frame {start:4d}: {name}")
+    print("reps credited per exercise:", detector.reps)
+    print("raw rule counts (incl. other movements):", {name: d.counter.reps for name, d in detector.detectors.items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Accuracy versus latency of the pose model on each inference backend.
+
+Runs every model over the same recorded frames, one frame per call, and
+compares it with the first model (the PyTorch reference by default):
+
+  - latency: p50 / p95 per frame and speedup over the reference
+  - keypoints: mean pixel error and PCK (share of keypoints within 5% of the
+    person's box diagonal) of the most confident person, over keypoints both
+    models see with confidence >= 0.5
+  - people: frames where both models find the same number of people
+  - reps: rep count of an exercise detector fed each model's keypoints
+
+    python pose_app/export_model.py --format onnx
+    python pose_app/export_model.py --format onnx --int8 --calib session.mp4
+    python benchmarks/bench_backends.py --source session.mp4 --threads 4 --out backends.json
+
+The JSON report keeps the table and the run's machine details, so the numbers
+behind choosing a backend can be checked in next to the decision.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from common import load_frames, summarize
+
+from pose_app.detectors import EXERCISE_MAP
+from pose_app.model_pool import DEFAULT_WEIGHTS, PoseDetections, PoseModel, fixed_input_shape
+from pose_app.pose_tracker import detections_to_landmarks
+
+# Exports that pose_app/export_model.py writes next to the default weights
+CANDIDATES = (
+    DEFAULT_WEIGHTS,
+    "yolov8n-pose.onnx",
+    "yolov8n-pose.int8.onnx",
+    "yolov8n-pose_openvino_model",
+    "yolov8n-pose_int8_openvino_model",
+)
+MIN_CONF = 0.5
+PCK_FRACTION = 0.05
+
+
+def run(weights: str, frames: List[np.ndarray], threads: int) -> Dict:
+    model = PoseModel(weights, threads)
+    model.predict([frames[0]])  # warm up
+    samples, detections = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        detections.append(model.predict([frame])[0])
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return {"weights": weights, "backend": model.backend, "latency": summarize(samples), "detections": detections}
+
+
+def _top(det: PoseDetections) -> Optional[int]:
+    return int(np.argmax(det.scores)) if len(det) else None
+
+
+def compare(reference: List[PoseDetections], other: List[PoseDetections]) -> Dict[str, float]:
+    errors, hits, total, same_count = [], 0, 0, 0
+    for ref, det in zip(reference, other):
+        same_count += len(ref) == len(det)
+        i, j = _top(ref), _top(det)
+        if i is None or j is None:
+            continue
+        both = (ref.keypoint_conf[i] >= MIN_CONF) & (det.keypoint_conf[j] >= MIN_CONF)
+        if not both.any():
+            continue
+        err = np.hypot(*(ref.keypoints[i][both] - det.keypoints[j][both]).T)
+        x0, y0, x1, y1 = ref.boxes[i]
+        diag = float(np.hypot(x1 - x0, y1 - y0))
+        errors.extend(err.tolist())
+        hits += int((err <= PCK_FRACTION * diag).sum())
+        total += int(both.sum())
+    return {
+        "kp_error_px": float(np.mean(errors)) if errors else float("nan"),
+        "pck": hits / total if total else float("nan"),
+        "same_people": same_count / max(len(reference), 1),
+    }
+
+
+def count_reps(detections: List[PoseDetections], exercise: str) -> int:
+    detector = EXERCISE_MAP[exercise]()
+    for det in detections:
+        i = _top(det)
+        if i is not None:
+            detector.infer(detections_to_landmarks(det.keypoints[i], det.keypoint_conf[i]))
+    return detector.counter.reps
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", required=True, help="Recorded video file or folder of frames")
+    parser.add_argument("--models", nargs="+", help="Weights to compare, reference first (default: the "
+                        "PyTorch weights and every export found next to it)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads per runtime (0 = default)")
+    parser.add_argument("--exercise", choices=list(EXERCISE_MAP), default="Squat")
+    parser.add_argument("--out", help="Also write the comparison as JSON")
+    args = parser.parse_args()
+
+    models = args.models or [w for w in CANDIDATES if w == DEFAULT_WEIGHTS or os.path.exists(w)]
+    frames = load_frames(args.source, args.frames, width=args.width)
+    runs = [run(w, frames, args.threads) for w in models]
+    ref = runs[0]
+    ref_ms = ref["latency"]["p50"]
+    print(f"{len(frames)} frames at width {args.width}, threads={args.threads or 'default'}, "
+          f"reference {ref['weights']}")
+    print(f"{'model':34} {'backend':9} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8} "
+          f"{'kp err px':>10} {'PCK':>6} {'people':>7} {'reps':>5}")
+    rows = []
+    for r in runs:
+        acc = compare(ref["detections"], r["detections"])
+        lat = r["latency"]
+        reps = count_reps(r["detections"], args.exercise)
+        print(
+            f"{os.path.basename(r['weights'].rstrip('/')):34} {r['backend']:9} {lat['p50']:8.2f} {lat['p95']:8.2f} "
+            f"{ref_ms / lat['p50']:7.2f}x {acc['kp_error_px']:10.2f} {acc['pck']:6.1%} {acc['same_people']:7.1%} "
+            f"{reps:5d}"
+        )
+        batch, imgsz = fixed_input_shape(r["weights"])
+        rows.append({
+            "weights": r["weights"],
+            "backend": r["backend"],
+            "fixed_batch": batch,
+            "fixed_imgsz": imgsz,
+            "latency": lat,
+            "speedup": ref_ms / lat["p50"],
+            **acc,
+            "reps": reps,
+        })
+
+    if args.out:
+        report = {
+            "meta": {
+                "source": args.source,
+                "frames": len(frames),
+                "width": args.width,
+                "threads": args.threads,
+                "exercise": args.exercise,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "processor": platform.processor(),
+                "cpu_count": os.cpu_count(),
+            },
+            "results": rows,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
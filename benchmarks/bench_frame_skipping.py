@@ -0,0 +1,84 @@
+"""Inference rate, CPU time and rep accuracy of tracker frame skipping.
+
+Runs a recorded session once with detection on every frame (the reference),
+then with `detect_every` N and with adaptive motion-triggered detection, and
+compares rep counts of every detector and joint-angle error against the
+reference.
+
+    python benchmarks/bench_frame_skipping.py --source session.mp4 --fps 10
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from common import load_frames
+
+from pose_app.detectors import EXERCISE_MAP, joint_metrics
+from pose_app.pose_tracker import MediaPipePoseTracker
+
+DETECTORS = tuple(EXERCISE_MAP.values())
+ANGLES = ("left_knee", "right_knee", "left_elbow", "right_elbow")
+
+
+def run(frames, fps: float, **tracker_kwargs):
+    tracker = MediaPipePoseTracker(**tracker_kwargs)
+    detectors = [cls() for cls in DETECTORS]
+    angles = np.full((len(frames), len(ANGLES)), np.nan, dtype=np.float32)
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    for i, frame in enumerate(frames):
+        result = tracker.process_frame(frame, draw=False, timestamp=i / fps)
+        if result is None:
+            continue
+        metrics = joint_metrics(result.landmarks)
+        angles[i] = [metrics[name] for name in ANGLES]
+        for det in detectors:
+            det.infer(result.landmarks)
+    return {
+        "cpu_s": time.process_time() - cpu0,
+        "wall_s": time.perf_counter() - wall0,
+        "detections": tracker.frames_detected,
+        "reps": [det.counter.reps for det in detectors],
+        "angles": angles,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", required=True, help="Recorded video file or folder of frames")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--fps", type=float, default=10.0, help="Capture rate the recording represents")
+    parser.add_argument("--every", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--motion-threshold", type=float, default=0.6,
+                        help="Adaptive mode: frame heights per second that force a detection")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    # Warm up the shared model before timing anything
+    MediaPipePoseTracker().process_frame(frames[0].copy(), draw=False)
+
+    ref = run(frames, args.fps)
+    configs = [(f"every {n}", {"detect_every": n, "smoothing": True}) for n in args.every]
+    configs.append((
+        f"adaptive <= {max(args.every)}",
+        {"detect_every": max(args.every), "motion_threshold": args.motion_threshold, "smoothing": True},
+    ))
+
+    names = [cls.__name__.replace("Detector", "") for cls in DETECTORS]
+    print(f"{len(frames)} frames; reps per detector: {', '.join(names)}")
+    print(f"{'reference':18} detections={ref['detections']:5d}  cpu={ref['cpu_s']:7.2f}s  reps={ref['reps']}")
+    for label, kwargs in configs:
+        res = run(frames, args.fps, **kwargs)
+        err = np.nanmean(np.abs(res["angles"] - ref["angles"]))
+        print(
+            f"{label:18} detections={res['detections']:5d}  cpu={res['cpu_s']:7.2f}s  "
+            f"cpu saving={ref['cpu_s'] / max(res['cpu_s'], 1e-9):4.2f}x  reps={res['reps']}  "
+            f"angle MAE={err:5.2f} deg"
+        )
+
+
+if __name__ == "__main__":
+    main()
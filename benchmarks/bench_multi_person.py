@@ -0,0 +1,116 @@
+"""Per-frame cost of multi-person mode as the number of athletes grows.
+
+Multi-person mode runs the pose model once per frame and then associates and
+evaluates every person. This script measures one inference (on synthetic or
+recorded frames), then times association plus the per-person detectors on
+synthetic crowds of 1..N squatting people, and compares the total with running
+a separate single-person pipeline (one inference each) per athlete. It also
+counts identity switches while the crowd drifts across the frame.
+
+    python benchmarks/bench_multi_person.py
+    python benchmarks/bench_multi_person.py --source class.mp4 --people 1 2 4 8
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from typing import List
+
+import numpy as np
+
+from common import load_frames, summarize, synthetic_pose
+
+from pose_app.detectors import SquatDetector
+from pose_app.model_pool import PoseDetections
+from pose_app.multi_person import MultiPersonTracker
+from pose_app.pose_tracker import COCO_TO_MP, MediaPipePoseTracker
+
+_COCO_IDX = np.array(list(COCO_TO_MP.keys()), dtype=np.intp)
+_MP_IDX = np.array(list(COCO_TO_MP.values()), dtype=np.intp)
+
+
+def crowd(people: int, frames: int, frames_per_rep: int = 30) -> List[PoseDetections]:
+    """Detections for `people` athletes squatting out of step while drifting sideways."""
+    out = []
+    for i in range(frames):
+        kps = np.zeros((people, 17, 2), dtype=np.float32)
+        conf = np.zeros((people, 17), dtype=np.float32)
+        boxes = np.zeros((people, 4), dtype=np.float32)
+        for p in range(people):
+            phase = 0.5 - 0.5 * math.cos(2 * math.pi * (i + 7 * p) / frames_per_rep)
+            x = 80.0 + 140.0 * p + 0.5 * i  # the whole class drifts slowly
+            lms = synthetic_pose(175 - 95 * phase, 170, origin=(x, 440.0))
+            kps[p, _COCO_IDX] = lms[_MP_IDX, :2]
+            conf[p, _COCO_IDX] = lms[_MP_IDX, 3]
+            xy = kps[p, _COCO_IDX]
+            boxes[p] = (*(xy.min(axis=0) - 10.0), *(xy.max(axis=0) + 10.0))
+        order = np.random.default_rng(i).permutation(people)  # the model returns people in any order
+        out.append(PoseDetections(boxes[order], np.full(people, 0.9, np.float32)[order], kps[order], conf[order]))
+    return out
+
+
+def time_people(tracker: MediaPipePoseTracker, detections: List[PoseDetections]) -> dict:
+    multi = MultiPersonTracker("Squat", tracker, max_people=len(detections[0]))
+    samples, ids = [], set()
+    for det in detections:
+        t0 = time.perf_counter()
+        people = multi.process_detections(det)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+        ids.update(p.track_id for p in people)
+    return {"stats": summarize(samples), "ids": len(ids)}
+
+
+def time_single(detections: List[PoseDetections]) -> dict:
+    """One detector on one person per frame: the per-athlete cost of the single-person pipeline."""
+    detector = SquatDetector()
+    samples = []
+    for det in detections:
+        lms = np.zeros((33, 4), dtype=np.float32)
+        lms[_MP_IDX, :2] = det.keypoints[0, _COCO_IDX]
+        lms[_MP_IDX, 3] = det.keypoint_conf[0, _COCO_IDX]
+        t0 = time.perf_counter()
+        detector.infer(lms)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return summarize(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Recorded video file or folder of frames (default: synthetic)")
+    parser.add_argument("--frames", type=int, default=50, help="Frames to time inference on")
+    parser.add_argument("--people", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--steps", type=int, default=300, help="Synthetic crowd frames per size")
+    args = parser.parse_args()
+
+    if args.source:
+        frames = load_frames(args.source, args.frames)
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(args.frames)]
+    tracker = MediaPipePoseTracker()
+    tracker.detect(frames[0])  # warm up the shared model
+    samples = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        tracker.detect(frame)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    infer = summarize(samples)["mean"]
+    single = time_single(crowd(1, args.steps))["mean"]
+    print(f"pose inference per frame: {infer:.3f} ms; single-person detector: {single * 1000:.1f} us")
+    print(f"{'people':>6} {'multi ms':>10} {'per person':>11} {'N x single ms':>14} {'speedup':>8} {'ids':>4}")
+    for n in args.people:
+        result = time_people(tracker, crowd(n, args.steps))
+        multi = infer + result["stats"]["mean"]
+        separate = n * (infer + single)
+        print(
+            f"{n:6d} {multi:10.3f} {multi / n:11.3f} {separate:14.3f} {separate / multi:7.1f}x "
+            f"{result['ids']:4d}"
+        )
+    print("ids: identities created; equal to the number of people when no identity switched")
+    if infer < 1.0:
+        print("(inference under 1 ms means no real pose model ran; the comparison needs the real one)")
+
+
+if __name__ == "__main__":
+    main()
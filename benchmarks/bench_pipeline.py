@@ -0,0 +1,218 @@
+"""Per-stage latency of the backend frame pipeline.
+
+Runs frames through `backend.main.handle_frame` (the same code the WebSocket
+worker runs) for several resolutions and response modes, and reports
+p50/p95/p99 per stage plus end-to-end frames/sec. The WebSocket path is measured
+with an in-process test client. Results are written as JSON so runs from
+different commits can be compared:
+
+    python benchmarks/bench_pipeline.py --out bench_before.json
+    python benchmarks/bench_pipeline.py --out bench_after.json --compare bench_before.json
+
+Frames are synthetic unless --source points at a recorded video or frame folder.
+Synthetic frames contain nobody, so the detector and overlay stages only show
+up with recorded frames.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import platform
+import subprocess
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from common import ROOT, format_row, load_frames, resize_to_width, summarize
+
+# A single benchmark client gains nothing from the batching window, it only adds
+# its wait to every frame; export POSE_BATCH_WINDOW_MS to measure with batching
+os.environ.setdefault("POSE_BATCH_WINDOW_MS", "0")
+
+from backend.main import PoseProcessor, app, handle_frame  # noqa: E402
+from backend.mailbox import PendingFrame  # noqa: E402
+from backend.protocol import FRAME_HEADER, PROTOCOL_BINARY, PROTOCOL_JSON  # noqa: E402
+from pose_app.pose_tracker import MediaPipePoseTracker  # noqa: E402
+
+RESOLUTIONS = {"320x240": 320, "640x480": 640, "1280x720": 1280}
+MODES = [
+    ("json+overlay", PROTOCOL_JSON, "overlay"),
+    ("binary+overlay", PROTOCOL_BINARY, "overlay"),
+    ("binary+landmarks", PROTOCOL_BINARY, "landmarks"),
+]
+
+
+def synthetic_frames(width: int, height: int, count: int, seed: int = 0) -> List[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    base = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    frames = []
+    for _ in range(count):
+        noise = rng.normal(0, 20, (height, width, 3)).astype(np.float32)
+        frames.append(np.clip(base + noise, 0, 255).astype(np.uint8))
+    return frames
+
+
+def encode_frames(frames: List[np.ndarray], quality: int = 90) -> List[bytes]:
+    return [cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes() for f in frames]
+
+
+def bench_offline(jpegs: List[bytes], exercise: str, protocol: str, render: str, warmup: int = 3) -> dict:
+    processor = PoseProcessor(exercise, tracker=MediaPipePoseTracker(), protocol=protocol, render=render)
+    payloads = (
+        ["data:image/jpeg;base64," + base64.b64encode(j).decode("ascii") for j in jpegs]
+        if protocol == PROTOCOL_JSON
+        else jpegs
+    )
+    for payload in payloads[:warmup]:
+        handle_frame(PendingFrame(processor, payload, 0))
+    stages: Dict[str, List[float]] = defaultdict(list)
+    e2e: List[float] = []
+    t_start = time.perf_counter()
+    for i, payload in enumerate(payloads):
+        t0 = time.perf_counter()
+        handle_frame(PendingFrame(processor, payload, i))
+        e2e.append((time.perf_counter() - t0) * 1000.0)
+        for stage, ms in processor.last_timings.items():
+            stages[stage].append(ms)
+    elapsed = time.perf_counter() - t_start
+    return {
+        "stages": {stage: summarize(v) for stage, v in stages.items()},
+        "end_to_end": summarize(e2e),
+        "fps": len(payloads) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def _receive_result(ws) -> None:
+    """Wait for the next frame result, skipping adaptive-quality control messages."""
+    while True:
+        message = ws.receive()
+        if message.get("bytes") is not None:
+            return
+        if json.loads(message["text"]).get("type") != "control":
+            return
+
+
+def bench_websocket(client, jpegs: List[bytes], exercise: str, protocol: str, render: str, warmup: int = 3) -> dict:
+    rtt: List[float] = []
+    with client.websocket_connect("/ws/pose") as ws:
+        ws.send_text(json.dumps({"type": "config", "exercise": exercise, "protocol": protocol, "render": render}))
+        ws.receive_json()
+        t_start = None
+        for i, jpg in enumerate(jpegs[:warmup] + jpegs):
+            if i == warmup:
+                t_start = time.perf_counter()
+            t0 = time.perf_counter()
+            if protocol == PROTOCOL_BINARY:
+                ws.send_bytes(FRAME_HEADER.pack(i, 0.0) + jpg)
+                _receive_result(ws)
+            else:
+                data = "data:image/jpeg;base64," + base64.b64encode(jpg).decode("ascii")
+                ws.send_text(json.dumps({"type": "frame", "data": data, "frame_id": i}))
+                _receive_result(ws)
+            if i >= warmup:
+                rtt.append((time.perf_counter() - t0) * 1000.0)
+        elapsed = time.perf_counter() - t_start
+    return {"end_to_end": summarize(rtt), "fps": len(jpegs) / elapsed if elapsed > 0 else 0.0}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    print(f"\nChange vs {baseline_path} (p50 / p95, positive = slower):")
+    for res in current["results"]:
+        old = baseline.get(res["name"])
+        if old is None:
+            continue
+        rows = [("end_to_end", res["end_to_end"], old["end_to_end"])]
+        rows += [(s, v, old.get("stages", {}).get(s)) for s, v in res.get("stages", {}).items()]
+        for stage, new_s, old_s in rows:
+            if not old_s or not old_s["p50"]:
+                continue
+            d50 = (new_s["p50"] / old_s["p50"] - 1.0) * 100.0
+            d95 = (new_s["p95"] / max(old_s["p95"], 1e-9) - 1.0) * 100.0
+            print(f"  {res['name']:40} {stage:12} {d50:+7.1f}% / {d95:+7.1f}%")
+
+
+def run_all(args: argparse.Namespace, recorded: Optional[List[np.ndarray]], client) -> List[dict]:
+    results = []
+    for res_name in args.resolutions:
+        width = RESOLUTIONS[res_name]
+        if recorded is not None:
+            frames = [resize_to_width(f, width) for f in recorded]
+            kind = "recorded"
+        else:
+            frames = synthetic_frames(width, width * 3 // 4 if width < 1280 else 720, args.frames)
+            kind = "synthetic"
+        jpegs = encode_frames(frames)
+        for mode, protocol, render in MODES:
+            name = f"{kind} {res_name} {mode}"
+            res = {"name": name, **bench_offline(jpegs, args.exercise, protocol, render)}
+            results.append(res)
+            print(f"\n{name}: {res['fps']:.1f} frames/s")
+            for stage, stats in res["stages"].items():
+                print("  " + format_row(stage, stats))
+            print("  " + format_row("end to end", res["end_to_end"]))
+            if client is not None:
+                ws_name = f"{name} websocket"
+                ws_res = {"name": ws_name, **bench_websocket(client, jpegs, args.exercise, protocol, render)}
+                results.append(ws_res)
+                print("  " + format_row("websocket round trip", ws_res["end_to_end"]) + f"  {ws_res['fps']:.1f} frames/s")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Recorded video file or folder of frames (default: synthetic)")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    parser.add_argument("--exercise", default="Squat")
+    parser.add_argument("--no-websocket", action="store_true", help="Skip the WebSocket round-trip runs")
+    parser.add_argument("--out", default="bench_pipeline.json", help="Where to write machine-readable results")
+    parser.add_argument("--compare", help="Earlier results file to diff against")
+    args = parser.parse_args()
+
+    recorded = load_frames(args.source, args.frames) if args.source else None
+    with ExitStack() as stack:
+        # One app lifespan for every WebSocket run: shutdown tears down the worker pool
+        client = None
+        if not args.no_websocket:
+            from fastapi.testclient import TestClient
+
+            client = stack.enter_context(TestClient(app))
+        results = run_all(args, recorded, client)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "frames": args.frames,
+            "source": args.source or "synthetic",
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.out}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Per-frame latency of MediaPipePoseTracker with and without ROI tracking.
+
+    python benchmarks/bench_roi_tracking.py --source session.mp4 --frames 300
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from common import format_row, load_frames, summarize
+
+from pose_app.pose_tracker import MediaPipePoseTracker
+
+
+def run(frames, tracking: bool):
+    tracker = MediaPipePoseTracker(tracking=tracking)
+    # Warm up the model so the first timed frame is not a cold start
+    tracker.process_frame(frames[0].copy(), draw=False)
+    tracker.roi_attempts = tracker.roi_hits = tracker.full_frame_runs = tracker.roi_imgsz_total = 0
+    times = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        tracker.process_frame(frame, draw=False)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return summarize(times), tracker.tracking_stats()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", required=True, help="Recorded video file or folder of frames")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=None, help="Resize frames to this width first")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames, args.width)
+    print(f"{len(frames)} frames at {frames[0].shape[1]}x{frames[0].shape[0]}")
+
+    full, _ = run(frames, tracking=False)
+    roi, stats = run(frames, tracking=True)
+    print(format_row("full frame", full))
+    print(format_row("roi tracking", roi))
+    print(
+        f"roi hit rate {stats['hit_rate']:.1%}, fallback rate {stats['fallback_rate']:.1%}, "
+        f"speedup {full['mean'] / max(roi['mean'], 1e-9):.2f}x"
+    )
+    print(f"inference size: full frame {stats['full_frame_imgsz']}, roi crops {stats['roi_imgsz_mean']:.0f} on average")
+
+
+if __name__ == "__main__":
+    main()
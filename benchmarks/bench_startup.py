@@ -0,0 +1,136 @@
+"""Cold-start cost of the backend: module imports, model load and warmup.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in the
+process (the OS file cache still is; the first run after boot is slower).
+Reports the import time of the pose_app modules and backend.main, then the
+time from starting to import backend.main until the startup warmup has
+finished, broken down as /ready reports it. Results are written as JSON so
+runs from different commits can be compared:
+
+    python benchmarks/bench_startup.py --out startup_before.json
+    python benchmarks/bench_startup.py --out startup_after.json --compare startup_before.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from common import ROOT, summarize
+
+MODULES = (
+    "pose_app.detectors",
+    "pose_app.dataset",
+    "pose_app.features",
+    "pose_app.model_pool",
+    "pose_app.pose_tracker",
+    "backend.main",
+)
+
+IMPORT_SNIPPET = """
+import time
+t0 = time.perf_counter()
+import {module}
+print((time.perf_counter() - t0) * 1000.0)
+"""
+
+# Same work as the startup event, run synchronously
+READY_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+from backend.main import readiness, warmup_args
+from backend.warmup import warm_up
+warm_up(readiness, **warmup_args())
+out = readiness.as_dict()
+out["total_ms"] = (time.perf_counter() - t0) * 1000.0
+print("RESULT " + json.dumps(out))
+"""
+
+
+def _run(snippet: str) -> str:
+    return subprocess.check_output([sys.executable, "-c", snippet], cwd=ROOT, text=True, env=os.environ.copy())
+
+
+def time_imports(repeat: int) -> Dict[str, dict]:
+    return {m: summarize(float(_run(IMPORT_SNIPPET.format(module=m)).strip().splitlines()[-1]) for _ in range(repeat))
+            for m in MODULES}
+
+
+def time_ready(repeat: int) -> dict:
+    runs: List[dict] = []
+    for _ in range(repeat):
+        line = next(l for l in _run(READY_SNIPPET).splitlines() if l.startswith("RESULT "))
+        runs.append(json.loads(line[len("RESULT "):]))
+    if not all(r["ready"] for r in runs):
+        raise SystemExit(f"Warmup failed: {runs[-1]['error']}")
+    parts = {
+        "total": [r["total_ms"] for r in runs],
+        "backend imports": [r["imports_ms"] for r in runs],
+        "model stack import": [r["model"]["import_ms"] for r in runs],
+        "model load": [r["model"]["load_ms"] for r in runs],
+    }
+    for size in runs[0]["model"]["warmup_ms"]:
+        parts[f"warmup {size}"] = [r["model"]["warmup_ms"][size] for r in runs]
+    return {name: summarize(values) for name, values in parts.items()}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current: dict, baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nChange vs {baseline_path} (p50, positive = slower):")
+    for section in ("imports", "ready"):
+        for name, stats in current[section].items():
+            old = baseline.get(section, {}).get(name)
+            if old and old["p50"]:
+                print(f"  {section:8} {name:24} {(stats['p50'] / old['p50'] - 1.0) * 100.0:+7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--out", default="bench_startup.json", help="Where to write machine-readable results")
+    parser.add_argument("--compare", help="Earlier results file to diff against")
+    args = parser.parse_args()
+
+    imports = time_imports(args.repeat)
+    print("import time per module (fresh interpreter):")
+    for module, stats in imports.items():
+        print(f"  {module:24} p50={stats['p50']:8.1f} ms  p95={stats['p95']:8.1f} ms")
+    ready = time_ready(args.repeat)
+    print("\nstart of backend.main import -> warm and ready:")
+    for name, stats in ready.items():
+        print(f"  {name:24} p50={stats['p50']:8.1f} ms  p95={stats['p95']:8.1f} ms")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "model": os.environ.get("POSE_MODEL", "default"),
+        },
+        "imports": imports,
+        "ready": ready,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.out}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
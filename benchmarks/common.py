@@ -0,0 +1,90 @@
+"""Helpers shared by the benchmark scripts in this folder."""
+from __future__ import annotations
+
+import math
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Make `pose_app` / `backend` importable when run as `python benchmarks/<script>.py`
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from pose_app.detectors import (  # noqa: E402
+    LEFT_ANKLE, LEFT_ELBOW, LEFT_HIP, LEFT_KNEE, LEFT_SHOULDER, LEFT_WRIST,
+    RIGHT_ANKLE, RIGHT_ELBOW, RIGHT_HIP, RIGHT_KNEE, RIGHT_SHOULDER, RIGHT_WRIST,
+)
+from pose_app.export_model import read_frames  # noqa: E402
+
+
+def load_frames(source: str, limit: int = 300, width: Optional[int] = None) -> List[np.ndarray]:
+    """Read up to `limit` consecutive BGR frames from a video file or a folder of images.
+
+    With `width`, frames are resized keeping the aspect ratio.
+    """
+    frames = read_frames(source, limit)
+    if not frames:
+        raise SystemExit(f"No frames could be read from {source}")
+    if width is not None:
+        frames = [resize_to_width(f, width) for f in frames]
+    return frames
+
+
+def resize_to_width(frame: np.ndarray, width: int) -> np.ndarray:
+    h, w = frame.shape[:2]
+    if w == width:
+        return frame
+    return cv2.resize(frame, (width, int(round(h * width / w))), interpolation=cv2.INTER_AREA)
+
+
+def summarize(samples_ms: Iterable[float]) -> Dict[str, float]:
+    arr = np.asarray(list(samples_ms), dtype=np.float64)
+    if arr.size == 0:
+        return {"n": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    return {
+        "n": int(arr.size),
+        "mean": float(arr.mean()),
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+    }
+
+
+def format_row(name: str, stats: Dict[str, float]) -> str:
+    return (
+        f"{name:24} n={stats['n']:5d}  mean={stats['mean']:8.2f} ms  "
+        f"p50={stats['p50']:8.2f}  p95={stats['p95']:8.2f}  p99={stats['p99']:8.2f}"
+    )
+
+
+def synthetic_pose(
+    knee_deg: float, elbow_deg: float, horizontal: bool = False, origin: Tuple[float, float] = (320.0, 400.0)
+) -> np.ndarray:
+    """(33, 4) landmarks of a stick figure with the given knee and elbow angles, feet at `origin`."""
+    def bend(start, direction, length, angle_deg):
+        # Segment from `start` at `angle_deg` to `direction`, so the joint angle is angle_deg
+        a = math.radians(180.0 - angle_deg)
+        dx, dy = direction
+        rx, ry = dx * math.cos(a) - dy * math.sin(a), dx * math.sin(a) + dy * math.cos(a)
+        return start[0] + rx * length, start[1] + ry * length
+
+    lms = np.zeros((33, 4), dtype=np.float32)
+    for side, (sh, el, wr, hp, kn, an) in (
+        (-1, (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE)),
+        (1, (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE)),
+    ):
+        ankle = (side * 20.0, 0.0)
+        knee = (side * 20.0, -100.0)
+        hip = bend(knee, (0.0, -1.0), 100.0, knee_deg)
+        shoulder = (hip[0], hip[1] - 110.0)
+        elbow = (shoulder[0], shoulder[1] + 80.0)
+        wrist = bend(elbow, (0.0, 1.0), 80.0, elbow_deg)
+        for idx, (x, y) in ((an, ankle), (kn, knee), (hp, hip), (sh, shoulder), (el, elbow), (wr, wrist)):
+            if horizontal:
+                x, y = -y, x
+            lms[idx] = (x + origin[0], y + origin[1], 0.0, 0.9)
+    return lms
@@ -8,16 +8,102 @@ const EXERCISES = [
   "Lunge",
   "Side Lunge",
   "Hammer Curl",
-  "Chair Dip"
+  "Chair Dip",
+  "Auto" // server recognizes the exercise being done
 ];
 
 const WS_URL = 'ws://localhost:8000/ws/pose';
 
+// Identifies this tab's session across reconnects so the server can resume reps and tracking
+const SESSION_KEY = 'pose-session-token';
+const sessionToken = () => {
+  let token = sessionStorage.getItem(SESSION_KEY);
+  if (!token) {
+    token = crypto.randomUUID ? crypto.randomUUID() : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    sessionStorage.setItem(SESSION_KEY, token);
+  }
+  return token;
+};
+
+// 'landmarks': server returns keypoints only and the browser draws the overlay
+// 'overlay': server draws the overlay and sends back a JPEG
+const RENDER_MODE = 'landmarks';
+
+// Binary protocol (see backend/protocol.py): little-endian headers around raw JPEG bytes
+const FRAME_HEADER_SIZE = 12;   // frame_id u32, timestamp_ms f64
+const RESULT_HEADER_SIZE = 16;  // frame_id u32, timestamp_ms f64, json_len u32
+
+const encodeFrame = (frameId, jpegBuffer) => {
+  const out = new Uint8Array(FRAME_HEADER_SIZE + jpegBuffer.byteLength);
+  const view = new DataView(out.buffer);
+  view.setUint32(0, frameId, true);
+  view.setFloat64(4, performance.now(), true);
+  out.set(new Uint8Array(jpegBuffer), FRAME_HEADER_SIZE);
+  return out.buffer;
+};
+
+const drawPoints = (ctx, landmarks) => {
+  ctx.fillStyle = 'rgb(0, 255, 0)';
+  for (const [, x, y, vis] of landmarks) {
+    if (vis > 0) {
+      ctx.beginPath();
+      ctx.arc(x, y, 3, 0, 2 * Math.PI);
+      ctx.fill();
+    }
+  }
+};
+
+// `people` is only present in multi-person mode: every athlete with their own box and reps
+const drawOverlay = (target, frame, landmarks, feedback, people) => {
+  target.width = frame.width;
+  target.height = frame.height;
+  const ctx = target.getContext('2d');
+  ctx.drawImage(frame, 0, 0);
+  if (people) {
+    ctx.lineWidth = 2;
+    ctx.font = '16px sans-serif';
+    for (const person of people) {
+      drawPoints(ctx, person.landmarks || []);
+      const [x0, y0, x1, y1] = person.box;
+      ctx.strokeStyle = 'rgb(255, 255, 0)';
+      ctx.strokeRect(x0, y0, x1 - x0, y1 - y0);
+      ctx.fillStyle = 'rgb(255, 255, 0)';
+      ctx.fillText(`#${person.id} ${person.feedback.name} ${person.feedback.reps}`, x0, Math.max(16, y0 - 6));
+    }
+  } else {
+    drawPoints(ctx, landmarks);
+  }
+  if (landmarks.length > 0 && feedback) {
+    ctx.fillStyle = 'black';
+    ctx.fillRect(10, 10, 500, 50);
+    ctx.fillStyle = 'rgb(255, 255, 0)';
+    ctx.font = '22px sans-serif';
+    ctx.fillText(`${feedback.name} | reps: ${feedback.reps} | phase: ${feedback.phase}`, 20, 43);
+  }
+};
+
+const decodeResult = (buffer) => {
+  const view = new DataView(buffer);
+  const jsonLen = view.getUint32(12, true);
+  const payload = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, RESULT_HEADER_SIZE, jsonLen))
+  );
+  const imageBytes = new Uint8Array(buffer, RESULT_HEADER_SIZE + jsonLen);
+  return {
+    type: 'result',
+    frame_id: view.getUint32(0, true),
+    ...payload,
+    imageBlob: imageBytes.byteLength > 0 ? new Blob([imageBytes], { type: 'image/jpeg' }) : null,
+  };
+};
+
 function App() {
   const webcamRef = useRef(null);
   const wsRef = useRef(null);
   const [selectedExercise, setSelectedExercise] = useState('Squat');
   const [logEnabled, setLogEnabled] = useState(false);
+  const [multiPerson, setMultiPerson] = useState(false);
+  const [people, setPeople] = useState([]);
   const [isConnected, setIsConnected] = useState(false);
   const [processedImage, setProcessedImage] = useState(null);
   const [feedback, setFeedback] = useState({
@@ -28,12 +114,20 @@ function App() {
   });
   const [lastVoiceCue, setLastVoiceCue] = useState(null);
   const [isCapturing, setIsCapturing] = useState(false);
-  const processingRef = useRef(false);
+  // Send time of the in-flight frame; the server may drop it, so stop waiting after a second
+  const processingRef = useRef(0);
+  const frameIdRef = useRef(0);
+  const sentFrameRef = useRef(null);
+  const overlayCanvasRef = useRef(null);
+  // Capture period and JPEG quality; the server adjusts both with "control" messages under load
+  const [captureInterval, setCaptureInterval] = useState(100);
+  const jpegQualityRef = useRef(0.92);
 
   // Initialize WebSocket connection
   useEffect(() => {
     const connectWebSocket = () => {
       const ws = new WebSocket(WS_URL);
+      ws.binaryType = 'arraybuffer';
       
       ws.onopen = () => {
         console.log('WebSocket connected');
@@ -42,19 +136,38 @@ function App() {
         ws.send(JSON.stringify({
           type: 'config',
           exercise: selectedExercise,
-          log_enabled: logEnabled
+          log_enabled: logEnabled,
+          protocol: 'binary',
+          render: RENDER_MODE,
+          multi_person: multiPerson,
+          session: sessionToken()
         }));
       };
 
       ws.onmessage = (event) => {
-        const data = JSON.parse(event.data);
+        const data = event.data instanceof ArrayBuffer
+          ? decodeResult(event.data)
+          : JSON.parse(event.data);
         
-        if (data.type === 'config_ack') {
-          console.log('Config acknowledged:', data.exercise);
+        if (data.type === 'control') {
+          setCaptureInterval(data.capture_interval_ms);
+          jpegQualityRef.current = data.jpeg_quality;
+        } else if (data.type === 'config_ack') {
+          console.log('Config acknowledged:', data.exercise, data.protocol, data.resumed ? '(resumed)' : '');
         } else if (data.type === 'result') {
-          if (data.image) {
+          if (data.imageBlob) {
+            const url = URL.createObjectURL(data.imageBlob);
+            setProcessedImage((prev) => {
+              if (prev && prev.startsWith('blob:')) URL.revokeObjectURL(prev);
+              return url;
+            });
+          } else if (data.image) {
             setProcessedImage(`data:image/jpeg;base64,${data.image}`);
+          } else if (data.landmarks && sentFrameRef.current && overlayCanvasRef.current) {
+            drawOverlay(overlayCanvasRef.current, sentFrameRef.current, data.landmarks, data.feedback, data.people);
+            setProcessedImage('canvas');
           }
+          setPeople(data.people || []);
           if (data.feedback) {
             setFeedback(data.feedback);
             
@@ -64,7 +177,7 @@ function App() {
               speakText(data.feedback.voice_cue);
             }
           }
-          processingRef.current = false;
+          processingRef.current = 0;
         }
       };
 
@@ -98,10 +211,14 @@ function App() {
       wsRef.current.send(JSON.stringify({
         type: 'config',
         exercise: selectedExercise,
-        log_enabled: logEnabled
+        log_enabled: logEnabled,
+        protocol: 'binary',
+        render: RENDER_MODE,
+        multi_person: multiPerson,
+        session: sessionToken()
       }));
     }
-  }, [selectedExercise, logEnabled]);
+  }, [selectedExercise, logEnabled, multiPerson]);
 
   // Text-to-speech function
   const speakText = (text) => {
@@ -123,15 +240,21 @@ function App() {
       webcamRef.current &&
       wsRef.current &&
       wsRef.current.readyState === WebSocket.OPEN &&
-      !processingRef.current
+      (!processingRef.current || performance.now() - processingRef.current > 1000)
     ) {
-      const imageSrc = webcamRef.current.getScreenshot();
-      if (imageSrc) {
-        processingRef.current = true;
-        wsRef.current.send(JSON.stringify({
-          type: 'frame',
-          data: imageSrc
-        }));
+      const canvas = webcamRef.current.getCanvas();
+      if (canvas) {
+        processingRef.current = performance.now();
+        sentFrameRef.current = canvas;
+        canvas.toBlob(async (blob) => {
+          const ws = wsRef.current;
+          if (!blob || !ws || ws.readyState !== WebSocket.OPEN) {
+            processingRef.current = 0;
+            return;
+          }
+          frameIdRef.current = (frameIdRef.current + 1) >>> 0;
+          ws.send(encodeFrame(frameIdRef.current, await blob.arrayBuffer()));
+        }, 'image/jpeg', jpegQualityRef.current);
       }
     }
   }, []);
@@ -141,6 +264,7 @@ function App() {
     if (!isCapturing) {
       // Reset feedback when stopped
       setProcessedImage(null);
+      setPeople([]);
       setFeedback({
         name: '',
         reps: 0,
@@ -152,10 +276,10 @@ function App() {
     
     const interval = setInterval(() => {
       captureFrame();
-    }, 100); // Capture every 100ms (~10 FPS)
+    }, captureInterval); // 100ms (~10 FPS) unless the server asks for less
 
     return () => clearInterval(interval);
-  }, [captureFrame, isCapturing]);
+  }, [captureFrame, isCapturing, captureInterval]);
 
   return (
     <div className="app">
@@ -203,6 +327,17 @@ function App() {
             )}
           </div>
 
+          <div className="control-group">
+            <label className="checkbox-label">
+              <input
+                type="checkbox"
+                checked={multiPerson}
+                onChange={(e) => setMultiPerson(e.target.checked)}
+              />
+              <span>Track everyone in view</span>
+            </label>
+          </div>
+
           <div className="status">
             <span className={`status-indicator ${isConnected ? 'connected' : 'disconnected'}`}>
               {isConnected ? '● Connected' : '○ Disconnected'}
@@ -225,7 +360,11 @@ function App() {
             />
           </div>
           
-          {processedImage && (
+          <div className="processed-video" style={{ display: processedImage === 'canvas' ? 'block' : 'none' }}>
+            <canvas ref={overlayCanvasRef} />
+          </div>
+
+          {processedImage && processedImage !== 'canvas' && (
             <div className="processed-video">
               <img src={processedImage} alt="Processed pose" />
             </div>
@@ -260,6 +399,19 @@ function App() {
             </div>
           </div>
           
+          {people.length > 1 && (
+            <div className="cues">
+              <h3>People:</h3>
+              <ul>
+                {people.map((person) => (
+                  <li key={person.id}>
+                    #{person.id} {person.feedback.name}: {person.feedback.reps} reps ({person.feedback.phase})
+                  </li>
+                ))}
+              </ul>
+            </div>
+          )}
+
           {feedback.cues && feedback.cues.length > 0 && (
             <div className="cues">
               <h3>Form Cues:</h3>
@@ -0,0 +1,265 @@
+"""Offline pose analysis of recorded sessions.
+
+Streams one or more videos (or folders of videos) through decode, batched pose
+inference and the exercise detectors, and writes per-frame landmarks and
+per-rep events. No overlay is drawn or encoded unless --overlay is given.
+
+    python pose_app/analyze_video.py recordings/ --out results/ --format parquet
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pandas as pd
+
+# Add project root to path for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pose_app.detectors import EXERCISE_MAP, joint_table
+from pose_app.model_pool import DEFAULT_WEIGHTS, PoseDetections, get_model
+from pose_app.pose_tracker import MAPPED_LANDMARKS, detections_to_landmarks
+
+
+VIDEO_EXTS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+FORMATS = ("csv", "jsonl", "parquet")
+_MAPPED = np.array(MAPPED_LANDMARKS, dtype=np.intp)
+_END = object()
+
+
+def _output_stem(path: str, root: str) -> str:
+    rel = os.path.splitext(os.path.relpath(path, root))[0]
+    return rel.replace(os.sep, "__").replace("/", "__")
+
+
+def find_videos(inputs: List[str]) -> List[Tuple[str, str]]:
+    """Return sorted (video path, output stem) pairs.
+
+    Videos found under a folder are named by their path relative to that folder,
+    so `a/set1.mp4` and `b/set1.mp4` do not overwrite each other's outputs.
+    """
+    stems: Dict[str, str] = {}
+    for path in inputs:
+        if os.path.isdir(path):
+            for ext in VIDEO_EXTS:
+                for video in glob.glob(os.path.join(path, "**", f"*{ext}"), recursive=True):
+                    stems.setdefault(video, _output_stem(video, path))
+        else:
+            stems.setdefault(path, _output_stem(path, os.path.dirname(path) or "."))
+    owners: Dict[str, List[str]] = {}
+    for video, stem in stems.items():
+        owners.setdefault(stem, []).append(video)
+    clashes = {stem: sorted(paths) for stem, paths in owners.items() if len(paths) > 1}
+    if clashes:
+        lines = "\n".join(f"  {stem}: {', '.join(paths)}" for stem, paths in sorted(clashes.items()))
+        raise SystemExit(f"These inputs would write to the same output files:\n{lines}")
+    return sorted(stems.items())
+
+
+class FrameReader:
+    """Decode a video on a background thread into a bounded queue of (index, frame)."""
+
+    def __init__(self, path: str, stride: int = 1, max_queue: int = 64) -> None:
+        self._cap = cv2.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise IOError(f"Cannot open video {path}")
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.stride = max(1, stride)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        idx = 0
+        try:
+            while True:
+                # grab() skips the decode cost for frames dropped by the stride
+                if not self._cap.grab():
+                    break
+                if idx % self.stride == 0:
+                    ok, frame = self._cap.retrieve()
+                    if not ok:
+                        break
+                    self._queue.put((idx, frame))
+                idx += 1
+        finally:
+            self._cap.release()
+            self._queue.put(_END)
+
+    def batches(self, batch_size: int) -> Iterator[List[Tuple[int, np.ndarray]]]:
+        batch: List[Tuple[int, np.ndarray]] = []
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                break
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _best_person(det: PoseDetections) -> Optional[np.ndarray]:
+    if len(det) == 0:
+        return None
+    best = int(np.argmax(det.scores))
+    return detections_to_landmarks(det.keypoints[best], det.keypoint_conf[best])
+
+
+def _draw(frame: np.ndarray, landmarks: Optional[np.ndarray], text: str) -> np.ndarray:
+    if landmarks is not None:
+        for x, y, _, vis in landmarks[_MAPPED].tolist():
+            if vis > 0:
+                cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
+    cv2.rectangle(frame, (10, 10), (510, 60), (0, 0, 0), -1)
+    cv2.putText(frame, text, (20, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2, cv2.LINE_AA)
+    return frame
+
+
+def analyze_video(
+    path: str,
+    exercises: List[str],
+    weights: str = DEFAULT_WEIGHTS,
+    batch_size: int = 16,
+    stride: int = 1,
+    overlay_path: Optional[str] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, float]]:
+    """Return (per-frame landmarks, per-rep events, timing summary) for one video."""
+    model = get_model(weights)
+    reader = FrameReader(path, stride=stride, max_queue=batch_size * 4)
+    detectors = {name: EXERCISE_MAP[name]() for name in exercises}
+    writer: Optional[cv2.VideoWriter] = None
+
+    frame_ids: List[int] = []
+    joints: List[np.ndarray] = []
+    found: List[bool] = []
+    phases: Dict[str, List[str]] = {name: [] for name in exercises}
+    reps: List[dict] = []
+    empty = np.zeros((len(_MAPPED), 3), dtype=np.float32)
+
+    t0 = time.perf_counter()
+    infer_s = 0.0
+    for batch in reader.batches(batch_size):
+        frames = [frame for _, frame in batch]
+        t_inf = time.perf_counter()
+        dets = model.predict(frames)
+        infer_s += time.perf_counter() - t_inf
+        for (idx, frame), det in zip(batch, dets):
+            landmarks = _best_person(det)
+            frame_ids.append(idx)
+            found.append(landmarks is not None)
+            joints.append(landmarks[_MAPPED][:, (0, 1, 3)] if landmarks is not None else empty)
+            text = ""
+            # One joint table per frame, shared by every detector
+            table = joint_table(landmarks) if landmarks is not None else None
+            for name, detector in detectors.items():
+                if table is None:
+                    phases[name].append("")
+                    continue
+                before = detector.counter.reps
+                fb = detector.infer_table(table)
+                phases[name].append(fb.phase)
+                if fb.reps != before:
+                    reps.append({
+                        "frame": idx,
+                        "time_s": idx / reader.fps,
+                        "exercise": name,
+                        "rep": fb.reps,
+                    })
+                text = f"{fb.name} | reps: {fb.reps} | phase: {fb.phase}"
+            if overlay_path is not None:
+                if writer is None:
+                    h, w = frame.shape[:2]
+                    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                    writer = cv2.VideoWriter(overlay_path, fourcc, reader.fps / reader.stride, (w, h))
+                writer.write(_draw(frame, landmarks, text))
+    if writer is not None:
+        writer.release()
+    elapsed = time.perf_counter() - t0
+
+    cols: Dict[str, object] = {
+        "frame": np.asarray(frame_ids, dtype=np.int64),
+        "time_s": np.asarray(frame_ids, dtype=np.float64) / reader.fps,
+        "detected": np.asarray(found, dtype=bool),
+    }
+    arr = np.stack(joints) if joints else np.zeros((0, len(_MAPPED), 3), dtype=np.float32)
+    for j, idx in enumerate(MAPPED_LANDMARKS):
+        cols[f"lm{idx}_x"] = arr[:, j, 0]
+        cols[f"lm{idx}_y"] = arr[:, j, 1]
+        cols[f"lm{idx}_vis"] = arr[:, j, 2]
+    for name in exercises:
+        cols[f"phase_{name.lower().replace(' ', '_')}"] = phases[name]
+    frames_df = pd.DataFrame(cols)
+    reps_df = pd.DataFrame(reps, columns=["frame", "time_s", "exercise", "rep"])
+    n = len(frame_ids)
+    timing = {
+        "frames": n,
+        "seconds": elapsed,
+        "fps": n / elapsed if elapsed > 0 else 0.0,
+        "inference_share": infer_s / elapsed if elapsed > 0 else 0.0,
+        "realtime_factor": (n * reader.stride / reader.fps) / elapsed if elapsed > 0 else 0.0,
+    }
+    return frames_df, reps_df, timing
+
+
+def write_table(df: pd.DataFrame, path: str, fmt: str) -> None:
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+    elif fmt == "jsonl":
+        df.to_json(path, orient="records", lines=True)
+    elif fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unknown format {fmt}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Video files or folders of videos")
+    parser.add_argument("--out", default="analysis", help="Output folder")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--exercise", nargs="+", choices=list(EXERCISE_MAP.keys()), default=list(EXERCISE_MAP.keys()),
+                        help="Detectors to run (default: all)")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--stride", type=int, default=1, help="Analyze every Nth frame")
+    parser.add_argument("--overlay", action="store_true", help="Also write an annotated .mp4 per video")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        raise SystemExit("No videos found.")
+    os.makedirs(args.out, exist_ok=True)
+
+    for path, stem in videos:
+        overlay_path = os.path.join(args.out, f"{stem}.overlay.mp4") if args.overlay else None
+        try:
+            frames_df, reps_df, timing = analyze_video(
+                path, args.exercise, args.weights, args.batch_size, args.stride, overlay_path
+            )
+        except IOError as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        write_table(frames_df, os.path.join(args.out, f"{stem}.landmarks.{args.format}"), args.format)
+        write_table(reps_df, os.path.join(args.out, f"{stem}.reps.{args.format}"), args.format)
+        print(f"{path}: {json.dumps({k: round(v, 3) for k, v in timing.items()})}")
+
+
+if __name__ == "__main__":
+    main()
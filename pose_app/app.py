@@ -13,33 +13,15 @@ from typing import Optional
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from pose_app.pose_tracker import MediaPipePoseTracker
-from pose_app.detectors import (
-    SquatDetector,
-    PushupDetector,
-    LungeDetector,
-    SideLungeDetector,
-    HammerCurlDetector,
-    ChairDipDetector,
-    ExerciseFeedback,
-)
+from pose_app.detectors import AUTO_EXERCISE, EXERCISE_MAP, AutoExerciseDetector, ExerciseFeedback, make_detector
 from pose_app.tts import TTSQueue
-from pose_app.dataset import save_sample_csv, Sample
-
-
-EXERCISE_MAP = {
-    "Squat": SquatDetector,
-    "Pushup": PushupDetector,
-    "Lunge": LungeDetector,
-    "Side Lunge": SideLungeDetector,
-    "Hammer Curl": HammerCurlDetector,
-    "Chair Dip": ChairDipDetector,
-}
+from pose_app.dataset import Sample, get_sample_writer, sample_dir
 
 
 class PoseTransformer(VideoTransformerBase):
     def __init__(self, exercise_name: str, tts: TTSQueue, log_enabled: bool) -> None:
         self.tracker = MediaPipePoseTracker()
-        self.detector = EXERCISE_MAP[exercise_name]()
+        self.detector = make_detector(exercise_name)
         self.exercise_name = exercise_name
         self.tts = tts
         self.log_enabled = log_enabled
@@ -51,7 +33,7 @@ class PoseTransformer(VideoTransformerBase):
         result = self.tracker.process_frame(img, draw=True)
         overlay = img
         if result is not None:
-            feedback: ExerciseFeedback = self.detector.infer(result.landmarks_px)
+            feedback: ExerciseFeedback = self.detector.infer(result.landmarks)
             # Draw overlay text
             text = f"{feedback.name} | reps: {feedback.reps} | phase: {feedback.phase}"
             cv2.rectangle(overlay, (10, 10), (10 + 500, 60), (0, 0, 0), -1)
@@ -70,13 +52,12 @@ class PoseTransformer(VideoTransformerBase):
             if self.log_enabled:
                 self.frame_count += 1
                 if self.frame_count % 5 == 0:  # reduce dataset size
-                    try:
-                        save_sample_csv(
-                            out_dir=os.path.join(os.path.dirname(__file__), "data"),
-                            sample=Sample(exercise=self.exercise_name, landmarks=result.landmarks_px, label=feedback.phase),
-                        )
-                    except Exception:
-                        pass
+                    # In auto mode, log under the recognized exercise, apart from hand-labelled data
+                    exercise = self.detector.active if isinstance(self.detector, AutoExerciseDetector) else self.exercise_name
+                    out_dir = sample_dir(os.path.join(os.path.dirname(__file__), "data"), self.exercise_name)
+                    get_sample_writer(out_dir, exercise).write(
+                        Sample(exercise=exercise, landmarks=result.landmarks.copy(), label=feedback.phase)
+                    )
         return av.VideoFrame.from_ndarray(overlay, format="bgr24")
 
 
@@ -107,7 +88,7 @@ def main() -> None:
 
     cols = st.columns(3)
     with cols[0]:
-        exercise = st.selectbox("Choose exercise", list(EXERCISE_MAP.keys()), index=0)
+        exercise = st.selectbox("Choose exercise", list(EXERCISE_MAP.keys()) + [AUTO_EXERCISE], index=0)
     with cols[1]:
         log_enabled = st.toggle("Log dataset", value=False, help="Save landmarks to CSV periodically for training")
     with cols[2]:
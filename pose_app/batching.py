@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, Generic, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collect items submitted from many threads and run them through `batch_fn` together.
+
+    A batch is flushed when `max_batch_size` items are pending or when the oldest
+    pending item has waited `max_wait_ms`, whichever comes first. Each caller gets
+    a Future resolved with the result at its own position in the batch.
+
+    `max_callers` returns how many callers could be submitting right now (e.g.
+    frames on the worker pool). Once that many items are pending nobody else can
+    join the batch, so it is flushed without waiting out the window; a lone
+    client never pays it.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[T]], List[R]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+        max_callers: Optional[Callable[[], int]] = None,
+    ) -> None:
+        self._batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._max_callers = max_callers
+        self._queue: "queue.Queue[Tuple[T, Future, float]]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes: Counter = Counter()
+        self._waits_ms: Deque[float] = deque(maxlen=1024)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: T) -> "Future[R]":
+        fut: "Future[R]" = Future()
+        if self._stop_event.is_set():
+            fut.set_exception(RuntimeError("batcher is closed"))
+            return fut
+        self._queue.put((item, fut, time.perf_counter()))
+        return fut
+
+    def __call__(self, item: T) -> R:
+        """Submit one item and block until its batch has run."""
+        return self.submit(item).result()
+
+    def _collect(self) -> List[Tuple[T, Future, float]]:
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = first[2] + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if self._max_callers is not None and len(batch) >= self._max_callers():
+                remaining = 0.0  # take what is already queued, wait for nobody
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._batch_sizes[len(batch)] += 1
+                self._waits_ms.extend((started - enqueued) * 1000.0 for _, _, enqueued in batch)
+            items = [item for item, _, _ in batch]
+            try:
+                results = self._batch_fn(items)
+            except Exception as e:
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, fut, _), res in zip(batch, results):
+                fut.set_result(res)
+
+    def stats(self) -> Dict[str, object]:
+        with self._stats_lock:
+            waits = np.asarray(self._waits_ms, dtype=np.float64)
+            sizes = dict(sorted(self._batch_sizes.items()))
+            batches, items = self._batches, self._items
+        return {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": items / batches if batches else 0.0,
+            "batch_size_counts": sizes,
+            "queue_wait_ms": {
+                "mean": float(waits.mean()) if waits.size else 0.0,
+                "p50": float(np.percentile(waits, 50)) if waits.size else 0.0,
+                "p95": float(np.percentile(waits, 95)) if waits.size else 0.0,
+                "max": float(waits.max()) if waits.size else 0.0,
+            },
+            "pending": self._queue.qsize(),
+        }
+
+    def close(self) -> None:
+        self._stop_event.set()
+        self._thread.join(timeout=1.0)
+        # Fail anything that was still waiting so callers do not hang
+        while True:
+            try:
+                _, fut, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            fut.set_exception(RuntimeError("batcher is closed"))
+
+
+def make_pose_batcher(
+    weights: Optional[str] = None,
+    max_batch_size: int = 8,
+    max_wait_ms: float = 10.0,
+    threads: int = 0,
+    max_callers: Optional[Callable[[], int]] = None,
+) -> "MicroBatcher":
+    """Batcher running frames from all sessions through the shared pose model.
+
+    Items are (frame, imgsz) pairs, imgsz None for the model default. Frames
+    that want different input sizes cannot share a predict call, so each batch
+    makes one call per size. The model is resolved on the first batch, so
+    creating the batcher is cheap.
+    """
+    from .model_pool import DEFAULT_WEIGHTS, get_model
+
+    w = weights or DEFAULT_WEIGHTS
+
+    def predict(items):
+        model = get_model(w, threads)
+        by_size: Dict[Optional[int], List[int]] = {}
+        for i, (_, imgsz) in enumerate(items):
+            by_size.setdefault(imgsz, []).append(i)
+        results: List = [None] * len(items)
+        for imgsz, indices in by_size.items():
+            for i, det in zip(indices, model.predict([items[i][0] for i in indices], imgsz=imgsz)):
+                results[i] = det
+        return results
+
+    return MicroBatcher(
+        predict, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, name="pose-batcher", max_callers=max_callers
+    )
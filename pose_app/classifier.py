@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .batching import MicroBatcher
+from .features import FEATURE_VERSION, extract_features
+
+
+class PoseClassifier:
+    """A pipeline saved by `train_baseline.py`, loaded once and shared by every session.
+
+    `target` says what it predicts: "exercise" (display names such as "Squat")
+    or "label" (the detector phase that was logged with each sample).
+    """
+
+    def __init__(self, path: str) -> None:
+        import joblib  # only needed when a classifier is configured
+
+        self.path = path
+        self._pipe = joblib.load(path)
+        self.target: str = getattr(self._pipe, "pose_target", "exercise")
+        version = getattr(self._pipe, "feature_version", None)
+        if version != FEATURE_VERSION:
+            raise ValueError(
+                f"{path} was trained on feature version {version}, expected {FEATURE_VERSION}; retrain it"
+            )
+        self.classes: List[str] = [str(c) for c in self._pipe.classes_]
+
+    def predict(self, features: Sequence[np.ndarray]) -> List[str]:
+        """One prediction per (F,) feature vector, in a single model call."""
+        if not len(features):
+            return []
+        return [str(p) for p in self._pipe.predict(np.stack(features))]
+
+    def predict_landmarks(self, landmarks: np.ndarray) -> List[str]:
+        """Predictions for (N, 33, 4) landmarks."""
+        return self.predict(list(extract_features(landmarks)))
+
+
+_POOL: Dict[str, PoseClassifier] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def get_classifier(path: str) -> PoseClassifier:
+    """Return the process-wide classifier for `path`, loading it on first use."""
+    clf = _POOL.get(path)
+    if clf is not None:
+        return clf
+    with _POOL_LOCK:
+        clf = _POOL.get(path)
+        if clf is None:
+            clf = PoseClassifier(path)
+            _POOL[path] = clf
+    return clf
+
+
+def make_classifier_batcher(
+    path: str,
+    max_batch_size: int = 16,
+    max_wait_ms: float = 5.0,
+    max_callers: Optional[Callable[[], int]] = None,
+) -> MicroBatcher:
+    """Batcher sending feature vectors from all sessions through one classifier call.
+
+    `max_callers` as in MicroBatcher: callers are frames on the worker pool, so
+    pass the same bound as the pose batcher.
+    """
+    clf = get_classifier(path)
+    return MicroBatcher(
+        clf.predict,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+        name="classifier-batcher",
+        max_callers=max_callers,
+    )
+
+
+class ClassifierProbe:
+    """Runs the learned classifier for one frame next to the heuristic detector.
+
+    Returns the prediction with how long it took and whether it agrees with the
+    heuristic; with a batcher the call waits for a shared batch.
+    """
+
+    def __init__(self, classifier: PoseClassifier, batcher: Optional[MicroBatcher] = None) -> None:
+        self.classifier = classifier
+        self.batcher = batcher
+
+    def __call__(self, landmarks: np.ndarray, exercise: str, phase: str) -> dict:
+        t0 = time.perf_counter()
+        features = extract_features(landmarks)
+        if self.batcher is not None:
+            prediction = self.batcher(features)
+        else:
+            prediction = self.classifier.predict([features])[0]
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        expected = exercise if self.classifier.target == "exercise" else phase
+        return {
+            "target": self.classifier.target,
+            "prediction": prediction,
+            "agrees": prediction == expected,
+            "latency_ms": latency_ms,
+        }
@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+import atexit
 import csv
 import os
+import queue
+import threading
+import time
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Tuple, Union
 
+import numpy as np
+
+from .detectors import AUTO_EXERCISE
 from .geometry import Point
+from .landmark_store import EXTENSION, LandmarkFile
+
+# Auto mode labels samples with its own guess of the exercise. Those go in a
+# subfolder that the training scripts do not read, until someone has checked them.
+AUTO_SUBDIR = "auto"
 
 
 @dataclass
 class Sample:
     exercise: str
-    landmarks: List[Tuple[float, float, float, float]]
+    landmarks: Union[np.ndarray, List[Tuple[float, float, float, float]]]  # (33, 4) array or list of tuples
     label: str  # e.g., phase or rep boundary
 
 
@@ -20,19 +32,158 @@ def ensure_dir(path: str) -> None:
         os.makedirs(path, exist_ok=True)
 
 
+def _csv_header(n_landmarks: int) -> List[str]:
+    return ["exercise", "label"] + [f"lm{i}_{k}" for i in range(n_landmarks) for k in ["x","y","z","vis"]]
+
+
+def _csv_rows(sample: Sample) -> List[List[str]]:
+    landmarks = sample.landmarks.tolist() if isinstance(sample.landmarks, np.ndarray) else sample.landmarks
+    return [[sample.exercise, sample.label] + list(map(str, lm)) for lm in landmarks]
+
+
 def save_sample_csv(out_dir: str, sample: Sample) -> None:
     ensure_dir(out_dir)
-    rows = [[sample.exercise, sample.label] + list(map(str, lm)) for lm in sample.landmarks]
+    rows = _csv_rows(sample)
     out_path = os.path.join(out_dir, f"{sample.exercise}.csv")
     new_file = not os.path.exists(out_path)
     with open(out_path, "a", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         if new_file:
-            header = ["exercise", "label"] + [f"lm{i}_{k}" for i in range(len(sample.landmarks)) for k in ["x","y","z","vis"]]
-            writer.writerow(header)
+            writer.writerow(_csv_header(len(sample.landmarks)))
         for row in rows:
             writer.writerow(row)
 
 
+_FLUSH = object()
+_STOP = object()
+
+
+class SampleWriter:
+    """Appends samples to one dataset file (`.lmk` binary or legacy `.csv`) from a background thread.
+
+    `write` only enqueues, so logging never blocks the frame path; when the
+    bounded queue is full the sample is dropped and counted. Queued samples are
+    written in batches once `flush_every` have accumulated or `flush_interval_s`
+    has passed, with one open/close per batch. A single thread owns the file, so
+    sessions logging the same exercise never interleave rows.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = 1024,
+        flush_every: int = 64,
+        flush_interval_s: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.flush_interval_s = flush_interval_s
+        self.written = 0
+        self.dropped = 0
+        self._binary = LandmarkFile(path) if path.endswith(EXTENSION) else None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name=f"dataset-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def write(self, sample: Sample) -> bool:
+        """Queue `sample`; returns False if it was dropped because the queue is full."""
+        try:
+            self._queue.put_nowait(sample)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self) -> None:
+        """Ask the writer to write what it has now, without waiting for it."""
+        try:
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            pass  # a full queue is flushed by count anyway
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write everything queued so far and stop the thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        batch: List[Sample] = []
+        deadline = time.monotonic() + self.flush_interval_s
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is not None and item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+            due = item is _FLUSH or item is _STOP or len(batch) >= self.flush_every or time.monotonic() >= deadline
+            if due:
+                if batch:
+                    try:
+                        self._write_batch(batch)
+                    except Exception as e:
+                        print(f"Error saving samples to {self.path}: {e}")
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval_s
+            if item is _STOP:
+                return
+
+    def _write_batch(self, batch: List[Sample]) -> None:
+        ensure_dir(os.path.dirname(self.path) or ".")
+        if self._binary is not None:
+            self._binary.append(
+                np.stack([np.asarray(s.landmarks, dtype=np.float32) for s in batch]),
+                [s.exercise for s in batch],
+                [s.label for s in batch],
+            )
+            self.written += len(batch)
+            return
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(_csv_header(len(batch[0].landmarks)))
+            for sample in batch:
+                writer.writerows(_csv_rows(sample))
+        self.written += len(batch)
+
+
+_WRITERS: Dict[str, SampleWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def sample_dir(data_dir: str, selected: str) -> str:
+    """Folder for samples logged while `selected` (an EXERCISE_MAP name or AUTO_EXERCISE) is chosen."""
+    return os.path.join(data_dir, AUTO_SUBDIR) if selected == AUTO_EXERCISE else data_dir
+
+
+def get_sample_writer(out_dir: str, exercise: str, ext: str = EXTENSION) -> SampleWriter:
+    """Return the process-wide writer for `exercise` in `out_dir`, starting it on first use."""
+    path = os.path.abspath(os.path.join(out_dir, f"{exercise}{ext}"))
+    writer = _WRITERS.get(path)
+    if writer is not None:
+        return writer
+    with _WRITERS_LOCK:
+        writer = _WRITERS.get(path)
+        if writer is None:
+            writer = SampleWriter(path)
+            _WRITERS[path] = writer
+    return writer
+
+
+def close_sample_writers() -> None:
+    """Flush and stop every writer; called on shutdown."""
+    with _WRITERS_LOCK:
+        writers = list(_WRITERS.values())
+        _WRITERS.clear()
+    for writer in writers:
+        writer.close()
+
+
+atexit.register(close_sample_writers)
+
+
 # Placeholder for future ML training hooks
 # You can implement feature extraction, train/test split, and a classifier/regressor.
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, Union
 
-from .geometry import Point, angle_between_three_points, midpoint, distance
+import numpy as np
+
+from .geometry import angles_deg, distances, midpoints
 
 
 # MediaPipe Pose landmark indices for readability
@@ -31,208 +34,408 @@ class ExerciseFeedback:
     cues: List[str]
 
 
-def _p(lm: Tuple[float, float, float, float]) -> Point:
-    return Point(lm[0], lm[1], lm[2], lm[3])
+# A (K, 4) landmark array, a (T, K, 4) sequence, or the legacy list of K tuples
+Landmarks = Union[np.ndarray, Sequence[Tuple[float, float, float, float]]]
 
+# Joint angles the detectors and the learned features use, as (a, b, c) with the angle measured at b
+JOINT_ANGLES: Dict[str, Tuple[int, int, int]] = {
+    "left_knee": (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+    "right_knee": (RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+    "left_elbow": (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    "right_elbow": (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+    "left_hip": (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    "right_hip": (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+}
+# All landmarks joint_metrics reads, gathered in one indexing step:
+# angle points a, b, c, then left and right shoulder/hip/ankle for the midpoints
+_N_ANGLES = len(JOINT_ANGLES)
+_GATHER = np.array(
+    [t[0] for t in JOINT_ANGLES.values()]
+    + [t[1] for t in JOINT_ANGLES.values()]
+    + [t[2] for t in JOINT_ANGLES.values()]
+    + [LEFT_SHOULDER, LEFT_HIP, LEFT_ANKLE, RIGHT_SHOULDER, RIGHT_HIP, RIGHT_ANKLE],
+    dtype=np.intp,
+)
 
-class RepCounter:
-    def __init__(self, down_phase: str = "down", up_phase: str = "up", thresh_down: float = 1.0, thresh_up: float = 1.0) -> None:
-        self.reps = 0
-        self.state = up_phase
-        self.down_phase = down_phase
-        self.up_phase = up_phase
-        self._down_flag = False
-        self._up_flag = False
-        self._thresh_down = thresh_down
-        self._thresh_up = thresh_up
 
-    def update(self, down_condition: bool, up_condition: bool) -> Optional[int]:
-        # Debounce using flags
-        if down_condition and not self._down_flag:
-            self._down_flag = True
-            self.state = self.down_phase
-        if not down_condition:
-            self._down_flag = False
+# Names of the values _metric_values computes, in order
+METRIC_NAMES: Tuple[str, ...] = (
+    *JOINT_ANGLES,
+    "depth_ratio",
+    "shoulder_mid_x", "shoulder_mid_y",
+    "hip_mid_x", "hip_mid_y",
+    "ankle_mid_x", "ankle_mid_y",
+)
 
-        if up_condition and not self._up_flag and self.state == self.down_phase:
-            self._up_flag = True
-            self.state = self.up_phase
-            self.reps += 1
-            return self.reps
-        if not up_condition:
-            self._up_flag = False
-        return None
 
+def _metric_values(lms: Landmarks) -> np.ndarray:
+    """METRIC_NAMES for one frame (K, 4) -> (M,) or a sequence (T, K, 4) -> (T, M)."""
+    pts = np.asarray(lms, dtype=np.float32)[..., _GATHER, :2]
+    n = _N_ANGLES
+    angles = angles_deg(pts[..., :n, :], pts[..., n:2 * n, :], pts[..., 2 * n:3 * n, :])
+    mids = midpoints(pts[..., 3 * n:3 * n + 3, :], pts[..., 3 * n + 3:, :])  # shoulder, hip, ankle
+    hip_to_ankle = distances(mids[..., 1, :], mids[..., 2, :])
+    shoulder_to_ankle = distances(mids[..., 0, :], mids[..., 2, :])
+    depth_ratio = hip_to_ankle / np.maximum(shoulder_to_ankle, 1e-6)
+    return np.concatenate([angles, depth_ratio[..., None], mids.reshape(*mids.shape[:-2], 6)], axis=-1)
 
-class SquatDetector:
-    def __init__(self) -> None:
-        self.counter = RepCounter(down_phase="down", up_phase="up")
 
-    def infer(self, lms: List[Tuple[float, float, float, float]]) -> ExerciseFeedback:
-        ls, rs = _p(lms[LEFT_SHOULDER]), _p(lms[RIGHT_SHOULDER])
-        lh, rh = _p(lms[LEFT_HIP]), _p(lms[RIGHT_HIP])
-        lk, rk = _p(lms[LEFT_KNEE]), _p(lms[RIGHT_KNEE])
-        la, ra = _p(lms[LEFT_ANKLE]), _p(lms[RIGHT_ANKLE])
-
-        # Use knee angle and hip height relative to ankle
-        left_knee_angle = angle_between_three_points(lh, lk, la)
-        right_knee_angle = angle_between_three_points(rh, rk, ra)
-        knee_angle = (left_knee_angle + right_knee_angle) / 2.0
-
-        hip_mid = midpoint(lh, rh)
-        ankle_mid = midpoint(la, ra)
-        hip_to_ankle = distance(hip_mid, ankle_mid)
-        shoulder_mid = midpoint(ls, rs)
-        shoulder_to_ankle = distance(shoulder_mid, ankle_mid)
-        depth_ratio = hip_to_ankle / max(shoulder_to_ankle, 1e-6)
-
-        cues: List[str] = []
-        if knee_angle < 70:
-            cues.append("Knees too closed; avoid collapsing")
-        if knee_angle > 170:
-            cues.append("Start bending knees to go down")
-
-        down_condition = knee_angle < 100 or depth_ratio < 0.45
-        up_condition = knee_angle > 160 and depth_ratio > 0.6
-        rep = self.counter.update(down_condition, up_condition)
-        if rep is not None:
-            cues.append(f"Squat rep {rep}")
+def joint_metrics(lms: Landmarks) -> Dict[str, np.ndarray]:
+    """Every angle, midpoint and ratio the detectors need, in a handful of array operations.
 
-        return ExerciseFeedback(name="squat", reps=self.counter.reps, phase=self.counter.state, cues=cues)
+    Accepts one frame (K, 4) or a whole sequence (T, K, 4); each value has the
+    leading shape of the input (a 0-d array for a single frame).
+    """
+    values = _metric_values(lms)
+    return {name: values[..., i] for i, name in enumerate(METRIC_NAMES)}
 
 
-class PushupDetector:
-    def __init__(self) -> None:
-        self.counter = RepCounter(down_phase="down", up_phase="up")
+# Left/right pairs combined into the mean, the more bent side and the difference
+_PAIRED = ("knee", "elbow", "hip")
 
-    def infer(self, lms: List[Tuple[float, float, float, float]]) -> ExerciseFeedback:
-        ls, rs = _p(lms[LEFT_SHOULDER]), _p(lms[RIGHT_SHOULDER])
-        le, re = _p(lms[LEFT_ELBOW]), _p(lms[RIGHT_ELBOW])
-        lw, rw = _p(lms[LEFT_WRIST]), _p(lms[RIGHT_WRIST])
 
-        left_elbow = angle_between_three_points(ls, le, lw)
-        right_elbow = angle_between_three_points(rs, re, rw)
-        elbow_angle = (left_elbow + right_elbow) / 2.0
+def joint_table(lms: Landmarks) -> Dict[str, float]:
+    """The feature table every rule reads for one frame: joint_metrics plus side combinations.
 
-        cues: List[str] = []
-        if elbow_angle > 170:
-            cues.append("Lower down")
-        if elbow_angle < 80:
-            cues.append("Keep elbows tucked")
+    Computed once per frame and shared by all detectors, so evaluating more
+    exercises on the same frame only adds threshold comparisons.
+    """
+    # One conversion to Python floats for the whole table; rules compare scalars
+    return _table(_metric_values(lms).astype(np.float64).tolist())
 
-        down_condition = elbow_angle < 95
-        up_condition = elbow_angle > 165
-        rep = self.counter.update(down_condition, up_condition)
-        if rep is not None:
-            cues.append(f"Pushup rep {rep}")
 
-        return ExerciseFeedback(name="pushup", reps=self.counter.reps, phase=self.counter.state, cues=cues)
+def joint_tables(lms: np.ndarray) -> List[Dict[str, float]]:
+    """joint_table for every person in an (N, K, 4) stack, with one array pass for all of them."""
+    values = _metric_values(lms).astype(np.float64).reshape(-1, len(METRIC_NAMES))
+    return [_table(row) for row in values.tolist()]
 
 
-class LungeDetector:
-    def __init__(self) -> None:
-        self.counter = RepCounter(down_phase="down", up_phase="up")
+def _table(values: List[float]) -> Dict[str, float]:
+    table = dict(zip(METRIC_NAMES, values))
+    for joint in _PAIRED:
+        left, right = table[f"left_{joint}"], table[f"right_{joint}"]
+        table[f"{joint}_mean"] = (left + right) / 2.0
+        table[f"{joint}_min"] = min(left, right)
+        table[f"{joint}_diff"] = abs(left - right)
+    # 1 with the torso vertical (standing, sitting), 0 with it horizontal (plank)
+    dx = table["shoulder_mid_x"] - table["hip_mid_x"]
+    dy = table["shoulder_mid_y"] - table["hip_mid_y"]
+    torso = (dx * dx + dy * dy) ** 0.5
+    table["torso_upright"] = abs(dy) / torso if torso > 0 else 0.0
+    return table
 
-    def infer(self, lms: List[Tuple[float, float, float, float]]) -> ExerciseFeedback:
-        lh, rh = _p(lms[LEFT_HIP]), _p(lms[RIGHT_HIP])
-        lk, rk = _p(lms[LEFT_KNEE]), _p(lms[RIGHT_KNEE])
-        la, ra = _p(lms[LEFT_ANKLE]), _p(lms[RIGHT_ANKLE])
 
-        left_knee = angle_between_three_points(lh, lk, la)
-        right_knee = angle_between_three_points(rh, rk, ra)
-        knee_angle = min(left_knee, right_knee)
+# Declarative rules: conditions are small callables over a joint table
 
-        cues: List[str] = []
-        if knee_angle > 170:
-            cues.append("Step forward and lower knee")
 
-        down_condition = knee_angle < 100
-        up_condition = knee_angle > 165
-        rep = self.counter.update(down_condition, up_condition)
-        if rep is not None:
-            cues.append(f"Lunge rep {rep}")
+@dataclass(frozen=True)
+class Below:
+    metric: str
+    value: float
 
-        return ExerciseFeedback(name="lunge", reps=self.counter.reps, phase=self.counter.state, cues=cues)
+    def __call__(self, table: Dict[str, float]) -> bool:
+        return table[self.metric] < self.value
 
 
-class SideLungeDetector:
-    def __init__(self) -> None:
-        self.counter = RepCounter(down_phase="down", up_phase="up")
+@dataclass(frozen=True)
+class Above:
+    metric: str
+    value: float
 
-    def infer(self, lms: List[Tuple[float, float, float, float]]) -> ExerciseFeedback:
-        # Use hip-knee-ankle angle on the side with more bend
-        lh, rh = _p(lms[LEFT_HIP]), _p(lms[RIGHT_HIP])
-        lk, rk = _p(lms[LEFT_KNEE]), _p(lms[RIGHT_KNEE])
-        la, ra = _p(lms[LEFT_ANKLE]), _p(lms[RIGHT_ANKLE])
+    def __call__(self, table: Dict[str, float]) -> bool:
+        return table[self.metric] > self.value
 
-        left_knee = angle_between_three_points(lh, lk, la)
-        right_knee = angle_between_three_points(rh, rk, ra)
-        knee_angle = min(left_knee, right_knee)
 
-        cues: List[str] = []
-        if knee_angle > 170:
-            cues.append("Shift hips to one side and bend the knee")
+@dataclass(frozen=True)
+class AnyOf:
+    conditions: Tuple[Condition, ...]
 
-        down_condition = knee_angle < 110
-        up_condition = knee_angle > 165
-        rep = self.counter.update(down_condition, up_condition)
-        if rep is not None:
-            cues.append(f"Side lunge rep {rep}")
+    def __call__(self, table: Dict[str, float]) -> bool:
+        return any(c(table) for c in self.conditions)
 
-        return ExerciseFeedback(name="side_lunge", reps=self.counter.reps, phase=self.counter.state, cues=cues)
 
+@dataclass(frozen=True)
+class AllOf:
+    conditions: Tuple[Condition, ...]
 
-class HammerCurlDetector:
-    def __init__(self) -> None:
-        self.counter = RepCounter(down_phase="down", up_phase="up")
+    def __call__(self, table: Dict[str, float]) -> bool:
+        return all(c(table) for c in self.conditions)
 
-    def infer(self, lms: List[Tuple[float, float, float, float]]) -> ExerciseFeedback:
-        ls, rs = _p(lms[LEFT_SHOULDER]), _p(lms[RIGHT_SHOULDER])
-        le, re = _p(lms[LEFT_ELBOW]), _p(lms[RIGHT_ELBOW])
-        lw, rw = _p(lms[LEFT_WRIST]), _p(lms[RIGHT_WRIST])
 
-        left_elbow = angle_between_three_points(ls, le, lw)
-        right_elbow = angle_between_three_points(rs, re, rw)
-        elbow_angle = (left_elbow + right_elbow) / 2.0
+Condition = Union[Below, Above, AnyOf, AllOf]
 
-        cues: List[str] = []
-        if elbow_angle > 160:
-            cues.append("Curl up")
-        if elbow_angle < 60:
-            cues.append("Lower slowly; control the descent")
 
-        down_condition = elbow_angle < 70
-        up_condition = elbow_angle > 155
-        rep = self.counter.update(down_condition, up_condition)
-        if rep is not None:
-            cues.append(f"Hammer curl rep {rep}")
+@dataclass(frozen=True)
+class ExerciseRule:
+    name: str  # feedback name, e.g. "squat"
+    rep_label: str  # spoken rep cue prefix, e.g. "Squat rep 3"
+    down: Condition
+    up: Condition
+    cues: Tuple[Tuple[Condition, str], ...] = ()
+    # Body position at the bottom of a rep; auto mode only counts reps started in it
+    posture: Optional[Condition] = None
 
-        return ExerciseFeedback(name="hammer_curl", reps=self.counter.reps, phase=self.counter.state, cues=cues)
 
+class RepCounter:
+    def __init__(self, down_phase: str = "down", up_phase: str = "up", thresh_down: float = 1.0, thresh_up: float = 1.0) -> None:
+        self.reps = 0
+        self.state = up_phase
+        self.down_phase = down_phase
+        self.up_phase = up_phase
+        self._down_flag = False
+        self._up_flag = False
+        self._thresh_down = thresh_down
+        self._thresh_up = thresh_up
 
-class ChairDipDetector:
-    def __init__(self) -> None:
-        self.counter = RepCounter(down_phase="down", up_phase="up")
+    def update(self, down_condition: bool, up_condition: bool) -> Optional[int]:
+        # Debounce using flags
+        if down_condition and not self._down_flag:
+            self._down_flag = True
+            self.state = self.down_phase
+        if not down_condition:
+            self._down_flag = False
+
+        if up_condition and not self._up_flag and self.state == self.down_phase:
+            self._up_flag = True
+            self.state = self.up_phase
+            self.reps += 1
+            return self.reps
+        if not up_condition:
+            self._up_flag = False
+        return None
 
-    def infer(self, lms: List[Tuple[float, float, float, float]]) -> ExerciseFeedback:
-        ls, rs = _p(lms[LEFT_SHOULDER]), _p(lms[RIGHT_SHOULDER])
-        le, re = _p(lms[LEFT_ELBOW]), _p(lms[RIGHT_ELBOW])
-        lw, rw = _p(lms[LEFT_WRIST]), _p(lms[RIGHT_WRIST])
 
-        left_elbow = angle_between_three_points(ls, le, lw)
-        right_elbow = angle_between_three_points(rs, re, rw)
-        elbow = (left_elbow + right_elbow) / 2.0
+class RuleDetector:
+    """Rep counting and cues for one exercise, driven by its `rule`."""
 
-        cues: List[str] = []
-        if elbow > 160:
-            cues.append("Lower body by bending elbows")
-        if elbow < 80:
-            cues.append("Push through palms to rise")
+    rule: ExerciseRule
 
-        down_condition = elbow < 95
-        up_condition = elbow > 165
-        rep = self.counter.update(down_condition, up_condition)
-        if rep is not None:
-            cues.append(f"Chair dip rep {rep}")
+    def __init__(self, rule: Optional[ExerciseRule] = None) -> None:
+        if rule is not None:
+            self.rule = rule
+        self.counter = RepCounter(down_phase="down", up_phase="up")
 
-        return ExerciseFeedback(name="chair_dip", reps=self.counter.reps, phase=self.counter.state, cues=cues)
+    def infer(self, lms: Landmarks) -> ExerciseFeedback:
+        return self.infer_table(joint_table(lms))
+
+    def infer_table(self, table: Dict[str, float]) -> ExerciseFeedback:
+        rule = self.rule
+        cues = [text for condition, text in rule.cues if condition(table)]
+        rep = self.counter.update(rule.down(table), rule.up(table))
+        if rep is not None:
+            cues.append(f"{rule.rep_label} rep {rep}")
+        return ExerciseFeedback(name=rule.name, reps=self.counter.reps, phase=self.counter.state, cues=cues)
+
+
+def infer_all(detectors: Sequence[RuleDetector], lms: Landmarks) -> List[ExerciseFeedback]:
+    """Run several detectors on one frame, computing its joint table once."""
+    table = joint_table(lms)
+    return [d.infer_table(table) for d in detectors]
+
+
+# Squat: average knee angle and hip height relative to ankle
+SQUAT = ExerciseRule(
+    name="squat",
+    rep_label="Squat",
+    down=AnyOf((Below("knee_mean", 100), Below("depth_ratio", 0.45))),
+    up=AllOf((Above("knee_mean", 160), Above("depth_ratio", 0.6))),
+    cues=(
+        (Below("knee_mean", 70), "Knees too closed; avoid collapsing"),
+        (Above("knee_mean", 170), "Start bending knees to go down"),
+    ),
+    posture=AllOf((Above("torso_upright", 0.5), Below("knee_diff", 30))),
+)
+
+PUSHUP = ExerciseRule(
+    name="pushup",
+    rep_label="Pushup",
+    down=Below("elbow_mean", 95),
+    up=Above("elbow_mean", 165),
+    cues=(
+        (Above("elbow_mean", 170), "Lower down"),
+        (Below("elbow_mean", 80), "Keep elbows tucked"),
+    ),
+    posture=Below("torso_upright", 0.5),
+)
+
+LUNGE = ExerciseRule(
+    name="lunge",
+    rep_label="Lunge",
+    down=Below("knee_min", 100),
+    up=Above("knee_min", 165),
+    cues=((Above("knee_min", 170), "Step forward and lower knee"),),
+    posture=Above("torso_upright", 0.6),
+)
+
+# Side lunge: hip-knee-ankle angle on the side with more bend
+SIDE_LUNGE = ExerciseRule(
+    name="side_lunge",
+    rep_label="Side lunge",
+    down=Below("knee_min", 110),
+    up=Above("knee_min", 165),
+    cues=((Above("knee_min", 170), "Shift hips to one side and bend the knee"),),
+    posture=AllOf((Above("torso_upright", 0.6), Above("knee_diff", 40))),
+)
+
+HAMMER_CURL = ExerciseRule(
+    name="hammer_curl",
+    rep_label="Hammer curl",
+    down=Below("elbow_mean", 70),
+    up=Above("elbow_mean", 155),
+    cues=(
+        (Above("elbow_mean", 160), "Curl up"),
+        (Below("elbow_mean", 60), "Lower slowly; control the descent"),
+    ),
+    posture=AllOf((Above("torso_upright", 0.8), Above("knee_min", 150))),
+)
+
+CHAIR_DIP = ExerciseRule(
+    name="chair_dip",
+    rep_label="Chair dip",
+    down=Below("elbow_mean", 95),
+    up=Above("elbow_mean", 165),
+    cues=(
+        (Above("elbow_mean", 160), "Lower body by bending elbows"),
+        (Below("elbow_mean", 80), "Push through palms to rise"),
+    ),
+    posture=AllOf((Above("torso_upright", 0.6), Below("knee_mean", 160))),
+)
+
+
+class SquatDetector(RuleDetector):
+    rule = SQUAT
+
+
+class PushupDetector(RuleDetector):
+    rule = PUSHUP
+
+
+class LungeDetector(RuleDetector):
+    rule = LUNGE
+
+
+class SideLungeDetector(RuleDetector):
+    rule = SIDE_LUNGE
+
+
+class HammerCurlDetector(RuleDetector):
+    rule = HAMMER_CURL
+
+
+class ChairDipDetector(RuleDetector):
+    rule = CHAIR_DIP
+
+
+# Display name -> detector class, shared by the backend, the Streamlit app and the CLIs
+EXERCISE_MAP = {
+    "Squat": SquatDetector,
+    "Pushup": PushupDetector,
+    "Lunge": LungeDetector,
+    "Side Lunge": SideLungeDetector,
+    "Hammer Curl": HammerCurlDetector,
+    "Chair Dip": ChairDipDetector,
+}
+
+AUTO_EXERCISE = "Auto"
+
+
+class AutoExerciseDetector:
+    """Runs every registered exercise on each frame and reports the one being done.
+
+    All rules read one shared joint table. Each exercise gets a vote whenever
+    its rule enters the down phase with the body in the rule's posture; the
+    exercise with the most votes over the last `window` frames becomes active
+    once it has `min_votes` and beats the current one.
+
+    Every rule keeps its state machine running for the votes, but reps are only
+    credited to the active exercise: pushups and chair dips share elbow angles
+    and lunges fire on squat knees, so the inactive counters pick up other
+    movements. On a switch, the new exercise is also credited the reps it
+    completed in its posture within the window, i.e. the reps that won it the
+    vote. Credited counts are kept per exercise, so switching back resumes them.
+
+    Squats and forward lunges look alike in joint angles; a tie goes to the
+    exercise listed first in EXERCISE_MAP.
+    """
+
+    def __init__(self, window: int = 90, min_votes: int = 2) -> None:
+        self.detectors: Dict[str, RuleDetector] = {name: cls() for name, cls in EXERCISE_MAP.items()}
+        self._items = list(self.detectors.items())
+        self.window = window
+        self.min_votes = min_votes
+        self.votes: Dict[str, int] = {name: 0 for name in self.detectors}
+        self._history: Deque[Tuple[str, ...]] = deque()
+        self.active: str = self._items[0][0]
+        # Reps credited per exercise, as reported to the user
+        self.reps: Dict[str, int] = {name: 0 for name in self.detectors}
+        # Frames on which an inactive exercise completed a rep in its posture
+        self._earned: Dict[str, Deque[int]] = {name: deque() for name in self.detectors}
+        self._in_posture: Dict[str, bool] = {name: False for name in self.detectors}
+        self._frame = 0
+
+    @property
+    def counter(self) -> RepCounter:
+        return self.detectors[self.active].counter
+
+    def infer(self, lms: Landmarks) -> ExerciseFeedback:
+        return self.infer_table(joint_table(lms))
+
+    def infer_table(self, table: Dict[str, float]) -> ExerciseFeedback:
+        self._frame += 1
+        feedbacks: Dict[str, ExerciseFeedback] = {}
+        voted: List[str] = []
+        credited = False
+        for name, detector in self._items:
+            counter = detector.counter
+            before, reps = counter.state, counter.reps
+            feedbacks[name] = detector.infer_table(table)
+            if counter.state != before and counter.state == counter.down_phase:
+                posture = detector.rule.posture
+                self._in_posture[name] = posture is None or posture(table)
+                if self._in_posture[name]:
+                    voted.append(name)
+            if counter.reps != reps:
+                if name == self.active:
+                    self.reps[name] += 1
+                    credited = True
+                elif self._in_posture[name]:
+                    earned = self._earned[name]
+                    earned.append(self._frame)
+                    while earned[0] <= self._frame - self.window:
+                        earned.popleft()
+        active = self.active
+        fb = feedbacks[active]
+        cues = fb.cues
+        if credited:
+            # The rule's rep cue carries its raw count; report the credited one
+            label = f"{self.detectors[active].rule.rep_label} rep "
+            cues = [c for c in cues if not c.startswith(label)] + [f"{label}{self.reps[active]}"]
+        self._vote(tuple(voted))
+        return ExerciseFeedback(name=fb.name, reps=self.reps[active], phase=fb.phase, cues=cues)
+
+    def _vote(self, voted: Tuple[str, ...]) -> None:
+        self._history.append(voted)
+        for name in voted:
+            self.votes[name] += 1
+        if len(self._history) > self.window:
+            for name in self._history.popleft():
+                self.votes[name] -= 1
+        if not voted:
+            return
+        # Ties go to the earlier entry in EXERCISE_MAP
+        best = max(self.votes, key=self.votes.__getitem__)
+        if best != self.active and self.votes[best] >= self.min_votes and self.votes[best] > self.votes[self.active]:
+            self._activate(best)
+
+    def _activate(self, name: str) -> None:
+        earned = self._earned[name]
+        self.reps[name] += sum(1 for frame in earned if frame > self._frame - self.window)
+        earned.clear()
+        self.active = name
+
+
+def make_detector(exercise: str):
+    """Detector for a display name from EXERCISE_MAP, or AUTO_EXERCISE for recognition mode."""
+    if exercise == AUTO_EXERCISE:
+        return AutoExerciseDetector()
+    return EXERCISE_MAP[exercise]()
@@ -0,0 +1,169 @@
+"""Export the pose model for CPU inference, optionally quantized to int8.
+
+    python pose_app/export_model.py --format onnx
+    python pose_app/export_model.py --format onnx --int8 --calib recordings/session.mp4
+    python pose_app/export_model.py --format openvino --int8
+
+ONNX int8 uses ONNX Runtime static quantization (QDQ, per channel), calibrated
+on frames from --calib (a video or a folder of images); without --calib it
+falls back to dynamic quantization of the weights only, which is usually
+slower on CPU. OpenVINO int8 uses the Ultralytics / NNCF exporter, calibrated
+on the --data dataset. Point POSE_MODEL at the printed path to serve the
+export, and compare it with the PyTorch model using
+benchmarks/bench_backends.py.
+
+Exports have dynamic batch and input axes by default, which the backend's
+micro-batching and adaptive input sizes rely on. --static builds one fixed
+shape (batch 1 at --imgsz); the backend detects that and serves it without
+batching and at that one size.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import sys
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+# Add project root to path for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pose_app.model_pool import DEFAULT_WEIGHTS
+
+FORMATS = ("onnx", "openvino")
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def read_frames(source: str, limit: int, spread: bool = False) -> List[np.ndarray]:
+    """Up to `limit` BGR frames from a video file or a folder of images.
+
+    Frames are consecutive from the start, or with `spread` taken evenly over the
+    whole source (better coverage for calibration). Also used by the benchmarks.
+    """
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "*")) if p.lower().endswith(IMAGE_EXTS))
+        step = max(1, len(paths) // limit) if spread else 1
+        frames = [cv2.imread(p) for p in paths[::step][:limit]]
+        return [f for f in frames if f is not None]
+    cap = cv2.VideoCapture(source)
+    step = max(1, (int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or limit) // limit) if spread else 1
+    frames: List[np.ndarray] = []
+    index = 0
+    while len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if index % step == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+def preprocess(frame: np.ndarray, imgsz: int) -> np.ndarray:
+    """(1, 3, imgsz, imgsz) float32 input, letterboxed exactly as Ultralytics does at predict time."""
+    from ultralytics.data.augment import LetterBox
+
+    img = LetterBox(new_shape=(imgsz, imgsz), auto=False)(image=frame)
+    img = img[..., ::-1].transpose(2, 0, 1)  # BGR HWC -> RGB CHW
+    return np.ascontiguousarray(img, dtype=np.float32)[None] / 255.0
+
+
+class _CalibrationReader:
+    """Feeds calibration frames to onnxruntime.quantization.quantize_static."""
+
+    def __init__(self, input_name: str, frames: List[np.ndarray], imgsz: int) -> None:
+        self._inputs: Iterator[dict] = iter([{input_name: preprocess(f, imgsz)} for f in frames])
+
+    def get_next(self) -> Optional[dict]:
+        return next(self._inputs, None)
+
+
+def quantize_onnx(src: str, dst: str, calib: Optional[str], imgsz: int, calib_frames: int) -> str:
+    try:
+        import onnxruntime as ort
+        from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    except ImportError:
+        raise SystemExit("ONNX int8 needs onnxruntime: pip install onnxruntime")
+
+    if not calib:
+        print("No --calib frames: quantizing weights only (dynamic); pass --calib for static int8")
+        quantize_dynamic(src, dst, weight_type=QuantType.QUInt8)
+        return dst
+    frames = read_frames(calib, calib_frames, spread=True)
+    if not frames:
+        raise SystemExit(f"No calibration frames could be read from {calib}")
+    input_name = ort.InferenceSession(src, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    quantize_static(
+        src,
+        dst,
+        _CalibrationReader(input_name, frames, imgsz),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    print(f"Calibrated on {len(frames)} frames from {calib}")
+    return dst
+
+
+def export(
+    weights: str = DEFAULT_WEIGHTS,
+    fmt: str = "onnx",
+    int8: bool = False,
+    imgsz: int = 640,
+    dynamic: bool = True,
+    calib: Optional[str] = None,
+    calib_frames: int = 200,
+    data: Optional[str] = None,
+) -> str:
+    """Export `weights` and return the path to pass as POSE_MODEL."""
+    from ultralytics import YOLO
+
+    model = YOLO(weights)
+    if fmt == "onnx":
+        # A dynamic batch axis lets the micro-batcher send several frames in one call
+        path = model.export(format="onnx", imgsz=imgsz, dynamic=dynamic, simplify=True)
+        if int8:
+            path = quantize_onnx(path, path[: -len(".onnx")] + ".int8.onnx", calib, imgsz, calib_frames)
+        return path
+    kwargs = {"data": data} if data else {}
+    return model.export(format="openvino", imgsz=imgsz, dynamic=dynamic, int8=int8, **kwargs)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS, help="PyTorch weights to export")
+    parser.add_argument("--format", choices=FORMATS, default="onnx")
+    parser.add_argument("--int8", action="store_true", help="Quantize to int8")
+    parser.add_argument("--imgsz", type=int, default=640, help="Inference size the export is built for")
+    parser.add_argument(
+        "--static",
+        action="store_true",
+        help="Fixed input shape (batch 1 at --imgsz) instead of dynamic axes; served without batching "
+        "or adaptive input sizes",
+    )
+    parser.add_argument("--calib", help="ONNX int8: video or image folder of representative frames")
+    parser.add_argument("--calib-frames", type=int, default=200)
+    parser.add_argument("--data", help="OpenVINO int8: Ultralytics dataset yaml to calibrate on")
+    args = parser.parse_args(argv)
+
+    path = export(
+        args.weights,
+        args.format,
+        int8=args.int8,
+        imgsz=args.imgsz,
+        dynamic=not args.static,
+        calib=args.calib,
+        calib_frames=args.calib_frames,
+        data=args.data,
+    )
+    print(f"Exported {path}")
+    print(f"Serve it with POSE_MODEL={path}")
+
+
+if __name__ == "__main__":
+    main()
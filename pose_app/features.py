@@ -0,0 +1,150 @@
+"""Compact, normalized pose features shared by training and inference.
+
+`extract_features` turns (33, 4) landmark arrays, or any stack of them, into
+fixed-length float32 vectors. The vector holds the detector joint angles (from
+`detectors.joint_metrics`, so the learned and heuristic paths see the same
+geometry), the depth ratio, and the 12 keypoints the pose model fills in. The
+keypoints are centred on the hips and scaled by torso length, so camera
+distance and framing drop out; the 21 landmark slots that are always zero are
+left out.
+
+`cached_features` computes features for a dataset folder once per source file
+and stores them under a key derived from the file's content hash.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .detectors import (
+    JOINT_ANGLES,
+    LEFT_ANKLE, LEFT_ELBOW, LEFT_HIP, LEFT_KNEE, LEFT_SHOULDER, LEFT_WRIST,
+    RIGHT_ANKLE, RIGHT_ELBOW, RIGHT_HIP, RIGHT_KNEE, RIGHT_SHOULDER, RIGHT_WRIST,
+    Landmarks,
+    joint_metrics,
+)
+from .landmark_store import (
+    FEATURE_COLUMNS,
+    LANDMARK_FIELDS,
+    NUM_LANDMARKS,
+    find_landmark_files,
+    iter_legacy_csv,
+    open_landmarks,
+    unconverted_csvs,
+)
+
+# Bump when the feature definition changes so cached features are recomputed
+FEATURE_VERSION = 1
+
+# The landmarks the COCO pose model fills in (pose_tracker.MAPPED_LANDMARKS), in the same order;
+# spelled out here so training does not import the model stack
+KEYPOINTS = (
+    LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST,
+    LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE,
+)
+_MAPPED = np.array(KEYPOINTS, dtype=np.intp)
+_SIDES = np.array([LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP], dtype=np.intp)
+
+FEATURE_NAMES: List[str] = (
+    [f"{name}_angle" for name in JOINT_ANGLES]
+    + ["depth_ratio"]
+    + [f"lm{i}_{k}" for i in KEYPOINTS for k in ("x", "y")]
+    + [f"lm{i}_vis" for i in KEYPOINTS]
+)
+NUM_FEATURES = len(FEATURE_NAMES)
+
+
+def extract_features(lms: Landmarks) -> np.ndarray:
+    """Feature vectors for (33, 4) -> (F,) or (..., 33, 4) -> (..., F), as float32.
+
+    Angles are scaled to [0, 1] by 180 degrees. Keypoints are relative to the hip
+    midpoint in units of shoulder-to-hip distance; undetected keypoints are 0.
+    """
+    lms = np.asarray(lms, dtype=np.float32)
+    metrics = joint_metrics(lms)
+    angles = np.stack([metrics[name] for name in JOINT_ANGLES], axis=-1) / 180.0
+
+    sides = lms[..., _SIDES, :2]
+    shoulder_mid = (sides[..., 0, :] + sides[..., 1, :]) / 2.0
+    hip_mid = (sides[..., 2, :] + sides[..., 3, :]) / 2.0
+    torso = np.hypot(*np.moveaxis(shoulder_mid - hip_mid, -1, 0))
+    scale = np.maximum(torso, 1e-6)[..., None, None]
+
+    pts = lms[..., _MAPPED, :]
+    placed = pts[..., 3:4] > 0
+    xy = np.where(placed, (pts[..., :2] - hip_mid[..., None, :]) / scale, 0.0)
+    lead = lms.shape[:-2]
+    return np.concatenate(
+        [
+            angles,
+            metrics["depth_ratio"][..., None],
+            xy.reshape(*lead, -1),
+            pts[..., 3],
+        ],
+        axis=-1,
+    ).astype(np.float32, copy=False)
+
+
+def file_digest(path: str, block: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    # A .lmk file's code tables live in its sidecar
+    sidecar = path + ".json"
+    if os.path.exists(sidecar):
+        with open(sidecar, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _source_samples(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    if path.endswith(".csv"):
+        frames = list(iter_legacy_csv(path))
+        if not frames:
+            return np.zeros((0, NUM_LANDMARKS, len(LANDMARK_FIELDS)), np.float32), np.array([], str), np.array([], str)
+        lms = np.concatenate([df[FEATURE_COLUMNS].to_numpy(dtype=np.float32) for df in frames])
+        lms = lms.reshape(-1, NUM_LANDMARKS, len(LANDMARK_FIELDS))
+        exercises = np.concatenate([df["exercise"].astype(str).to_numpy() for df in frames])
+        labels = np.concatenate([df["label"].astype(str).to_numpy() for df in frames])
+        return lms, exercises.astype(str), labels.astype(str)
+    s = open_landmarks(path)
+    return s.landmarks, s.exercise_names().astype(str), s.label_names().astype(str)
+
+
+def cached_features(
+    data_dir: str, cache_dir: Optional[str] = None, chunk_samples: int = 100_000
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(features (N, F), exercise names, label names) for every sample in `data_dir`.
+
+    Each source file's features are stored in `cache_dir` (default
+    `<data_dir>/.feature_cache`) as `<sha1>.npz`, keyed by the file's content
+    and FEATURE_VERSION, so reruns only compute features for new or changed files.
+    """
+    cache_dir = cache_dir or os.path.join(data_dir, ".feature_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    parts_x, parts_e, parts_l = [], [], []
+    for path in find_landmark_files(data_dir) + unconverted_csvs(data_dir):
+        key = hashlib.sha1(f"v{FEATURE_VERSION}:{file_digest(path)}".encode()).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{key}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as cached:
+                X, exercises, labels = cached["X"], cached["exercise"], cached["label"]
+        else:
+            lms, exercises, labels = _source_samples(path)
+            X = np.concatenate(
+                [extract_features(lms[i:i + chunk_samples]) for i in range(0, len(lms), chunk_samples)]
+                or [np.zeros((0, NUM_FEATURES), np.float32)]
+            )
+            tmp = cache_path + ".tmp.npz"
+            np.savez(tmp, X=X, exercise=exercises, label=labels)
+            os.replace(tmp, cache_path)
+        parts_x.append(X)
+        parts_e.append(exercises)
+        parts_l.append(labels)
+    if not parts_x:
+        return np.zeros((0, NUM_FEATURES), np.float32), np.array([], str), np.array([], str)
+    return np.concatenate(parts_x), np.concatenate(parts_e), np.concatenate(parts_l)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+import numpy as np
+
+
+def _alpha(cutoff: float, dt: float) -> float:
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One-Euro filter (Casiez et al. 2012) applied elementwise to an array of signals.
+
+    Low speeds get a low cutoff (less jitter), high speeds a higher one (less lag).
+    The filtered derivative is kept so callers can extrapolate between samples.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.05, d_cutoff: float = 1.0) -> None:
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self._x: Optional[np.ndarray] = None
+        self._dx: Optional[np.ndarray] = None
+        self._t: Optional[float] = None
+
+    @property
+    def value(self) -> Optional[np.ndarray]:
+        return self._x
+
+    @property
+    def velocity(self) -> Optional[np.ndarray]:
+        """Filtered derivative in signal units per second."""
+        return self._dx
+
+    @property
+    def last_time(self) -> Optional[float]:
+        return self._t
+
+    def __call__(self, x: np.ndarray, t: float) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        if self._x is None or self._t is None or t <= self._t:
+            self._x = x.copy()
+            self._dx = np.zeros_like(x)
+            self._t = t
+            return self._x
+        dt = t - self._t
+        dx = (x - self._x) / dt
+        a_d = _alpha(self.d_cutoff, dt)
+        self._dx = a_d * dx + (1.0 - a_d) * self._dx
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        a = 1.0 / (1.0 + tau / dt)
+        self._x = a * x + (1.0 - a) * self._x
+        self._t = t
+        return self._x
+
+    def predict(self, t: float, max_horizon: float = 0.5) -> Optional[np.ndarray]:
+        """Constant-velocity extrapolation of the filtered value to time `t`."""
+        if self._x is None or self._t is None:
+            return None
+        dt = min(max(t - self._t, 0.0), max_horizon)
+        return self._x + self._dx * dt
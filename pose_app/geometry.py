@@ -4,6 +4,8 @@ from dataclasses import dataclass
 from typing import List, Optional, Tuple
 import math
 
+import numpy as np
+
 
 @dataclass
 class Point:
@@ -13,6 +15,33 @@ class Point:
     visibility: float = 1.0
 
 
+# Vectorized helpers. Inputs are landmark arrays whose last axis is (x, y, ...),
+# so a single (K, 4) frame and a (T, K, 4) sequence go through the same code.
+
+
+def angles_deg(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Angle ABC (at b) in degrees for every leading index; 0 where a vector has zero length."""
+    ab = a[..., :2] - b[..., :2]
+    cb = c[..., :2] - b[..., :2]
+    denom = np.hypot(ab[..., 0], ab[..., 1]) * np.hypot(cb[..., 0], cb[..., 1])
+    dot = ab[..., 0] * cb[..., 0] + ab[..., 1] * cb[..., 1]
+    valid = denom > 0
+    cos = np.divide(dot, denom, out=np.ones_like(dot), where=valid)
+    return np.where(valid, np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))), 0.0)
+
+
+def distances(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    d = a[..., :2] - b[..., :2]
+    return np.hypot(d[..., 0], d[..., 1])
+
+
+def midpoints(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a[..., :2] + b[..., :2]) / 2.0
+
+
+# Scalar helpers on Point, kept for callers that work with single points
+
+
 def angle_between_three_points(a: Point, b: Point, c: Point) -> float:
     """Return angle ABC (at b) in degrees, safe against zero-length vectors."""
     ab = (a.x - b.x, a.y - b.y)
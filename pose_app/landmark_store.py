@@ -0,0 +1,355 @@
+"""Binary landmark dataset: one fixed-width record per sample.
+
+Each `<Exercise>.lmk` file is a flat array of `RECORD_DTYPE` records (exercise
+code, label code, then the (33, 4) float32 landmarks) with no header, so it can
+be appended to in chunks and opened with `np.memmap` without parsing. The code
+tables live in a small `<file>.json` sidecar. Several processes may append to the
+same file; they serialize on a `<file>.lock` file.
+
+Convert the legacy CSV logs to `<name>.legacy.lmk` (and optionally export Parquet):
+
+    python pose_app/landmark_store.py pose_app/data --parquet landmarks.parquet
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+if TYPE_CHECKING:
+    import pandas as pd  # imported where used; the live dataset writer does not need it
+
+NUM_LANDMARKS = 33
+LANDMARK_FIELDS = ("x", "y", "z", "vis")
+FORMAT_VERSION = 1
+EXTENSION = ".lmk"
+# Converted CSV logs get their own file so they never clobber live-logged data
+LEGACY_SUFFIX = ".legacy" + EXTENSION
+
+RECORD_DTYPE = np.dtype([
+    ("exercise", "<u2"),
+    ("label", "<u2"),
+    ("landmarks", "<f4", (NUM_LANDMARKS, len(LANDMARK_FIELDS))),
+])
+
+FEATURE_COLUMNS = [f"lm{i}_{k}" for i in range(NUM_LANDMARKS) for k in LANDMARK_FIELDS]
+
+
+def _sidecar(path: str) -> str:
+    return path + ".json"
+
+
+@contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """Exclusive inter-process lock for appending to `path`."""
+    with open(path + ".lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read_meta(path: str) -> dict:
+    try:
+        with open(_sidecar(path), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return {"version": FORMAT_VERSION, "num_landmarks": NUM_LANDMARKS, "exercises": [], "labels": []}
+    if meta.get("version") != FORMAT_VERSION or meta.get("num_landmarks") != NUM_LANDMARKS:
+        raise ValueError(f"{path}: unsupported landmark file (version {meta.get('version')})")
+    return meta
+
+
+class LandmarkFile:
+    """Appends sample records to one `.lmk` file.
+
+    Not thread-safe; give each object one owner. Other processes (the Streamlit
+    app, more uvicorn workers) may append to the same file: every append takes
+    the file lock and merges the codes they added before assigning new ones.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        meta = _read_meta(path)
+        self.exercises: List[str] = list(meta["exercises"])
+        self.labels: List[str] = list(meta["labels"])
+        self._exercise_codes = {name: i for i, name in enumerate(self.exercises)}
+        self._label_codes = {name: i for i, name in enumerate(self.labels)}
+
+    @staticmethod
+    def _code(name: str, table: List[str], codes: Dict[str, int]) -> int:
+        code = codes.get(name)
+        if code is None:
+            code = len(table)
+            table.append(name)
+            codes[name] = code
+        return code
+
+    def append(self, landmarks: np.ndarray, exercises: Sequence[str], labels: Sequence[str]) -> None:
+        """Append (N, 33, 4) landmarks with one exercise and label name per sample."""
+        landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, len(LANDMARK_FIELDS))
+        n = landmarks.shape[0]
+        if n == 0:
+            return
+        with _locked(self.path):
+            self._merge_meta()
+            known = (len(self.exercises), len(self.labels))
+            records = np.empty(n, dtype=RECORD_DTYPE)
+            records["exercise"] = [self._code(e, self.exercises, self._exercise_codes) for e in exercises]
+            records["label"] = [self._code(lb, self.labels, self._label_codes) for lb in labels]
+            records["landmarks"] = landmarks
+            # Code tables first: a record never refers to a code the sidecar lacks
+            if (len(self.exercises), len(self.labels)) != known or not os.path.exists(_sidecar(self.path)):
+                self._write_meta()
+            with open(self.path, "ab") as f:
+                records.tofile(f)
+
+    def _merge_meta(self) -> None:
+        """Pick up codes other writers added since this object last looked; call under the lock."""
+        meta = _read_meta(self.path)
+        for table, codes, names in (
+            (self.exercises, self._exercise_codes, meta["exercises"]),
+            (self.labels, self._label_codes, meta["labels"]),
+        ):
+            # Codes are only ever appended, so one table must extend the other
+            shared = min(len(table), len(names))
+            if table[:shared] != names[:shared]:
+                raise ValueError(f"{self.path}: code table in {_sidecar(self.path)} no longer matches")
+            for name in names[len(table):]:
+                codes[name] = len(table)
+                table.append(name)
+
+    def _write_meta(self) -> None:
+        meta = {
+            "version": FORMAT_VERSION,
+            "num_landmarks": NUM_LANDMARKS,
+            "exercises": self.exercises,
+            "labels": self.labels,
+        }
+        tmp = _sidecar(self.path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, _sidecar(self.path))
+
+
+@dataclass
+class LandmarkSet:
+    """Samples from one or more landmark files, with shared code tables."""
+    records: np.ndarray  # RECORD_DTYPE; a read-only memmap when opened from a single file
+    exercises: List[str]
+    labels: List[str]
+
+    def __len__(self) -> int:
+        return int(self.records.shape[0])
+
+    @property
+    def landmarks(self) -> np.ndarray:
+        return self.records["landmarks"]
+
+    def exercise_names(self) -> np.ndarray:
+        return np.asarray(self.exercises, dtype=object)[self.records["exercise"]]
+
+    def label_names(self) -> np.ndarray:
+        return np.asarray(self.labels, dtype=object)[self.records["label"]]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Wide table: exercise, label, then lm{i}_{x,y,z,vis} per landmark."""
+        import pandas as pd
+
+        df = pd.DataFrame(self.landmarks.reshape(len(self), -1), columns=FEATURE_COLUMNS)
+        df.insert(0, "label", self.label_names())
+        df.insert(0, "exercise", self.exercise_names())
+        return df
+
+
+def open_landmarks(path: str) -> LandmarkSet:
+    """Memory-map one `.lmk` file. A torn trailing record from a crash is ignored."""
+    meta = _read_meta(path)
+    n = os.path.getsize(path) // RECORD_DTYPE.itemsize if os.path.exists(path) else 0
+    records = (
+        np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(n,))
+        if n > 0
+        else np.zeros(0, dtype=RECORD_DTYPE)
+    )
+    return LandmarkSet(records, list(meta["exercises"]), list(meta["labels"]))
+
+
+def concat(sets: Sequence[LandmarkSet]) -> LandmarkSet:
+    """Merge landmark sets into one in-memory set, remapping codes to shared tables."""
+    if len(sets) == 1:
+        return sets[0]
+    exercises: List[str] = []
+    labels: List[str] = []
+    parts = []
+    for s in sets:
+        ex_map = np.array([_index(exercises, e) for e in s.exercises] or [0], dtype=np.uint16)
+        lb_map = np.array([_index(labels, lb) for lb in s.labels] or [0], dtype=np.uint16)
+        part = np.array(s.records)
+        part["exercise"] = ex_map[part["exercise"]]
+        part["label"] = lb_map[part["label"]]
+        parts.append(part)
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+    return LandmarkSet(records, exercises, labels)
+
+
+def _index(table: List[str], name: str) -> int:
+    if name not in table:
+        table.append(name)
+    return table.index(name)
+
+
+def legacy_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + LEGACY_SUFFIX
+
+
+def find_landmark_files(data_dir: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(data_dir, f"*{EXTENSION}")))
+
+
+def load_landmarks(data_dir: str) -> LandmarkSet:
+    return concat([open_landmarks(p) for p in find_landmark_files(data_dir)])
+
+
+def unconverted_csvs(data_dir: str) -> List[str]:
+    """Legacy CSV logs in `data_dir` that have no converted `.legacy.lmk` yet."""
+    return [p for p in sorted(glob.glob(os.path.join(data_dir, "*.csv"))) if not os.path.exists(legacy_path(p))]
+
+
+def sample_keys(path: str, start: int, n: int) -> np.ndarray:
+    """Stable uint64 ids of samples start..start+n of one dataset file.
+
+    Built from the file name and the sample's index in that file, so a sample
+    keeps its id however the dataset is chunked and whatever files are added.
+    """
+    name = zlib.crc32(os.path.basename(path).encode("utf-8"))
+    return (np.uint64(name) << np.uint64(32)) | np.arange(start, start + n, dtype=np.uint64)
+
+
+def iter_chunks(
+    data_dir: str, chunk_samples: int = 50_000
+) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """Stream (landmarks (n, 33, 4), exercise names, label names, sample keys) over a dataset folder.
+
+    Covers every `.lmk` file and then any CSV log not yet converted; at most
+    `chunk_samples` samples are materialized at a time. Files are usually one
+    exercise each, so every chunk takes an even slice of each file rather than
+    reading them one after another, which would feed incremental learners one
+    class at a time. Keys come from `sample_keys`.
+    """
+    paths = find_landmark_files(data_dir)
+    sets = [open_landmarks(p) for p in paths]
+    total = sum(len(s) for s in sets)
+    steps = max(1, -(-total // chunk_samples))
+    bounds = [np.linspace(0, len(s), steps + 1).astype(np.int64) for s in sets]
+    for step in range(steps if total else 0):
+        lms, exercises, labels, keys = [], [], [], []
+        for path, s, b in zip(paths, sets, bounds):
+            start, n = int(b[step]), int(b[step + 1] - b[step])
+            # Plain reads rather than the memmap: touched pages of a mapping stay resident
+            rec = np.fromfile(path, dtype=RECORD_DTYPE, count=n, offset=start * RECORD_DTYPE.itemsize)
+            lms.append(rec["landmarks"])
+            exercises.append(np.asarray(s.exercises, dtype=object)[rec["exercise"]])
+            labels.append(np.asarray(s.labels, dtype=object)[rec["label"]])
+            keys.append(sample_keys(path, start, len(rec)))
+        yield np.concatenate(lms), np.concatenate(exercises), np.concatenate(labels), np.concatenate(keys)
+    for path in unconverted_csvs(data_dir):
+        start = 0
+        for df in iter_legacy_csv(path, chunk_samples):
+            lms = df[FEATURE_COLUMNS].to_numpy(dtype=np.float32).reshape(-1, NUM_LANDMARKS, len(LANDMARK_FIELDS))
+            yield (
+                lms,
+                df["exercise"].astype(str).to_numpy(dtype=object),
+                df["label"].astype(str).to_numpy(dtype=object),
+                sample_keys(path, start, len(df)),
+            )
+            start += len(df)
+
+
+def iter_legacy_csv(path: str, chunk_samples: int = 10_000) -> Iterator[pd.DataFrame]:
+    """Yield chunks of a CSV written by `save_sample_csv` as wide per-sample rows.
+
+    Those files carry a wide header but store one `exercise,label,x,y,z,vis` row
+    per landmark, 33 rows per sample. Files that really are wide are read as is.
+    """
+    import pandas as pd
+
+    with open(path, encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+        first = f.readline().strip().split(",")
+    if len(first) == len(header):
+        yield from pd.read_csv(path, chunksize=chunk_samples)
+        return
+    per_sample = sum(1 for c in header if c.endswith("_x"))
+    names = ["exercise", "label", *LANDMARK_FIELDS]
+    reader = pd.read_csv(
+        path, header=None, skiprows=1, names=names, chunksize=chunk_samples * per_sample,
+        dtype={"exercise": str, "label": str}, keep_default_na=False,
+    )
+    for chunk in reader:
+        n = len(chunk) // per_sample
+        if n == 0:
+            continue
+        chunk = chunk.iloc[: n * per_sample]
+        values = chunk[list(LANDMARK_FIELDS)].to_numpy(dtype=np.float32).reshape(n, -1)
+        df = pd.DataFrame(values, columns=FEATURE_COLUMNS[: values.shape[1]])
+        df.insert(0, "label", chunk["label"].to_numpy()[::per_sample])
+        df.insert(0, "exercise", chunk["exercise"].to_numpy()[::per_sample])
+        yield df
+
+
+def convert_csv(csv_path: str, out_path: Optional[str] = None, chunk_samples: int = 10_000) -> str:
+    """Convert a legacy CSV log to `<name>.legacy.lmk` next to it; returns the output path."""
+    out_path = out_path or legacy_path(csv_path)
+    for p in (out_path, _sidecar(out_path)):
+        if os.path.exists(p):
+            os.remove(p)
+    out = LandmarkFile(out_path)
+    for df in iter_legacy_csv(csv_path, chunk_samples):
+        lms = df[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+        out.append(lms, df["exercise"].astype(str).tolist(), df["label"].astype(str).tolist())
+    return out_path
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_dir", nargs="?", default=os.path.join(os.path.dirname(__file__), "data"))
+    parser.add_argument("--parquet", help="Also export every landmark file in data_dir to this Parquet file")
+    args = parser.parse_args(argv)
+
+    for csv_path in sorted(glob.glob(os.path.join(args.data_dir, "*.csv"))):
+        out_path = convert_csv(csv_path)
+        n = len(open_landmarks(out_path))
+        print(f"{csv_path} -> {out_path} ({n} samples)")
+    if args.parquet:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        load_landmarks(args.data_dir).to_frame().to_parquet(args.parquet, index=False)
+        print(f"Wrote {args.parquet}")
+
+
+if __name__ == "__main__":
+    main()
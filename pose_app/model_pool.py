@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import glob
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+DEFAULT_WEIGHTS = "yolov8n-pose.pt"
+# Input size Ultralytics uses when predict is not given one, and the stride sizes are multiples of
+DEFAULT_IMGSZ = 640
+STRIDE = 32
+# Runtimes a pose model can be loaded into, picked from the weights path:
+# "x.pt" -> PyTorch, "x.onnx" -> ONNX Runtime, "x_openvino_model/" -> OpenVINO
+BACKENDS = ("torch", "onnx", "openvino")
+
+
+def backend_for(weights: str) -> str:
+    w = weights.rstrip("/\\")
+    if w.endswith(".onnx"):
+        return "onnx"
+    if w.endswith("_openvino_model") or w.endswith(".xml"):
+        return "openvino"
+    return "torch"
+
+
+def _openvino_xml(weights: str) -> str:
+    return weights if weights.endswith(".xml") else glob.glob(os.path.join(weights, "*.xml"))[0]
+
+
+def _onnx_input_dims(path: str) -> List[Optional[int]]:
+    try:
+        import onnx
+    except ImportError:
+        # onnx ships with the exporter but is not needed to serve; fall back to a session
+        import onnxruntime as ort
+
+        dims = ort.InferenceSession(path, providers=["CPUExecutionProvider"]).get_inputs()[0].shape
+        return [d if isinstance(d, int) and d > 0 else None for d in dims]
+    graph = onnx.load(path, load_external_data=False).graph
+    initializers = {t.name for t in graph.initializer}
+    # Older exports also list weights as graph inputs
+    first = next(i for i in graph.input if i.name not in initializers)
+    return [d.dim_value if d.HasField("dim_value") and d.dim_value > 0 else None
+            for d in first.type.tensor_type.shape.dim]
+
+
+def fixed_input_shape(weights: str) -> Tuple[Optional[int], Optional[Tuple[int, int]]]:
+    """(batch, (height, width)) an export was built for; None for each dynamic axis.
+
+    PyTorch weights are fully dynamic. Exports made with `export_model.py --static`
+    take exactly one frame of one size per call, so callers must not batch them or
+    ask for other input sizes. Reads only the model's input signature, without
+    building a runtime session.
+    """
+    backend = backend_for(weights)
+    try:
+        if backend == "onnx":
+            dims = _onnx_input_dims(weights)
+        elif backend == "openvino":
+            import openvino as ov
+
+            shape = ov.Core().read_model(_openvino_xml(weights)).inputs[0].get_partial_shape()
+            dims = [d.get_length() if d.is_static else None for d in shape]
+        else:
+            return None, None
+    except Exception as e:
+        # Loading the model reports the problem properly; assume dynamic here
+        print(f"Could not read the input shape of {weights}: {e}")
+        return None, None
+    batch, _, h, w = dims
+    return batch, ((h, w) if h is not None and w is not None else None)
+
+
+@dataclass
+class PoseDetections:
+    """All people found in one frame, as plain arrays (no torch tensors)."""
+    boxes: np.ndarray  # (N, 4) xyxy in pixel space
+    scores: np.ndarray  # (N,)
+    keypoints: np.ndarray  # (N, 17, 2) COCO keypoints in pixel space
+    keypoint_conf: np.ndarray  # (N, 17)
+
+    def __len__(self) -> int:
+        return int(self.scores.shape[0])
+
+    def shifted(self, dx: float, dy: float) -> "PoseDetections":
+        """Detections moved by (dx, dy), e.g. from crop back to full-frame coordinates."""
+        offset = np.array([dx, dy], dtype=np.float32)
+        # Ultralytics zeroes keypoints it could not place; keep them at zero
+        placed = np.any(self.keypoints != 0, axis=-1, keepdims=True)
+        return PoseDetections(
+            boxes=self.boxes + np.tile(offset, 2),
+            scores=self.scores,
+            keypoints=np.where(placed, self.keypoints + offset, self.keypoints),
+            keypoint_conf=self.keypoint_conf,
+        )
+
+    @classmethod
+    def empty(cls) -> "PoseDetections":
+        return cls(
+            boxes=np.zeros((0, 4), dtype=np.float32),
+            scores=np.zeros((0,), dtype=np.float32),
+            keypoints=np.zeros((0, 17, 2), dtype=np.float32),
+            keypoint_conf=np.zeros((0, 17), dtype=np.float32),
+        )
+
+
+def _to_detections(r) -> PoseDetections:
+    if r.keypoints is None or len(r.keypoints) == 0 or r.boxes is None or len(r.boxes) == 0:
+        return PoseDetections.empty()
+    kps_xy = r.keypoints.xy.cpu().numpy().astype(np.float32, copy=False)
+    kps_conf = (
+        r.keypoints.conf.cpu().numpy().astype(np.float32, copy=False)
+        if r.keypoints.conf is not None
+        else np.ones(kps_xy.shape[:2], dtype=np.float32)
+    )
+    return PoseDetections(
+        boxes=r.boxes.xyxy.cpu().numpy().astype(np.float32, copy=False),
+        scores=r.boxes.conf.cpu().numpy().astype(np.float32, copy=False),
+        keypoints=kps_xy,
+        keypoint_conf=kps_conf,
+    )
+
+
+class PoseModel:
+    """One loaded pose model, shared by every tracker in the process.
+
+    Ultralytics predictors keep mutable state, so calls are serialized with a
+    lock; sessions only hold a reference and keep their own detector state.
+
+    Exported ONNX and OpenVINO models (see export_model.py) go through the same
+    Ultralytics pre- and post-processing as the PyTorch weights, so results have
+    the same shape and meaning whatever the backend. `threads` > 0 sets the
+    runtime's intra-op thread count; 0 keeps its default.
+
+    Fixed-shape exports run every frame at their built-in size, and split
+    batches into calls of their fixed batch size.
+    """
+
+    def __init__(self, weights: str = DEFAULT_WEIGHTS, threads: int = 0) -> None:
+        self.weights = weights
+        self.backend = backend_for(weights)
+        self.threads = threads
+        self.fixed_batch, self.fixed_imgsz = fixed_input_shape(weights)
+        # Ultralytics (and torch) are imported on first load, so modules that only
+        # need PoseDetections stay light; the cost is recorded for /ready
+        t0 = time.perf_counter()
+        from ultralytics import YOLO
+
+        t1 = time.perf_counter()
+        # Exported models do not always record their task
+        self._model = YOLO(weights, task="pose")
+        t2 = time.perf_counter()
+        self.import_ms = (t1 - t0) * 1000.0
+        self.load_ms = (t2 - t1) * 1000.0
+        self.warmup_ms: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if threads > 0:
+            self._set_threads(threads)
+
+    def _set_threads(self, threads: int) -> None:
+        if self.backend == "torch":
+            import torch
+
+            torch.set_num_threads(threads)
+            return
+        # Ultralytics opens the runtime session in its first predict call; rebuild
+        # that session with the thread count
+        self._model.predict(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+        runtime = self._model.predictor.model
+        if self.backend == "onnx" and hasattr(runtime, "session"):
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = threads
+            runtime.session = ort.InferenceSession(
+                self.weights, sess_options=options, providers=runtime.session.get_providers()
+            )
+        elif self.backend == "openvino" and hasattr(runtime, "ov_compiled_model"):
+            import openvino as ov
+
+            core = ov.Core()
+            xml = _openvino_xml(self.weights)
+            runtime.ov_compiled_model = core.compile_model(
+                core.read_model(xml),
+                device_name="CPU",
+                config={"PERFORMANCE_HINT": "LATENCY", "INFERENCE_NUM_THREADS": threads},
+            )
+        else:
+            print(f"Cannot set the thread count of {self.weights}; using the runtime default")
+
+    def warmup(self, sizes: Sequence[Optional[int]] = (None,), frame_shape: Tuple[int, int] = (480, 640)) -> Dict[str, float]:
+        """Run a dummy frame at each input size so the first real frame is not the slow one.
+
+        The first call per size pays for runtime setup, kernel selection and
+        memory allocation. Returns (and records) milliseconds per size.
+        """
+        frame = np.zeros((*frame_shape, 3), dtype=np.uint8)
+        labels = {imgsz: str(imgsz or "default") for imgsz in sizes}
+        if self.fixed_imgsz is not None:
+            # Every size runs at the built-in one
+            labels = {None: "{}x{}".format(*self.fixed_imgsz)}
+        for imgsz, label in labels.items():
+            t0 = time.perf_counter()
+            self.predict([frame], imgsz=imgsz)
+            self.warmup_ms[label] = (time.perf_counter() - t0) * 1000.0
+        return dict(self.warmup_ms)
+
+    def predict(self, frames: Sequence[np.ndarray], imgsz: Optional[int] = None) -> List[PoseDetections]:
+        """Run inference on a list of BGR frames, one result per frame.
+
+        `imgsz` overrides the model's input size; fixed-shape exports ignore it.
+        """
+        if not frames:
+            return []
+        if self.fixed_imgsz is not None:
+            imgsz = list(self.fixed_imgsz)
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        frames = list(frames)
+        step = self.fixed_batch or len(frames)
+        results = []
+        with self._lock:
+            for i in range(0, len(frames), step):
+                results.extend(self._model.predict(frames[i:i + step], verbose=False, **kwargs))
+        return [_to_detections(r) for r in results]
+
+
+_POOL: Dict[str, PoseModel] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def get_model(weights: str = DEFAULT_WEIGHTS, threads: int = 0) -> PoseModel:
+    """Return the process-wide model for `weights`, loading it on first use.
+
+    `threads` only applies when this call is the one that loads the model.
+    """
+    model = _POOL.get(weights)
+    if model is not None:
+        return model
+    with _POOL_LOCK:
+        model = _POOL.get(weights)
+        if model is None:
+            model = PoseModel(weights, threads)
+            _POOL[weights] = model
+    return model
+
+
+def loaded_models() -> List[str]:
+    return list(_POOL.keys())
@@ -0,0 +1,170 @@
+"""Multi-person mode: one model call per frame, one detector per tracked athlete.
+
+The pose model already returns every person in the frame. `MultiPersonTracker`
+keeps all of them, matches them to the people seen on earlier frames by box
+overlap (greedy IoU), and gives each identity its own exercise detector and rep
+count. Landmark conversion and joint geometry run once over the stacked people,
+so a frame with N athletes costs one inference plus N cheap rule evaluations.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from .detectors import ExerciseFeedback, joint_tables, make_detector
+from .model_pool import PoseDetections
+from .pose_tracker import MAPPED_LANDMARKS, MediaPipePoseTracker, detections_to_landmarks
+from .timing import StageTimer, mark
+
+_MP_IDX = np.array(MAPPED_LANDMARKS, dtype=np.intp)
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of xyxy boxes (N, 4) x (M, 4) -> (N, M)."""
+    x0 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y0 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x1 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y1 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def match_boxes(tracks: np.ndarray, detections: np.ndarray, min_iou: float) -> Dict[int, int]:
+    """Greedy one-to-one matching {detection index: track index}, best overlap first."""
+    if len(tracks) == 0 or len(detections) == 0:
+        return {}
+    iou = box_iou(detections, tracks)
+    matches: Dict[int, int] = {}
+    for _ in range(min(iou.shape)):
+        d, t = np.unravel_index(int(np.argmax(iou)), iou.shape)
+        if iou[d, t] < min_iou:
+            break
+        matches[int(d)] = int(t)
+        iou[d, :] = -1.0
+        iou[:, t] = -1.0
+    return matches
+
+
+@dataclass(eq=False)
+class PersonTrack:
+    track_id: int
+    box: np.ndarray  # (4,) xyxy in pixel space
+    landmarks: np.ndarray  # (33, 4) float32, as in PoseResult
+    score: float
+    detector: object  # from detectors.make_detector
+    missed: int = 0
+    feedback: Optional[ExerciseFeedback] = None
+    last_phase: Optional[str] = None
+
+    @property
+    def area(self) -> float:
+        x0, y0, x1, y1 = self.box.tolist()
+        return max(0.0, x1 - x0) * max(0.0, y1 - y0)
+
+
+class MultiPersonTracker:
+    """Tracks everyone in the frame and runs a separate detector for each identity.
+
+    `tracker` supplies the (shared, possibly batched) model. ROI tracking and
+    frame skipping are single-person features: every frame runs on the full
+    image, even when the tracker has crop tracking switched on. A person
+    unseen for more than `max_missed` frames is forgotten, and a new detection
+    that overlaps no known person by `min_iou` starts a new identity (and rep
+    count). At most `max_people` of the most confident detections are kept.
+    """
+
+    def __init__(
+        self,
+        exercise: str,
+        tracker: MediaPipePoseTracker,
+        min_iou: float = 0.3,
+        max_missed: int = 15,
+        max_people: int = 8,
+        min_score: float = 0.4,
+    ) -> None:
+        self.exercise = exercise
+        self.tracker = tracker
+        self.min_iou = min_iou
+        self.max_missed = max_missed
+        self.max_people = max_people
+        self.min_score = min_score
+        self.tracks: List[PersonTrack] = []
+        self._next_id = 1
+
+    def update(self, det: PoseDetections) -> List[PersonTrack]:
+        """Associate one frame's detections with the known people; returns those seen this frame."""
+        keep = np.flatnonzero(det.scores >= self.min_score)
+        keep = keep[np.argsort(-det.scores[keep], kind="stable")][: self.max_people]
+        boxes = det.boxes[keep]
+        landmarks = detections_to_landmarks(det.keypoints[keep], det.keypoint_conf[keep])
+        known = np.stack([t.box for t in self.tracks]) if self.tracks else np.zeros((0, 4), np.float32)
+        matches = match_boxes(known, boxes, self.min_iou)
+
+        seen: List[PersonTrack] = []
+        for i in range(len(keep)):
+            if i in matches:
+                track = self.tracks[matches[i]]
+                track.box, track.landmarks, track.score, track.missed = boxes[i], landmarks[i], float(det.scores[keep[i]]), 0
+            else:
+                track = PersonTrack(
+                    track_id=self._next_id,
+                    box=boxes[i],
+                    landmarks=landmarks[i],
+                    score=float(det.scores[keep[i]]),
+                    detector=make_detector(self.exercise),
+                )
+                self._next_id += 1
+                self.tracks.append(track)
+            seen.append(track)
+
+        seen_ids = {id(t) for t in seen}
+        for track in self.tracks:
+            if id(track) not in seen_ids:
+                track.missed += 1
+        self.tracks = [t for t in self.tracks if t.missed <= self.max_missed]
+        return sorted(seen, key=lambda t: t.track_id)
+
+    def process_frame(
+        self, frame_bgr: np.ndarray, draw: bool = True, timer: Optional[StageTimer] = None
+    ) -> List[PersonTrack]:
+        """Detect, associate and run every visible person's detector; each track gets its `feedback`."""
+        det = self.tracker.detect(frame_bgr, full_frame=True)
+        mark(timer, "predict")
+        people = self.process_detections(det, timer)
+        if draw:
+            for person in people:
+                self._draw(frame_bgr, person)
+            mark(timer, "draw")
+        return people
+
+    def process_detections(self, det: PoseDetections, timer: Optional[StageTimer] = None) -> List[PersonTrack]:
+        """Associate one frame's detections and run the detector of everyone seen."""
+        people = self.update(det)
+        mark(timer, "associate")
+        if people:
+            tables = joint_tables(np.stack([p.landmarks for p in people]))
+            for person, table in zip(people, tables):
+                person.feedback = person.detector.infer_table(table)
+        mark(timer, "detector")
+        return people
+
+    @staticmethod
+    def _draw(frame_bgr: np.ndarray, person: PersonTrack) -> None:
+        for x, y, _, vis in person.landmarks[_MP_IDX].tolist():
+            if vis > 0:
+                cv2.circle(frame_bgr, (int(x), int(y)), 3, (0, 255, 0), -1)
+        x0, y0, x1, y1 = (int(v) for v in person.box.tolist())
+        cv2.rectangle(frame_bgr, (x0, y0), (x1, y1), (0, 255, 255), 2)
+        fb = person.feedback
+        label = f"#{person.track_id} {fb.name} {fb.reps}" if fb is not None else f"#{person.track_id}"
+        cv2.putText(frame_bgr, label, (x0, max(20, y0 - 8)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2, cv2.LINE_AA)
+
+    def primary(self, people: List[PersonTrack]) -> Optional[PersonTrack]:
+        """The largest (usually closest) person, reported as the session's main feedback."""
+        return max(people, key=lambda p: p.area) if people else None
@@ -1,74 +1,259 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from typing import List, Tuple, Optional
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
+
+from .batching import MicroBatcher
+from .filters import OneEuroFilter
+from .timing import StageTimer, mark
+from .model_pool import DEFAULT_IMGSZ, DEFAULT_WEIGHTS, STRIDE, PoseDetections, PoseModel, get_model
+
+
+# Map COCO keypoints to MediaPipe-like indices our detectors use
+COCO_TO_MP = {
+    5: 11,  # L_shoulder -> LEFT_SHOULDER
+    6: 12,  # R_shoulder -> RIGHT_SHOULDER
+    7: 13,  # L_elbow -> LEFT_ELBOW
+    8: 14,  # R_elbow -> RIGHT_ELBOW
+    9: 15,  # L_wrist -> LEFT_WRIST
+    10: 16, # R_wrist -> RIGHT_WRIST
+    11: 23, # L_hip -> LEFT_HIP
+    12: 24, # R_hip -> RIGHT_HIP
+    13: 25, # L_knee -> LEFT_KNEE
+    14: 26, # R_knee -> RIGHT_KNEE
+    15: 27, # L_ankle -> LEFT_ANKLE
+    16: 28, # R_ankle -> RIGHT_ANKLE
+}
+# The MediaPipe indices that are actually filled in
+MAPPED_LANDMARKS = tuple(COCO_TO_MP.values())
+NUM_LANDMARKS = 33
+_COCO_IDX = np.array(list(COCO_TO_MP.keys()), dtype=np.intp)
+_MP_IDX = np.array(MAPPED_LANDMARKS, dtype=np.intp)
 
 
 @dataclass
 class PoseResult:
-    image_bgr: np.ndarray
-    landmarks_px: List[Tuple[float, float, float, float]]  # x, y, z, visibility in pixel space (x,y)
-    landmarks_norm: List[Tuple[float, float, float, float]]  # normalized [0..1]
+    landmarks: np.ndarray  # (33, 4) float32: x, y in pixel space, z, visibility
+    width: int
+    height: int
+    _norm: Optional[np.ndarray] = field(default=None, init=False, repr=False)
+
+    @property
+    def landmarks_norm_array(self) -> np.ndarray:
+        """(33, 4) view with x, y normalized to [0..1], computed on first use."""
+        if self._norm is None:
+            self._norm = self.landmarks * np.array([1.0 / self.width, 1.0 / self.height, 1.0, 1.0], dtype=np.float32)
+        return self._norm
+
+    @property
+    def landmarks_px(self) -> List[Tuple[float, float, float, float]]:
+        # List-of-tuples view for older callers
+        return [tuple(lm) for lm in self.landmarks.tolist()]
+
+    @property
+    def landmarks_norm(self) -> List[Tuple[float, float, float, float]]:
+        return [tuple(lm) for lm in self.landmarks_norm_array.tolist()]
+
+
+def detections_to_landmarks(kps_xy: np.ndarray, kps_conf: np.ndarray) -> np.ndarray:
+    """Scatter COCO keypoints (..., 17, 2) and confidences (..., 17) into (..., 33, 4) MediaPipe slots."""
+    lm = np.zeros(kps_xy.shape[:-2] + (NUM_LANDMARKS, 4), dtype=np.float32)
+    lm[..., _MP_IDX, :2] = kps_xy[..., _COCO_IDX, :]
+    lm[..., _MP_IDX, 3] = kps_conf[..., _COCO_IDX]
+    return lm
 
 
 class MediaPipePoseTracker:
-    def __init__(self) -> None:
-        # Use YOLOv8n Pose model (downloads on first run)
-        self._model = YOLO("yolov8n-pose.pt")
-        # Map COCO keypoints to MediaPipe-like indices our detectors use
-        self._coco_to_mp = {
-            5: 11,  # L_shoulder -> LEFT_SHOULDER
-            6: 12,  # R_shoulder -> RIGHT_SHOULDER
-            7: 13,  # L_elbow -> LEFT_ELBOW
-            8: 14,  # R_elbow -> RIGHT_ELBOW
-            9: 15,  # L_wrist -> LEFT_WRIST
-            10: 16, # R_wrist -> RIGHT_WRIST
-            11: 23, # L_hip -> LEFT_HIP
-            12: 24, # R_hip -> RIGHT_HIP
-            13: 25, # L_knee -> LEFT_KNEE
-            14: 26, # R_knee -> RIGHT_KNEE
-            15: 27, # L_ankle -> LEFT_ANKLE
-            16: 28, # R_ankle -> RIGHT_ANKLE
+    def __init__(
+        self,
+        weights: str = DEFAULT_WEIGHTS,
+        model: Optional[PoseModel] = None,
+        scheduler: Optional[MicroBatcher] = None,
+        tracking: bool = False,
+        roi_margin: float = 0.3,
+        min_track_conf: float = 0.5,
+        detect_every: int = 1,
+        motion_threshold: Optional[float] = None,
+        smoothing: bool = False,
+        threads: int = 0,
+    ) -> None:
+        # With a scheduler, frames are batched with other sessions' frames instead of
+        # calling the model directly
+        self._scheduler = scheduler
+        # YOLOv8n Pose model (downloads on first run), loaded once per process and shared
+        self._model = model if model is not None or scheduler is not None else get_model(weights, threads)
+        self._coco_to_mp = COCO_TO_MP
+        # Model input size for this session's frames; None uses the model default
+        self.imgsz: Optional[int] = None
+        # ROI tracking: run on a crop around the previous box, and on the full
+        # frame only when the crop loses the person
+        self.tracking = tracking
+        self.roi_margin = roi_margin
+        self.min_track_conf = min_track_conf
+        self._last_box: Optional[np.ndarray] = None
+        self.roi_attempts = 0
+        self.roi_hits = 0
+        self.full_frame_runs = 0
+        self.roi_imgsz_total = 0
+        # Frame skipping: run the model on every `detect_every`-th frame (sooner when
+        # joints move faster than `motion_threshold` frame heights per second) and
+        # extrapolate the One-Euro filtered keypoints in between
+        self.detect_every = max(1, detect_every)
+        self.motion_threshold = motion_threshold
+        self.smoothing = smoothing
+        self._filter = OneEuroFilter(min_cutoff=1.0, beta=0.05)
+        self._last_landmarks: Optional[np.ndarray] = None
+        self._frames_since_detect = 0
+        self.frames_detected = 0
+        self.frames_skipped = 0
+
+    def _infer(self, frame_bgr: np.ndarray, imgsz: Optional[int] = None) -> PoseDetections:
+        imgsz = imgsz or self.imgsz
+        if self._scheduler is not None:
+            return self._scheduler((frame_bgr, imgsz))
+        return self._model.predict([frame_bgr], imgsz=imgsz)[0]
+
+    def _roi_imgsz(self, crop_w: int, crop_h: int) -> int:
+        """Input size for a crop: its longer side rounded up to the stride, at most the
+        full-frame size. Letterboxing a crop up to 640 would cost as much as the frame."""
+        full = self.imgsz or DEFAULT_IMGSZ
+        return min(full, max(STRIDE, -(-max(crop_w, crop_h) // STRIDE) * STRIDE))
+
+    def _roi(self, w: int, h: int) -> Tuple[int, int, int, int]:
+        x0, y0, x1, y1 = self._last_box
+        mx, my = (x1 - x0) * self.roi_margin, (y1 - y0) * self.roi_margin
+        return (
+            max(0, int(x0 - mx)),
+            max(0, int(y0 - my)),
+            min(w, int(np.ceil(x1 + mx))),
+            min(h, int(np.ceil(y1 + my))),
+        )
+
+    def _roi_ok(self, det: PoseDetections, roi: Tuple[int, int, int, int], w: int, h: int) -> bool:
+        """The crop kept the person: confident detection not cut off by an inner crop edge."""
+        if len(det) == 0:
+            return False
+        best = int(np.argmax(det.scores))
+        if det.scores[best] < self.min_track_conf:
+            return False
+        x0, y0, x1, y1 = roi
+        bx0, by0, bx1, by1 = det.boxes[best]
+        edge = 2.0
+        return not (
+            (x0 > 0 and bx0 <= edge)
+            or (y0 > 0 and by0 <= edge)
+            or (x1 < w and bx1 >= (x1 - x0) - edge)
+            or (y1 < h and by1 >= (y1 - y0) - edge)
+        )
+
+    def detect(self, frame_bgr: np.ndarray, full_frame: bool = False) -> PoseDetections:
+        """Run the model, on the tracked region when possible.
+
+        `full_frame` skips the crop, for callers that need everyone in view.
+        """
+        h, w = frame_bgr.shape[:2]
+        if self.tracking and self._last_box is not None and not full_frame:
+            roi = self._roi(w, h)
+            x0, y0, x1, y1 = roi
+            imgsz = self._roi_imgsz(x1 - x0, y1 - y0)
+            self.roi_attempts += 1
+            self.roi_imgsz_total += imgsz
+            det = self._infer(frame_bgr[y0:y1, x0:x1], imgsz)
+            if self._roi_ok(det, roi, w, h):
+                self.roi_hits += 1
+                return det.shifted(x0, y0)
+        self.full_frame_runs += 1
+        return self._infer(frame_bgr)
+
+    def tracking_stats(self) -> dict:
+        attempts = self.roi_attempts
+        return {
+            "roi_attempts": attempts,
+            "roi_hits": self.roi_hits,
+            "full_frame_runs": self.full_frame_runs,
+            "hit_rate": self.roi_hits / attempts if attempts else 0.0,
+            "fallback_rate": (attempts - self.roi_hits) / attempts if attempts else 0.0,
+            "full_frame_imgsz": self.imgsz or DEFAULT_IMGSZ,
+            "roi_imgsz_mean": self.roi_imgsz_total / attempts if attempts else 0.0,
         }
 
-    def process_frame(self, frame_bgr: np.ndarray, draw: bool = True) -> Optional[PoseResult]:
+    def force_detect(self) -> None:
+        """Run the model on the next frame even if frame skipping would extrapolate it."""
+        self._frames_since_detect = self.detect_every
+
+    @property
+    def _temporal(self) -> bool:
+        return self.smoothing or self.detect_every > 1 or self.motion_threshold is not None
+
+    def _should_detect(self, height: int) -> bool:
+        if not self._temporal or self._last_landmarks is None:
+            return True
+        if self._frames_since_detect + 1 >= self.detect_every:
+            return True
+        if self.motion_threshold is not None and self._filter.velocity is not None:
+            speed = float(np.abs(self._filter.velocity).max()) / max(height, 1)
+            return speed > self.motion_threshold
+        return False
+
+    def process_frame(
+        self,
+        frame_bgr: np.ndarray,
+        draw: bool = True,
+        timestamp: Optional[float] = None,
+        timer: Optional[StageTimer] = None,
+    ) -> Optional[PoseResult]:
         h, w = frame_bgr.shape[:2]
-        # Inference
-        results = self._model.predict(frame_bgr, verbose=False)
-        if not results:
-            return None
-        r = results[0]
-        if r.keypoints is None or len(r.keypoints) == 0 or r.boxes is None or len(r.boxes) == 0:
-            return None
-        # Pick the highest confidence person
-        best_idx = int(np.argmax(r.boxes.conf.cpu().numpy()))
-        kps_xy = r.keypoints.xy[best_idx].cpu().numpy()  # (17, 2)
-        kps_conf = (
-            r.keypoints.conf[best_idx].cpu().numpy()
-            if r.keypoints.conf is not None
-            else np.ones((kps_xy.shape[0],), dtype=np.float32)
-        )
+        t = time.perf_counter() if timestamp is None else timestamp
 
-        # Initialize 33 MP-style entries
-        landmarks_px: List[Tuple[float, float, float, float]] = [(0.0, 0.0, 0.0, 0.0)] * 33
-        landmarks_norm: List[Tuple[float, float, float, float]] = [(0.0, 0.0, 0.0, 0.0)] * 33
+        if self._should_detect(h):
+            # Inference
+            det = self.detect(frame_bgr)
+            mark(timer, "predict")
+            landmarks = self._select(det)
+            self.frames_detected += 1
+            self._frames_since_detect = 0
+            if landmarks is None:
+                self._last_landmarks = None
+                self._filter.reset()
+                return None
+            if self._temporal:
+                filtered = self._filter(landmarks[_MP_IDX, :2], t)
+                if self.smoothing:
+                    landmarks[_MP_IDX, :2] = filtered
+                self._last_landmarks = landmarks
+            mark(timer, "landmarks")
+        else:
+            # Skipped frame: constant-velocity extrapolation of the filtered joints
+            self.frames_skipped += 1
+            self._frames_since_detect += 1
+            landmarks = self._last_landmarks.copy()
+            landmarks[_MP_IDX, :2] = self._filter.predict(t)
+            mark(timer, "extrapolate")
+        result = self._to_result(frame_bgr, landmarks, draw)
+        if draw:
+            mark(timer, "draw")
+        return result
 
-        for coco_idx, mp_idx in self._coco_to_mp.items():
-            x, y = kps_xy[coco_idx]
-            v = float(kps_conf[coco_idx])
-            landmarks_px[mp_idx] = (float(x), float(y), 0.0, v)
-            landmarks_norm[mp_idx] = (float(x) / w, float(y) / h, 0.0, v)
+    def _select(self, det: PoseDetections) -> Optional[np.ndarray]:
+        if len(det) == 0:
+            self._last_box = None
+            return None
+        # Pick the highest confidence person
+        best_idx = int(np.argmax(det.scores))
+        self._last_box = det.boxes[best_idx]
+        return detections_to_landmarks(det.keypoints[best_idx], det.keypoint_conf[best_idx])
 
+    def _to_result(self, frame_bgr: np.ndarray, landmarks: np.ndarray, draw: bool) -> PoseResult:
+        h, w = frame_bgr.shape[:2]
         if draw:
-            for _, mp_idx in self._coco_to_mp.items():
-                x, y, _, vis = landmarks_px[mp_idx]
+            for x, y, _, vis in landmarks[_MP_IDX].tolist():
                 if vis > 0:
                     cv2.circle(frame_bgr, (int(x), int(y)), 3, (0, 255, 0), -1)
-        return PoseResult(image_bgr=frame_bgr, landmarks_px=landmarks_px, landmarks_norm=landmarks_norm)
+        return PoseResult(landmarks=landmarks, width=w, height=h)
 
     def close(self) -> None:
         pass
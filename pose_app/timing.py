@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import time
+from typing import Dict, Optional
+
+
+class StageTimer:
+    """Wall time per named pipeline stage for one frame, in milliseconds.
+
+    Each `mark(stage)` charges the time since the previous mark (or creation)
+    to `stage`, so instrumenting a stage costs one perf_counter call.
+    """
+
+    __slots__ = ("stages", "_start", "_last")
+
+    def __init__(self, start: Optional[float] = None) -> None:
+        self.stages: Dict[str, float] = {}
+        self._start = time.perf_counter() if start is None else start
+        self._last = self._start
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last) * 1000.0
+        self._last = now
+
+    def skip(self) -> None:
+        """Exclude the time since the last mark from every stage."""
+        self._last = time.perf_counter()
+
+    @property
+    def total_ms(self) -> float:
+        return (self._last - self._start) * 1000.0
+
+
+def mark(timer: Optional[StageTimer], stage: str) -> None:
+    if timer is not None:
+        timer.mark(stage)
@@ -1,35 +1,53 @@
 from __future__ import annotations
 
-import glob
+import argparse
 import os
-from typing import List
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import classification_report
 import joblib
 
+# Add project root to path for absolute imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pose_app.features import FEATURE_VERSION, cached_features, extract_features
+from pose_app.landmark_store import iter_chunks, iter_legacy_csv, load_landmarks, unconverted_csvs
+
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "baseline_model.joblib")
 
 
 def load_dataset(data_dir: str = DATA_DIR) -> pd.DataFrame:
-    files = glob.glob(os.path.join(data_dir, "*.csv"))
-    if not files:
-        raise SystemExit("No dataset CSV files found. Use the app to collect samples.")
-    frames = [pd.read_csv(f) for f in files]
+    """One wide row per sample from the binary logs plus any not yet converted CSV logs."""
+    frames = []
+    samples = load_landmarks(data_dir)
+    if len(samples):
+        frames.append(samples.to_frame())
+    for path in unconverted_csvs(data_dir):
+        frames.extend(iter_legacy_csv(path))
+    if not frames:
+        raise SystemExit("No dataset files found. Use the app to collect samples.")
     df = pd.concat(frames, ignore_index=True)
     return df
 
 
-def train() -> None:
-    df = load_dataset()
+def train(
+    data_dir: str = DATA_DIR, model_path: str = MODEL_PATH, target: str = "exercise", cache_dir: Optional[str] = None
+) -> None:
+    # Pose features (pose_app.features), cached per source file between runs
+    X, exercises, labels = cached_features(data_dir, cache_dir)
+    if len(X) == 0:
+        raise SystemExit("No dataset files found. Use the app to collect samples.")
     # label could be phase or exercise
-    y = df["exercise"].astype(str)
-    X = df.drop(columns=["exercise", "label"])  # use all landmarks as features
+    y = exercises if target == "exercise" else labels
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -41,9 +59,200 @@ def train() -> None:
 
     y_pred = pipe.predict(X_test)
     print(classification_report(y_test, y_pred))
-    joblib.dump(pipe, MODEL_PATH)
-    print(f"Saved baseline model to {MODEL_PATH}")
+    _tag(pipe, target)
+    joblib.dump(pipe, model_path)
+    print(f"Saved baseline model to {model_path}")
+
+
+def _split(keys: np.ndarray, holdout: float) -> np.ndarray:
+    """Hold-out mask from stable sample keys, so a sample stays on its side across
+    passes, chunk sizes, resumed runs and a growing dataset."""
+    # splitmix64 finalizer: spreads file/index keys uniformly over 64 bits
+    z = keys.astype(np.uint64)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(32)) < np.uint64(holdout * (1 << 32))
+
+
+def _stream(
+    data_dir: str, target: str, chunk_size: int, holdout: float, want_holdout: bool,
+    rng: Optional[np.random.Generator] = None, skip: int = 0,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(features, targets) chunks of either the training or the hold-out stream, shuffled within a chunk with `rng`.
+
+    The first `skip` chunks are passed over without touching `rng`, so a resumed
+    epoch continues with the same shuffles as an uninterrupted one.
+    """
+    n = 0
+    for lms, exercises, labels, keys in iter_chunks(data_dir, chunk_size):
+        mask = _split(keys, holdout)
+        if not want_holdout:
+            mask = ~mask
+        if mask.any():
+            n += 1
+            if n <= skip:
+                continue
+            y = exercises if target == "exercise" else labels
+            X, y = extract_features(lms[mask]), y[mask].astype(str)
+            if rng is not None:
+                order = rng.permutation(len(y))
+                X, y = X[order], y[order]
+            yield X, y
+
+
+def _classes(data_dir: str, target: str, chunk_size: int) -> np.ndarray:
+    seen = set()
+    for _, exercises, labels, _ in iter_chunks(data_dir, chunk_size):
+        seen.update((exercises if target == "exercise" else labels).astype(str).tolist())
+    return np.array(sorted(seen))
+
+
+def _evaluate(pipe: Pipeline, data_dir: str, target: str, chunk_size: int, holdout: float) -> Tuple[float, np.ndarray]:
+    """Hold-out accuracy and confusion matrix, accumulated chunk by chunk."""
+    classes = pipe.classes_
+    confusion = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    for X, y in _stream(data_dir, target, chunk_size, holdout, want_holdout=True):
+        pred = pipe.predict(X)
+        np.add.at(confusion, (np.searchsorted(classes, y), np.searchsorted(classes, pred)), 1)
+    total = confusion.sum()
+    return (float(np.trace(confusion) / total) if total else float("nan")), confusion
+
+
+def _tag(pipe: Pipeline, target: str) -> None:
+    # Read back by pose_app.classifier when the backend serves the model
+    pipe.pose_target = target
+    pipe.feature_version = FEATURE_VERSION
+
+
+def _save(obj: object, path: str) -> None:
+    tmp = path + ".tmp"
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
+
+
+def _load_checkpoint(path: str, classes: np.ndarray, target: str, chunk_size: int, holdout: float) -> dict:
+    """Read a `<model>.ckpt` and check it can continue on the current dataset and settings."""
+    state = joblib.load(path)
+    if not isinstance(state, dict) or "pipeline" not in state:
+        raise SystemExit(f"{path} is not a training checkpoint; pass the <model>.ckpt written during training.")
+    if state["target"] != target:
+        raise SystemExit(f"{path} was trained on --target {state['target']}, not {target}.")
+    if (state["chunk_size"], state["holdout"]) != (chunk_size, holdout):
+        raise SystemExit(
+            f"{path} was written with --chunk-size {state['chunk_size']} --holdout {state['holdout']}; "
+            "resume with the same values so the chunk position still lines up."
+        )
+    saved = np.asarray(state["classes"])
+    if not np.array_equal(saved, classes):
+        added = sorted(set(classes.tolist()) - set(saved.tolist()))
+        missing = sorted(set(saved.tolist()) - set(classes.tolist()))
+        raise SystemExit(
+            f"Cannot resume {path}: the dataset's {target} classes changed "
+            f"(new: {added or 'none'}, gone: {missing or 'none'}). Train from scratch instead."
+        )
+    return state
+
+
+def train_streaming(
+    data_dir: str = DATA_DIR,
+    model_path: str = MODEL_PATH,
+    target: str = "exercise",
+    chunk_size: int = 50_000,
+    epochs: int = 5,
+    holdout: float = 0.2,
+    checkpoint_every: int = 20,
+    resume: Optional[str] = None,
+) -> Pipeline:
+    """Fit StandardScaler + SGD logistic regression one chunk at a time.
+
+    Peak memory is a few copies of one chunk, whatever the dataset size. A
+    deterministic share of samples (`holdout`) is never trained on and scores
+    each epoch. The pipeline and the position in training (epoch, chunk,
+    shuffle state) are checkpointed to `<model>.ckpt` every `checkpoint_every`
+    chunks and after each epoch; `resume` continues from exactly that point.
+    """
+    classes = _classes(data_dir, target, chunk_size)
+    if len(classes) == 0:
+        raise SystemExit("No dataset files found. Use the app to collect samples.")
+    if len(classes) < 2:
+        raise SystemExit(f"Need at least two {target} classes to train, found {classes.tolist()}.")
+    ckpt_path = model_path + ".ckpt"
+
+    rng = np.random.default_rng(42)
+    start_epoch, start_chunk = 1, 0
+    if resume:
+        state = _load_checkpoint(resume, classes, target, chunk_size, holdout)
+        pipe: Pipeline = state["pipeline"]
+        scaler, clf = pipe.named_steps["scaler"], pipe.named_steps["clf"]
+        rng.bit_generator.state = state["rng_state"]
+        start_epoch, start_chunk = state["epoch"], state["chunk"]
+        print(f"Resuming at epoch {start_epoch}, after chunk {start_chunk}")
+    else:
+        scaler = StandardScaler()
+        clf = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
+        pipe = Pipeline([("scaler", scaler), ("clf", clf)])
+        _tag(pipe, target)
+        # Scaling statistics from one streaming pass, so every epoch sees the same features
+        for X, _ in _stream(data_dir, target, chunk_size, holdout, want_holdout=False):
+            scaler.partial_fit(X)
+
+    def checkpoint(epoch: int, chunk: int) -> None:
+        _save({
+            "pipeline": pipe, "epoch": epoch, "chunk": chunk, "rng_state": rng.bit_generator.state,
+            "classes": classes, "target": target, "chunk_size": chunk_size, "holdout": holdout,
+        }, ckpt_path)
+
+    for epoch in range(start_epoch, epochs + 1):
+        t0 = time.perf_counter()
+        seen = 0
+        skip = start_chunk if epoch == start_epoch else 0
+        stream = _stream(data_dir, target, chunk_size, holdout, want_holdout=False, rng=rng, skip=skip)
+        for i, (X, y) in enumerate(stream, skip + 1):
+            clf.partial_fit(scaler.transform(X), y, classes=classes)
+            seen += len(y)
+            if checkpoint_every and i % checkpoint_every == 0:
+                checkpoint(epoch, i)
+        checkpoint(epoch + 1, 0)
+        acc, _ = _evaluate(pipe, data_dir, target, chunk_size, holdout)
+        print(f"epoch {epoch}: {seen} samples in {time.perf_counter() - t0:.1f}s, hold-out accuracy {acc:.3f}")
+
+    acc, confusion = _evaluate(pipe, data_dir, target, chunk_size, holdout)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        recall = np.diag(confusion) / confusion.sum(axis=1)
+        precision = np.diag(confusion) / confusion.sum(axis=0)
+    print(f"{'class':>20} {'precision':>9} {'recall':>9} {'support':>9}")
+    for c, p, r, n in zip(pipe.classes_, precision, recall, confusion.sum(axis=1)):
+        print(f"{c:>20} {p:9.3f} {r:9.3f} {n:9d}")
+    print(f"hold-out accuracy {acc:.3f}")
+    _save(pipe, model_path)
+    print(f"Saved streaming model to {model_path}")
+    return pipe
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train the baseline landmark classifier.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--streaming", action="store_true",
+                        help="Out-of-core training with SGD; memory bounded by --chunk-size")
+    parser.add_argument("--target", choices=["exercise", "label"], default="exercise")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Samples per chunk in streaming mode")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--checkpoint-every", type=int, default=20, help="Chunks between checkpoints")
+    parser.add_argument("--resume", help="Checkpoint to continue training from")
+    parser.add_argument("--cache-dir", help="Feature cache (default: <data-dir>/.feature_cache)")
+    args = parser.parse_args(argv)
+
+    if args.streaming:
+        train_streaming(
+            args.data_dir, args.model, args.target, args.chunk_size,
+            args.epochs, args.holdout, args.checkpoint_every, args.resume,
+        )
+    else:
+        train(args.data_dir, args.model, args.target, args.cache_dir)
 
 
 if __name__ == "__main__":
-    train()
+    main()
@@ -40,6 +40,7 @@ def test_pose_app():
     
     modules = [
         'pose_app.pose_tracker',
+        'pose_app.model_pool',
         'pose_app.detectors',
         'pose_app.geometry',
         'pose_app.dataset',
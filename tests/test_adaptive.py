@@ -0,0 +1,59 @@
+"""The adaptive controller steps down under load and recovers only after a calm stretch."""
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.adaptive import LEVELS, AdaptiveController  # noqa: E402
+
+
+def _feed(controller: AdaptiveController, frames: int, latency_ms: float, load: float = 0.2):
+    changes = []
+    for i in range(frames):
+        level = controller.observe(latency_ms, load)
+        if level is not None:
+            changes.append((i, controller.index))
+    return changes
+
+
+def test_steps_down_once_per_cooldown_to_the_lowest_level():
+    controller = AdaptiveController(target_ms=200, cooldown=10)
+    changes = _feed(controller, 100, latency_ms=500)
+    assert [index for _, index in changes] == [1, 2, 3]
+    assert [b - a for (a, _), (b, _) in zip(changes, changes[1:])] == [10, 10]
+    assert controller.level == LEVELS[-1]
+
+
+def test_oversubscribed_workers_step_down_at_low_latency():
+    controller = AdaptiveController(target_ms=200, cooldown=10)
+    assert _feed(controller, 10, latency_ms=50, load=1.5) == [(9, 1)]
+
+
+def test_recovers_one_level_per_calm_stretch():
+    # alpha=1 makes the EMA the last latency, so the stretch lengths are exact
+    controller = AdaptiveController(target_ms=200, cooldown=1, recover_after=50, alpha=1.0)
+    _feed(controller, 2, latency_ms=500)
+    assert controller.index == 2
+    changes = _feed(controller, 120, latency_ms=50)
+    assert changes == [(49, 1), (99, 0)]
+    assert controller.message() == {"type": "control", "level": 0, **LEVELS[0].__dict__}
+
+
+def test_a_busy_frame_restarts_the_calm_stretch():
+    controller = AdaptiveController(target_ms=200, cooldown=1, recover_after=50, alpha=1.0)
+    _feed(controller, 1, latency_ms=500)
+    assert controller.index == 1
+    _feed(controller, 40, latency_ms=50)
+    # Inside the target but without headroom: no step either way
+    _feed(controller, 1, latency_ms=150)
+    assert _feed(controller, 49, latency_ms=50) == []
+    assert _feed(controller, 1, latency_ms=50) == [(0, 0)]
+
+
+def test_in_between_latency_holds_the_level():
+    controller = AdaptiveController(target_ms=200, cooldown=1, recover_after=5)
+    _feed(controller, 1, latency_ms=500)
+    assert _feed(controller, 200, latency_ms=150) == []
+    assert controller.index == 1
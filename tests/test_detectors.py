@@ -0,0 +1,166 @@
+"""Rule-based detectors must count and cue exactly like the original per-frame code."""
+from __future__ import annotations
+
+import math
+import os
+import sys
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pose_app.detectors import (  # noqa: E402
+    EXERCISE_MAP,
+    Above,
+    AllOf,
+    AnyOf,
+    Below,
+    RepCounter,
+    infer_all,
+    joint_table,
+    joint_tables,
+)
+
+# The hand-written detectors the rules replaced, one frame at a time in plain math
+
+Lms = List[Tuple[float, float, float, float]]
+
+
+def _angle(lms: Lms, a: int, b: int, c: int) -> float:
+    ab = (lms[a][0] - lms[b][0], lms[a][1] - lms[b][1])
+    cb = (lms[c][0] - lms[b][0], lms[c][1] - lms[b][1])
+    ab_len, cb_len = math.hypot(*ab), math.hypot(*cb)
+    if ab_len == 0 or cb_len == 0:
+        return 0.0
+    dot = (ab[0] * cb[0] + ab[1] * cb[1]) / (ab_len * cb_len)
+    return math.degrees(math.acos(max(-1.0, min(1.0, dot))))
+
+
+def _mid(lms: Lms, a: int, b: int) -> Tuple[float, float]:
+    return (lms[a][0] + lms[b][0]) / 2.0, (lms[a][1] + lms[b][1]) / 2.0
+
+
+def _knees(lms: Lms) -> Tuple[float, float]:
+    return _angle(lms, 23, 25, 27), _angle(lms, 24, 26, 28)
+
+
+def _elbows(lms: Lms) -> Tuple[float, float]:
+    return _angle(lms, 11, 13, 15), _angle(lms, 12, 14, 16)
+
+
+def _old_squat(lms: Lms):
+    knee = sum(_knees(lms)) / 2.0
+    hip, ankle, shoulder = _mid(lms, 23, 24), _mid(lms, 27, 28), _mid(lms, 11, 12)
+    depth = math.dist(hip, ankle) / max(math.dist(shoulder, ankle), 1e-6)
+    cues = [c for ok, c in ((knee < 70, "Knees too closed; avoid collapsing"),
+                            (knee > 170, "Start bending knees to go down")) if ok]
+    return knee < 100 or depth < 0.45, knee > 160 and depth > 0.6, cues
+
+
+def _old_elbow_rule(down: float, up: float, cue_hi: Tuple[float, str], cue_lo: Tuple[float, str]):
+    def rule(lms: Lms):
+        elbow = sum(_elbows(lms)) / 2.0
+        cues = [c for ok, c in ((elbow > cue_hi[0], cue_hi[1]), (elbow < cue_lo[0], cue_lo[1])) if ok]
+        return elbow < down, elbow > up, cues
+    return rule
+
+
+def _old_knee_min_rule(down: float, cue: str):
+    def rule(lms: Lms):
+        knee = min(_knees(lms))
+        return knee < down, knee > 165, [cue] if knee > 170 else []
+    return rule
+
+
+# Display name -> (old rule, rep cue label)
+OLD: Dict[str, Tuple[Callable[[Lms], tuple], str]] = {
+    "Squat": (_old_squat, "Squat"),
+    "Pushup": (_old_elbow_rule(95, 165, (170, "Lower down"), (80, "Keep elbows tucked")), "Pushup"),
+    "Lunge": (_old_knee_min_rule(100, "Step forward and lower knee"), "Lunge"),
+    "Side Lunge": (_old_knee_min_rule(110, "Shift hips to one side and bend the knee"), "Side lunge"),
+    "Hammer Curl": (_old_elbow_rule(70, 155, (160, "Curl up"), (60, "Lower slowly; control the descent")),
+                    "Hammer curl"),
+    "Chair Dip": (_old_elbow_rule(95, 165, (160, "Lower body by bending elbows"),
+                                  (80, "Push through palms to rise")), "Chair dip"),
+}
+
+
+def _sequence(n: int = 2000, seed: int = 0) -> np.ndarray:
+    """Landmarks whose joints sweep through full bends, with jitter, so every rule counts reps."""
+    rng = np.random.default_rng(seed)
+    lms = rng.uniform(0.2, 0.8, size=(n, 33, 4)).astype(np.float32)
+    t = np.arange(n, dtype=np.float32)
+    # Arms hang from the shoulders, legs from the hips; each joint bends out of step with the others
+    chains = ((11, 13, 15, 0.1, 1.0), (12, 14, 16, 0.1, 1.3), (23, 25, 27, 0.3, 0.0), (24, 26, 28, 0.3, 0.3))
+    for upper, joint, lower, top, phase in chains:
+        # Slow enough that thresholds are crossed in steps of a degree or two
+        bend = (np.sin(t / 40.0 + phase) + 1) / 2  # 0 = straight, 1 = fully bent
+        lms[:, upper, 0], lms[:, upper, 1] = 0.5, top
+        lms[:, joint, 0], lms[:, joint, 1] = 0.5, top + 0.2
+        # The lower point swings from straight below (~175 deg) to beside the upper one (~6 deg)
+        theta = np.pi * (1 - bend) * 0.95 + 0.1
+        lms[:, lower, 0] = 0.5 + 0.2 * np.sin(theta)
+        lms[:, lower, 1] = top + 0.2 - 0.2 * np.cos(theta)
+    # Lean the torso on its own rhythm so the squat's depth ratio crosses its thresholds apart from the knees
+    lean = 0.2 * np.sin(t / 53.0) - 0.05
+    lms[:, (11, 13, 15, 12, 14, 16), 1] += lean[:, None]
+    lms += rng.normal(0, 0.002, size=lms.shape).astype(np.float32)
+    return lms
+
+
+@pytest.mark.parametrize("exercise", list(EXERCISE_MAP))
+def test_rule_detector_matches_original(exercise):
+    lms = _sequence()
+    rule, label = OLD[exercise]
+    detector, counter = EXERCISE_MAP[exercise](), RepCounter()
+    for frame in lms:
+        legacy = [tuple(p) for p in frame.astype(np.float64).tolist()]
+        down, up, cues = rule(legacy)
+        rep = counter.update(down, up)
+        if rep is not None:
+            cues.append(f"{label} rep {rep}")
+        fb = detector.infer(frame)
+        assert (fb.reps, fb.phase, fb.cues) == (counter.reps, counter.state, cues)
+    assert counter.reps > 3
+
+
+def test_legacy_tuples_and_batches_give_the_same_table():
+    lms = _sequence(20)
+    tables = joint_tables(lms)
+    for frame, batched in zip(lms, tables):
+        table = joint_table(frame)
+        assert joint_table([tuple(p) for p in frame.tolist()]) == table
+        assert batched.keys() == table.keys()
+        assert np.allclose(list(batched.values()), list(table.values()))
+
+
+def test_infer_all_matches_detectors_run_one_by_one():
+    lms = _sequence(200, seed=1)
+    together = [cls() for cls in EXERCISE_MAP.values()]
+    apart = [cls() for cls in EXERCISE_MAP.values()]
+    for frame in lms:
+        assert infer_all(together, frame) == [d.infer(frame) for d in apart]
+
+
+def test_comparisons_are_strict():
+    table = {"knee_mean": 100.0}
+    assert not Below("knee_mean", 100)(table)
+    assert not Above("knee_mean", 100)(table)
+    assert Below("knee_mean", 100.5)(table)
+    assert Above("knee_mean", 99.5)(table)
+
+
+def test_combinators():
+    table = {"a": 1.0, "b": 5.0}
+    low_a, high_b = Below("a", 2), Above("b", 4)
+    assert AllOf((low_a, high_b))(table)
+    assert not AllOf((low_a, Above("b", 6)))(table)
+    assert AnyOf((Above("a", 2), high_b))(table)
+    assert not AnyOf((Above("a", 2), Below("b", 4)))(table)
+    # Nested, as the squat rule uses them
+    assert AllOf((AnyOf((Above("a", 2), low_a)), high_b))(table)
+    # Empty groups follow all()/any()
+    assert AllOf(())(table)
+    assert not AnyOf(())(table)
@@ -0,0 +1,30 @@
+"""Writers sharing one landmark file must agree on its code tables."""
+from __future__ import annotations
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pose_app.landmark_store import LandmarkFile, open_landmarks  # noqa: E402
+
+
+def _sample(value: float) -> np.ndarray:
+    return np.full((1, 33, 4), value, dtype=np.float32)
+
+
+def test_two_writers_keep_labels_apart(tmp_path):
+    path = str(tmp_path / "Squat.lmk")
+    # Both open before either writes, like the Streamlit app and a backend worker
+    a, b = LandmarkFile(path), LandmarkFile(path)
+    a.append(_sample(1), ["Squat"], ["down"])
+    b.append(_sample(2), ["Squat"], ["up"])
+    a.append(_sample(3), ["Squat"], ["hold"])
+    b.append(_sample(4), ["Squat"], ["down"])
+
+    data = open_landmarks(path)
+    assert data.label_names().tolist() == ["down", "up", "hold", "down"]
+    assert data.landmarks[:, 0, 0].tolist() == [1, 2, 3, 4]
+    assert data.exercise_names().tolist() == ["Squat"] * 4
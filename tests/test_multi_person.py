@@ -0,0 +1,69 @@
+"""Multi-person mode must see the whole frame even when the tracker crops."""
+from __future__ import annotations
+
+import os
+import sys
+from typing import List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pose_app.model_pool import PoseDetections  # noqa: E402
+from pose_app.multi_person import MultiPersonTracker  # noqa: E402
+from pose_app.pose_tracker import MediaPipePoseTracker  # noqa: E402
+
+FRAME_SHAPE = (480, 640, 3)
+# Three people standing side by side, xyxy in full-frame pixels
+PEOPLE = np.array([[40, 60, 160, 460], [260, 60, 380, 460], [480, 60, 600, 460]], dtype=np.float32)
+
+
+class CropAwareModel:
+    """Stands in for PoseModel: returns the people fully inside the image it is given.
+
+    Frames are views into one full frame, so the crop offset is recovered from
+    the array's position in memory.
+    """
+
+    def __init__(self, full: np.ndarray) -> None:
+        self.full = full
+        self.shapes: List[tuple] = []
+
+    def predict(self, frames: List[np.ndarray], imgsz: Optional[int] = None) -> List[PoseDetections]:
+        return [self._detect(f) for f in frames]
+
+    def _detect(self, frame: np.ndarray) -> PoseDetections:
+        self.shapes.append(frame.shape[:2])
+        offset = frame.__array_interface__["data"][0] - self.full.__array_interface__["data"][0]
+        y0, x0 = divmod(offset // self.full.strides[1], self.full.shape[1])
+        h, w = frame.shape[:2]
+        boxes = PEOPLE - np.array([x0, y0, x0, y0], dtype=np.float32)
+        inside = (boxes[:, 0] >= 0) & (boxes[:, 1] >= 0) & (boxes[:, 2] <= w) & (boxes[:, 3] <= h)
+        boxes = boxes[inside]
+        n = len(boxes)
+        # Keypoints down the middle of each box so the joint geometry is defined
+        t = np.linspace(0.1, 0.9, 17, dtype=np.float32)
+        keypoints = np.empty((n, 17, 2), dtype=np.float32)
+        keypoints[..., 0] = ((boxes[:, 0] + boxes[:, 2]) / 2)[:, None]
+        keypoints[..., 1] = boxes[:, 1, None] + (boxes[:, 3] - boxes[:, 1])[:, None] * t
+        return PoseDetections(
+            boxes=boxes,
+            scores=np.full(n, 0.9, np.float32),
+            keypoints=keypoints,
+            keypoint_conf=np.full((n, 17), 0.9, np.float32),
+        )
+
+
+def test_multi_person_ignores_roi_crop():
+    frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+    model = CropAwareModel(frame)
+    tracker = MediaPipePoseTracker(model=model, tracking=True)
+    # Single-person mode leaves a box behind, as when a session switches modes
+    tracker.process_frame(frame, draw=False)
+    assert tracker._last_box is not None
+
+    people = MultiPersonTracker("Squat", tracker)
+    for _ in range(3):
+        found = people.process_frame(frame, draw=False)
+        assert len(found) == 3
+    assert model.shapes[-3:] == [FRAME_SHAPE[:2]] * 3
@@ -0,0 +1,71 @@
+"""Binary frames and results must round-trip and reject messages too short to carry a header."""
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from backend.protocol import (  # noqa: E402
+    FRAME_HEADER,
+    RESULT_HEADER,
+    decode_binary_frame,
+    decode_json_frame,
+    encode_binary_result,
+    encode_json_result,
+)
+
+JPEG = b"\xff\xd8\xff\xe0fake-jpeg\xff\xd9"
+
+
+def test_frame_header_round_trip():
+    message = FRAME_HEADER.pack(4_000_000_000, 1234.5) + JPEG
+    frame_id, timestamp_ms, jpeg = decode_binary_frame(message)
+    assert (frame_id, timestamp_ms) == (4_000_000_000, 1234.5)
+    assert isinstance(jpeg, memoryview)
+    assert bytes(jpeg) == JPEG
+
+
+def test_frame_header_only_has_empty_image():
+    frame_id, _, jpeg = decode_binary_frame(FRAME_HEADER.pack(7, 0.0))
+    assert frame_id == 7
+    assert len(jpeg) == 0
+
+
+@pytest.mark.parametrize("size", [0, 1, FRAME_HEADER.size - 1])
+def test_short_frame_is_rejected(size):
+    with pytest.raises(ValueError):
+        decode_binary_frame(FRAME_HEADER.pack(1, 2.0)[:size])
+
+
+def test_frame_header_is_little_endian():
+    message = (1).to_bytes(4, "little") + FRAME_HEADER.pack(0, 0.5)[4:]
+    assert decode_binary_frame(message)[:2] == (1, 0.5)
+
+
+def test_binary_result_round_trip():
+    result = {"reps": 3, "phase": "up", "cues": ["Squat rep 3"], "image": JPEG}
+    message = encode_binary_result(result, frame_id=42, timestamp_ms=99.25)
+    frame_id, timestamp_ms, json_len = RESULT_HEADER.unpack_from(message)
+    assert (frame_id, timestamp_ms) == (42, 99.25)
+    body = message[RESULT_HEADER.size:RESULT_HEADER.size + json_len]
+    assert json.loads(body) == {"reps": 3, "phase": "up", "cues": ["Squat rep 3"]}
+    assert message[RESULT_HEADER.size + json_len:] == JPEG
+    # The caller's dict keeps its image
+    assert result["image"] == JPEG
+
+
+def test_binary_result_without_image():
+    message = encode_binary_result({"reps": 0})
+    _, _, json_len = RESULT_HEADER.unpack_from(message)
+    assert len(message) == RESULT_HEADER.size + json_len
+
+
+def test_json_round_trip():
+    assert decode_json_frame("data:image/jpeg;base64,/9j/4A==") == b"\xff\xd8\xff\xe0"
+    assert decode_json_frame("/9j/4A==") == b"\xff\xd8\xff\xe0"
+    out = json.loads(encode_json_result({"reps": 1, "image": b"\xff\xd8"}))
+    assert out == {"type": "result", "reps": 1, "image": "/9g="}
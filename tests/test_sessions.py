@@ -0,0 +1,116 @@
+"""Per-session state: the latest-frame mailbox and the store that parks sessions between connections."""
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import backend.sessions as sessions  # noqa: E402
+from backend.mailbox import FrameMailbox, PendingFrame  # noqa: E402
+from backend.sessions import SessionStore  # noqa: E402
+
+
+def _frame(n: int) -> PendingFrame:
+    return PendingFrame(processor=None, frame=bytes([n]), frame_id=n)
+
+
+def test_mailbox_keeps_only_the_latest_frame():
+    async def run():
+        box = FrameMailbox()
+        assert not box.put(_frame(1))
+        assert box.put(_frame(2))
+        assert box.put(_frame(3))
+        got = await box.get()
+        assert got.frame_id == 3
+        assert box.overwritten == 2
+        # Nothing left behind the newest frame
+        box.put(_frame(4))
+        assert (await box.get()).frame_id == 4
+
+    asyncio.run(run())
+
+
+def test_mailbox_wakes_a_waiting_worker_and_closes():
+    async def run():
+        box = FrameMailbox()
+        waiting = asyncio.ensure_future(box.get())
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        box.put(_frame(5))
+        assert (await waiting).frame_id == 5
+        waiting = asyncio.ensure_future(box.get())
+        await asyncio.sleep(0)
+        box.close()
+        assert await waiting is None
+
+    asyncio.run(run())
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sessions.time, "monotonic", clock)
+    return clock
+
+
+def test_store_take_is_single_use(clock):
+    store = SessionStore(ttl_s=60)
+    assert store.put("a", {"reps": 3})
+    assert store.take("a") == {"reps": 3}
+    assert store.take("a") is None
+    assert store.stats()["taken"] == 1
+
+
+def test_store_expires_after_ttl(clock):
+    store = SessionStore(ttl_s=60)
+    store.put("old", {"n": 1})
+    clock.now += 30
+    store.put("new", {"n": 2})
+    clock.now += 31
+    assert store.take("old") is None
+    assert store.take("new") == {"n": 2}
+    stats = store.stats()
+    assert (stats["expired"], stats["parked"], stats["bytes"]) == (1, 0, 0)
+
+
+def test_store_evicts_least_recently_parked(clock):
+    store = SessionStore(ttl_s=60, max_sessions=2)
+    store.put("a", {"n": 1})
+    store.put("b", {"n": 2})
+    # Parking "a" again makes it the most recent
+    store.put("a", {"n": 3})
+    store.put("c", {"n": 4})
+    assert store.take("b") is None
+    assert store.take("a") == {"n": 3}
+    assert store.take("c") == {"n": 4}
+    assert store.stats()["evicted"] == 1
+
+
+def test_store_evicts_by_bytes(clock):
+    state = {"buf": np.zeros(1000, dtype=np.uint8)}
+    size = sessions.approx_size(state)
+    store = SessionStore(ttl_s=60, max_bytes=2 * size + size // 2)
+    for token in "abc":
+        store.put(token, {"buf": np.zeros(1000, dtype=np.uint8)})
+    assert store.take("a") is None
+    assert store.stats()["parked"] == 2
+    # Too big to park at all
+    assert not store.put("huge", {"buf": np.zeros(10 * size, dtype=np.uint8)})
+
+
+def test_store_disabled():
+    assert not SessionStore(ttl_s=0).put("a", {})
+    assert not SessionStore(ttl_s=60).put("", {})